@@ -31,7 +31,9 @@ from app.models import (
     document_model, 
     document_category_model,
     document_type_model,
-    certificate_model
+    certificate_model,
+    company_vault_stats_model,
+    job_model
 ) 
 
 # ------------------------------------------------------------------
@@ -0,0 +1,54 @@
+"""create_jobs_queue
+
+Revision ID: a4c8e2f6b3d1
+Revises: f3b9d5a7c2e1
+Create Date: 2026-10-17 21:05:12.418337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c8e2f6b3d1'
+down_revision: Union[str, Sequence[str], None] = 'f3b9d5a7c2e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Fila de jobs local (app/core/job_queue.py)
+    op.create_table('jobs',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('job_type', sa.String(), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=True),
+    sa.Column('priority', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('status', sa.String(), server_default='queued', nullable=False),
+    sa.Column('idempotency_key', sa.String(), nullable=True),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('max_attempts', sa.Integer(), server_default='5', nullable=False),
+    sa.Column('run_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('locked_by', sa.String(), nullable=True),
+    sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('result', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('idempotency_key')
+    )
+    op.create_index(op.f('ix_jobs_job_type'), 'jobs', ['job_type'], unique=False)
+    op.create_index('ix_jobs_claim', 'jobs', ['status', 'priority', 'run_at'], unique=False)
+    op.create_index('ix_jobs_type_finished', 'jobs', ['job_type', 'finished_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_jobs_type_finished', table_name='jobs')
+    op.drop_index('ix_jobs_claim', table_name='jobs')
+    op.drop_index(op.f('ix_jobs_job_type'), table_name='jobs')
+    op.drop_table('jobs')
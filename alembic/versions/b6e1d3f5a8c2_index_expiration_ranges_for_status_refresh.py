@@ -0,0 +1,31 @@
+"""index_expiration_ranges_for_status_refresh
+
+Revision ID: b6e1d3f5a8c2
+Revises: a4c8e2f6b3d1
+Create Date: 2026-10-17 23:41:06.582114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e1d3f5a8c2'
+down_revision: Union[str, Sequence[str], None] = 'a4c8e2f6b3d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Faixas de vencimento do job de status (StatusRefreshService / indexed_expiration_range)
+    op.create_index('ix_documents_expiration', 'documents', ['expiration_date'], unique=False)
+    op.create_index('ix_certificates_type_issue', 'certificates', ['type_id', 'issue_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_certificates_type_issue', table_name='certificates')
+    op.drop_index('ix_documents_expiration', table_name='documents')
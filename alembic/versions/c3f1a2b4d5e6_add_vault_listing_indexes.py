@@ -0,0 +1,37 @@
+"""add_vault_listing_indexes
+
+Revision ID: c3f1a2b4d5e6
+Revises: 9b79507a85a6
+Create Date: 2026-10-17 09:12:41.530118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f1a2b4d5e6'
+down_revision: Union[str, Sequence[str], None] = '9b79507a85a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Paginação keyset (company_id, created_at, id) e filtros do Cofre
+    op.create_index('ix_documents_company_created', 'documents', ['company_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_documents_company_status', 'documents', ['company_id', 'status'], unique=False)
+    op.create_index('ix_documents_company_expiration', 'documents', ['company_id', 'expiration_date'], unique=False)
+    op.create_index('ix_certificates_company_created', 'certificates', ['company_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_certificates_company_expiration', 'certificates', ['company_id', 'expiration_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_certificates_company_expiration', table_name='certificates')
+    op.drop_index('ix_certificates_company_created', table_name='certificates')
+    op.drop_index('ix_documents_company_expiration', table_name='documents')
+    op.drop_index('ix_documents_company_status', table_name='documents')
+    op.drop_index('ix_documents_company_created', table_name='documents')
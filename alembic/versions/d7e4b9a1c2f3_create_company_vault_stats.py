@@ -0,0 +1,60 @@
+"""create_company_vault_stats
+
+Revision ID: d7e4b9a1c2f3
+Revises: c3f1a2b4d5e6
+Create Date: 2026-10-17 14:03:22.184907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7e4b9a1c2f3'
+down_revision: Union[str, Sequence[str], None] = 'c3f1a2b4d5e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('company_vault_stats',
+    sa.Column('company_id', sa.String(), nullable=False),
+    sa.Column('total', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('valid', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('warning', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('expired', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('processing', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('error', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('next_expiration', sa.Date(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('company_id')
+    )
+
+    # Carga inicial (mesma agregação de VaultStatsRepository.rebuild)
+    op.execute("""
+        INSERT INTO company_vault_stats
+            (company_id, total, valid, warning, expired, processing, error, next_expiration)
+        SELECT company_id,
+               COUNT(*),
+               SUM(CASE WHEN status = 'valid' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN status = 'warning' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN status = 'expired' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN status = 'processing' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN status = 'error' THEN 1 ELSE 0 END),
+               MIN(CASE WHEN status IN ('valid', 'warning') THEN expiration_date END)
+        FROM (
+            SELECT company_id, status, expiration_date FROM documents
+            UNION ALL
+            SELECT company_id, status, expiration_date FROM certificates
+        ) AS items
+        GROUP BY company_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('company_vault_stats')
@@ -0,0 +1,37 @@
+"""add_content_hash_and_file_size
+
+Revision ID: e2a8c4f6b1d9
+Revises: d7e4b9a1c2f3
+Create Date: 2026-10-17 16:41:09.528310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a8c4f6b1d9'
+down_revision: Union[str, Sequence[str], None] = 'd7e4b9a1c2f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SHA-256 + tamanho gravados pelo ingest de upload (arquivos antigos ficam com NULL)
+    for table in ('documents', 'certificates'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+            batch_op.add_column(sa.Column('file_size', sa.BigInteger(), nullable=True))
+            batch_op.create_index(op.f(f'ix_{table}_content_hash'), ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ('certificates', 'documents'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_index(op.f(f'ix_{table}_content_hash'))
+            batch_op.drop_column('file_size')
+            batch_op.drop_column('content_hash')
@@ -0,0 +1,31 @@
+"""index_file_path_for_blob_refs
+
+Revision ID: f3b9d5a7c2e1
+Revises: e2a8c4f6b1d9
+Create Date: 2026-10-17 18:12:47.301925
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b9d5a7c2e1'
+down_revision: Union[str, Sequence[str], None] = 'e2a8c4f6b1d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Contagem de referências de cada blob (BlobRepository.count_references)
+    op.create_index(op.f('ix_documents_file_path'), 'documents', ['file_path'], unique=False)
+    op.create_index(op.f('ix_certificates_file_path'), 'certificates', ['file_path'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_certificates_file_path'), table_name='certificates')
+    op.drop_index(op.f('ix_documents_file_path'), table_name='documents')
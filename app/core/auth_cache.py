@@ -0,0 +1,214 @@
+"""
+Cache de Autenticação (Principal Cache).
+Memoiza o resultado de get_current_user: claims do JWT já decodificadas + um
+retrato compacto do usuário (id, role, is_active e vínculos ativos).
+Evita o jwt.decode e as queries de User/UserCompanyLink em toda rota protegida.
+
+Invalidação: qualquer commit que crie/altere/apague um User ou UserCompanyLink
+derruba as entradas daquele usuário (ver listeners no final do arquivo).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models.user_model import User, UserCompanyLink
+
+# Configurações (sobrescrevíveis via .env)
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "30"))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+
+# Chave usada em session.info para acumular os usuários alterados até o commit
+_DIRTY_KEY = "auth_cache_dirty_user_ids"
+
+
+@dataclass(frozen=True)
+class CompanyLinkSnapshot:
+    """Vínculo ativo do usuário com uma empresa (mesmos atributos usados do UserCompanyLink)."""
+    company_id: str
+    role: str
+    is_active: bool = True
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Usuário autenticado, desacoplado da Session.
+    Expõe os mesmos atributos que as rotas liam do model User
+    (id, email, role, is_active, company_links), então funciona como substituto direto.
+    Checagens de acesso devem usar get_link/has_company (O(1)) em vez de varrer company_links.
+    """
+    id: str
+    email: str
+    role: str
+    is_active: bool
+    company_links: Tuple[CompanyLinkSnapshot, ...]
+    exp: Optional[float] = None
+    links_by_company: Mapping[str, CompanyLinkSnapshot] = field(
+        default_factory=dict, compare=False, repr=False
+    )
+
+    def __post_init__(self):
+        # Índice company_id -> vínculo (consultores chegam a 200+ empresas)
+        if not self.links_by_company and self.company_links:
+            index = MappingProxyType({link.company_id: link for link in self.company_links})
+            object.__setattr__(self, "links_by_company", index)
+
+    def get_link(self, company_id: str) -> Optional[CompanyLinkSnapshot]:
+        return self.links_by_company.get(company_id)
+
+    def has_company(self, company_id: str) -> bool:
+        return company_id in self.links_by_company
+
+    @classmethod
+    def from_user(cls, user: User, claims: dict) -> "Principal":
+        links = tuple(
+            CompanyLinkSnapshot(company_id=link.company_id, role=link.role, is_active=True)
+            for link in user.company_links
+            if link.is_active
+        )
+        return cls(
+            id=user.id,
+            email=user.email,
+            role=user.role,
+            is_active=bool(user.is_active),
+            company_links=links,
+            exp=claims.get("exp"),
+        )
+
+
+class PrincipalCache:
+    """
+    LRU com TTL, thread-safe (as rotas síncronas rodam no threadpool do FastAPI).
+    Chave: assinatura do JWT. Índice secundário por user_id para invalidação.
+    """
+
+    def __init__(self, ttl_seconds: float = AUTH_CACHE_TTL_SECONDS, max_entries: int = AUTH_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, Principal, float]]" = OrderedDict()
+        self._by_user: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _signature(token: str) -> str:
+        return token.rsplit(".", 1)[-1]
+
+    def get(self, token: str) -> Optional[Principal]:
+        key = self._signature(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            # Confere o token inteiro: a assinatura é só o índice, não a prova
+            if entry is None or entry[0] != token:
+                self.misses += 1
+                return None
+            _, principal, expires_at = entry
+            if expires_at <= now:
+                self._discard(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return principal
+
+    def put(self, token: str, principal: Principal) -> None:
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        # Nunca servir do cache um token que já teria expirado no jwt.decode
+        if principal.exp is not None:
+            expires_at = min(expires_at, float(principal.exp))
+
+        key = self._signature(token)
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (token, principal, expires_at)
+            self._by_user.setdefault(principal.id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: str) -> None:
+        with self._lock:
+            keys = self._by_user.pop(user_id, set())
+            for key in keys:
+                self._entries.pop(key, None)
+            if keys:
+                self.invalidations += len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _discard(self, key: str) -> None:
+        """Remove uma entrada (chamar com o lock já adquirido)."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        user_id = entry[1].id
+        keys = self._by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[user_id]
+
+
+# Instância única do processo
+principal_cache = PrincipalCache()
+
+
+# --- INVALIDAÇÃO AUTOMÁTICA (Eventos do SQLAlchemy) ---
+# Cobre toggle_company_status, add_member, update_user_me, exclusão de usuário/empresa
+# e qualquer outro caminho que passe pelo ORM, sem espalhar chamadas pelos routers.
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    changed = session.info.setdefault(_DIRTY_KEY, set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, User) and obj.id:
+            changed.add(obj.id)
+        elif isinstance(obj, UserCompanyLink) and obj.user_id:
+            changed.add(obj.user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    for user_id in session.info.pop(_DIRTY_KEY, ()):
+        principal_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    # Nada foi persistido: o cache continua válido
+    session.info.pop(_DIRTY_KEY, None)
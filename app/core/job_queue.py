@@ -0,0 +1,222 @@
+"""
+Fila de Jobs Local (Worker).
+Executa fora da requisição o trabalho que não precisa de resposta imediata, com a fila
+na própria tabela 'jobs' (app/repositories/job_repository.py): roda offline, sem Redis
+nem broker. Vários workers (processos/máquinas) podem consumir a mesma fila.
+
+- job_handler('tipo'): registra a função que executa um tipo de job. Ela recebe uma
+  sessão própria e o payload, e devolve um dict (gravado em jobs.result) ou None.
+  Exceções contam como falha: retry com backoff até max_attempts.
+- JobWorker: ciclo reservar -> executar -> concluir/falhar, com métricas por tipo.
+  Enquanto o handler roda, uma thread renova o lease (heartbeat) a cada terço dele:
+  job longo (leitura de todas as pendentes, dedupe do storage) não é tomado por outro worker.
+  O lease só vence se o worker morrer.
+
+Os handlers da aplicação ficam em app/services/job_handlers.py; o worker sobe com
+`python -m app.scripts.run_worker`. start_embedded_worker() roda um worker numa thread
+do próprio processo (a API usa para o GC do storage quando não há worker dedicado).
+"""
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.database import SessionLocal
+from app.repositories.job_repository import JobRepository, JOB_LEASE_SECONDS, utcnow, as_utc, latency_summary
+
+# Configurações (sobrescrevíveis via .env)
+# Desligado: a leitura das certidões pós-upload continua nas BackgroundTasks do FastAPI
+JOB_QUEUE_ENABLED = os.getenv("JOB_QUEUE_ENABLED", "false").lower() in ("1", "true", "yes")
+JOB_WORKER_BATCH_SIZE = int(os.getenv("JOB_WORKER_BATCH_SIZE", "10"))        # Jobs reservados por ciclo
+JOB_WORKER_POLL_INTERVAL = float(os.getenv("JOB_WORKER_POLL_INTERVAL", "1"))  # Espera com a fila vazia (s)
+
+_WINDOW = 1024  # Amostras de latência guardadas por tipo
+
+JobHandler = Callable[[Session, dict], Optional[dict]]
+_handlers: Dict[str, JobHandler] = {}
+
+
+def job_handler(job_type: str):
+    """Decorator: registra a função como executora de 'job_type'."""
+    def register(func: JobHandler) -> JobHandler:
+        _handlers[job_type] = func
+        return func
+    return register
+
+
+def registered_types() -> List[str]:
+    return sorted(_handlers)
+
+
+class JobMetrics:
+    """Contadores do worker por tipo de job: concluídos, falhas, vazão e latências."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._completed = defaultdict(int)
+        self._failed = defaultdict(int)
+        self._runs = defaultdict(lambda: deque(maxlen=_WINDOW))
+        self._waits = defaultdict(lambda: deque(maxlen=_WINDOW))
+
+    def record(self, job_type: str, ok: bool, run_seconds: float, wait_seconds: float) -> None:
+        with self._lock:
+            if ok:
+                self._completed[job_type] += 1
+            else:
+                self._failed[job_type] += 1
+            self._runs[job_type].append(run_seconds)
+            self._waits[job_type].append(wait_seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            uptime = time.monotonic() - self._started
+            job_types = sorted(set(self._completed) | set(self._failed))
+            return {
+                "uptime_seconds": round(uptime, 1),
+                "job_types": {
+                    job_type: {
+                        "completed": self._completed[job_type],
+                        "failed": self._failed[job_type],
+                        "throughput_per_second": round(self._completed[job_type] / uptime, 2) if uptime else 0.0,
+                        "run_ms": latency_summary(list(self._runs[job_type])),
+                        "wait_ms": latency_summary(list(self._waits[job_type])),
+                    }
+                    for job_type in job_types
+                },
+            }
+
+
+class JobWorker:
+    """
+    Consumidor da fila. run_once() faz um ciclo; run() repete até stop() (SIGTERM no script).
+    A reserva e a conclusão usam uma sessão; cada handler roda numa sessão só dele,
+    para que um rollback do job não desfaça o controle da fila.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[sessionmaker] = None,
+        job_types: Optional[Iterable[str]] = None,
+        batch_size: int = JOB_WORKER_BATCH_SIZE,
+        poll_interval: float = JOB_WORKER_POLL_INTERVAL,
+        lease_seconds: int = JOB_LEASE_SECONDS,
+        worker_id: Optional[str] = None,
+        heartbeat_interval: Optional[float] = None,
+    ):
+        self.session_factory = session_factory or SessionLocal
+        self.job_types = list(job_types) if job_types else None
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval or lease_seconds / 3
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.metrics = JobMetrics()
+        self._stop = threading.Event()
+
+    def run_once(self) -> int:
+        """Devolve à fila os leases vencidos, reserva um lote e executa. Retorna quantos jobs rodou."""
+        db = self.session_factory()
+        try:
+            JobRepository.release_expired(db)
+            jobs = JobRepository.claim(db, self.worker_id, self.batch_size, self.job_types, self.lease_seconds)
+            for job in jobs:
+                if self._stop.is_set():
+                    # Parada pedida: o resto do lote volta à fila quando o lease vencer
+                    break
+                self._execute(db, job)
+            return len(jobs)
+        finally:
+            db.close()
+
+    def run(self, max_jobs: Optional[int] = None, stop_when_idle: bool = False) -> int:
+        processed = 0
+        while not self._stop.is_set():
+            count = self.run_once()
+            processed += count
+            if max_jobs is not None and processed >= max_jobs:
+                break
+            if count == 0:
+                if stop_when_idle:
+                    break
+                self._stop.wait(self.poll_interval)
+        return processed
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> dict:
+        return {"worker_id": self.worker_id, "job_types_filter": self.job_types, **self.metrics.stats()}
+
+    def _execute(self, db: Session, job) -> None:
+        job_type, payload = job.job_type, dict(job.payload or {})
+        wait_seconds = max((utcnow() - as_utc(job.run_at)).total_seconds(), 0.0)
+        handler = _handlers.get(job_type)
+        if handler is None:
+            JobRepository.fail(db, job, self.worker_id, f"Nenhum handler registrado para '{job_type}'.", retry=False)
+            self.metrics.record(job_type, ok=False, run_seconds=0.0, wait_seconds=wait_seconds)
+            return
+
+        started = time.perf_counter()
+        work = self.session_factory()
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job.id, done), name=f"job-heartbeat-{job.id}", daemon=True)
+        heartbeat.start()
+        result, error = None, None
+        try:
+            result = handler(work, payload)
+            work.commit()
+        except Exception as e:
+            work.rollback()
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            done.set()
+            heartbeat.join()
+            work.close()
+
+        run_seconds = time.perf_counter() - started
+        if error is not None:
+            JobRepository.fail(db, job, self.worker_id, error)
+            self.metrics.record(job_type, ok=False, run_seconds=run_seconds, wait_seconds=wait_seconds)
+            return
+        JobRepository.complete(db, job, self.worker_id, result)
+        self.metrics.record(job_type, ok=True, run_seconds=run_seconds, wait_seconds=wait_seconds)
+
+    def _heartbeat(self, job_id: str, done: threading.Event) -> None:
+        """Renova o lease até o handler terminar (sessão própria: a do handler está em uso)."""
+        while not done.wait(self.heartbeat_interval):
+            db = self.session_factory()
+            try:
+                if not JobRepository.extend_lease(db, job_id, self.worker_id, self.lease_seconds):
+                    return # A reserva já não é nossa: não há o que renovar
+            except Exception:
+                db.rollback() # Falha pontual do banco: tenta de novo no próximo intervalo
+            finally:
+                db.close()
+
+
+def start_embedded_worker(
+    job_types: Iterable[str], poll_interval: float = JOB_WORKER_POLL_INTERVAL,
+    session_factory: Optional[sessionmaker] = None,
+) -> JobWorker:
+    """
+    Worker numa thread daemon deste processo, só com 'job_types'. Parar com worker.stop().
+    Uma falha do banco não derruba a thread: ela espera poll_interval e tenta de novo.
+    """
+    worker = JobWorker(session_factory=session_factory, job_types=job_types, poll_interval=poll_interval)
+
+    def loop() -> None:
+        while not worker._stop.is_set():
+            try:
+                worker.run()
+            except Exception as e:
+                print(f"⚠️ Worker embutido ({', '.join(worker.job_types)}): {e}")
+                worker._stop.wait(poll_interval)
+
+    threading.Thread(target=loop, name=f"embedded-worker-{worker.worker_id}", daemon=True).start()
+    return worker
@@ -0,0 +1,205 @@
+"""
+Pool de Hashing de Senhas (Bcrypt fora do threadpool).
+O bcrypt é CPU-bound e proposital lento: rodando direto nas rotas síncronas,
+um pico de logins ocupa todas as threads do FastAPI e derruba o resto da API.
+
+Aqui o trabalho vai para um ProcessPoolExecutor dedicado (escala por núcleo, sem GIL),
+com controle de admissão: passou de PASSWORD_HASH_MAX_PENDING operações em voo,
+a chamada falha na hora com PasswordHasherSaturated (vira 503 + Retry-After no main.py).
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from app.core import security
+
+# Configurações (sobrescrevíveis via .env)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 8)))
+# "process" (padrão) ou "thread" (útil em ambientes sem multiprocessing)
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "process")
+# Segundos sugeridos ao cliente no header Retry-After quando o pool satura
+PASSWORD_HASH_RETRY_AFTER = int(os.getenv("PASSWORD_HASH_RETRY_AFTER", "1"))
+
+# Quantas amostras de latência guardar para os percentis
+_LATENCY_WINDOW = 1024
+
+
+class PasswordHasherSaturated(Exception):
+    """Fila do pool cheia: a requisição deve ser recusada, não enfileirada."""
+
+    def __init__(self, retry_after: int = PASSWORD_HASH_RETRY_AFTER):
+        self.retry_after = retry_after
+        super().__init__("Serviço de autenticação sobrecarregado. Tente novamente em instantes.")
+
+
+# Funções executadas nos workers (nível de módulo para serem picklable)
+def _hash_job(password: str) -> str:
+    return security.get_password_hash(password)
+
+def _verify_job(plain_password: str, hashed_password: str) -> bool:
+    return security.verify_password(plain_password, hashed_password)
+
+def _verify_and_update_job(plain_password: str, hashed_password: str):
+    return security.verify_and_update_password(plain_password, hashed_password)
+
+def _dummy_verify_job() -> bool:
+    return security.dummy_verify_password()
+
+
+class PasswordHasherPool:
+    """
+    Executor de bcrypt com API assíncrona, admissão limitada e métricas.
+    O executor é criado sob demanda (o import do módulo não sobe processos).
+    """
+
+    def __init__(
+        self,
+        workers: int = PASSWORD_HASH_WORKERS,
+        max_pending: int = PASSWORD_HASH_MAX_PENDING,
+        executor_kind: str = PASSWORD_HASH_EXECUTOR,
+    ):
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.executor_kind = executor_kind
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._latencies = deque(maxlen=_LATENCY_WINDOW)
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+        self.max_in_flight = 0
+
+    # --- API Pública ---
+
+    async def hash(self, password: str) -> str:
+        return await self._run_async(_hash_job, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run_async(_verify_job, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """(valido, novo_hash): novo_hash vem preenchido quando o custo do hash antigo mudou."""
+        return await self._run_async(_verify_and_update_job, plain_password, hashed_password)
+
+    async def dummy_verify(self) -> bool:
+        """Verify fictício (usuário inexistente) passando pela mesma fila e admissão."""
+        return await self._run_async(_dummy_verify_job)
+
+    def hash_blocking(self, password: str) -> str:
+        """Para rotas síncronas de baixo volume: a CPU ainda fica no pool, só a thread espera."""
+        return self._run_blocking(_hash_job, password)
+
+    def verify_blocking(self, plain_password: str, hashed_password: str) -> bool:
+        return self._run_blocking(_verify_job, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            samples = sorted(self._latencies)
+            return {
+                "executor": self.executor_kind,
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "in_flight": self._in_flight,
+                "max_in_flight": self.max_in_flight,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "failed": self.failed,
+                "latency_ms": {
+                    "avg": round(sum(samples) / len(samples) * 1000, 2) if samples else 0.0,
+                    "p50": round(_percentile(samples, 0.50) * 1000, 2),
+                    "p95": round(_percentile(samples, 0.95) * 1000, 2),
+                    "max": round(samples[-1] * 1000, 2) if samples else 0.0,
+                },
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._latencies.clear()
+            self.submitted = self.completed = self.rejected = self.failed = 0
+            self.max_in_flight = self._in_flight
+
+    # --- Internos ---
+
+    async def _run_async(self, fn, *args):
+        self._admit()
+        start = time.perf_counter()
+        ok = False
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_executor(), fn, *args)
+            ok = True
+            return result
+        finally:
+            self._release(time.perf_counter() - start, ok)
+
+    def _run_blocking(self, fn, *args):
+        self._admit()
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = self._get_executor().submit(fn, *args).result()
+            ok = True
+            return result
+        finally:
+            self._release(time.perf_counter() - start, ok)
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._in_flight >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherSaturated()
+            self._in_flight += 1
+            self.submitted += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+
+    def _release(self, elapsed: float, ok: bool) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if ok:
+                self.completed += 1
+                self._latencies.append(elapsed)
+            else:
+                self.failed += 1
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.executor_kind == "thread":
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.workers, thread_name_prefix="bcrypt"
+                        )
+                    else:
+                        # 'spawn' funciona igual em Linux e Windows e não herda
+                        # threads/conexões abertas do processo da API
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=self.workers,
+                            mp_context=multiprocessing.get_context("spawn"),
+                        )
+        return self._executor
+
+
+def _percentile(samples, fraction: float) -> float:
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, int(round(fraction * (len(samples) - 1))))
+    return samples[index]
+
+
+# Instância única do processo
+password_hasher = PasswordHasherPool()
@@ -0,0 +1,131 @@
+"""
+Pool de Extração de Texto de PDFs (Certidões).
+Ler o texto de um PDF é CPU-bound (descompressão dos streams + decodificação das
+fontes em Python puro, via pypdf): no threadpool da API, o GIL serializa tudo.
+
+O trabalho vai para um ProcessPoolExecutor dedicado (um worker por núcleo), no mesmo
+molde do pool de bcrypt (password_hasher.py). Cada job lê as páginas em ordem e para
+assim que emissão, validade, CNPJ e código já foram encontrados: certidões trazem
+tudo na 1ª página, os anexos não precisam ser decodificados.
+"""
+import io
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional, Tuple, Union
+
+from pypdf import PdfReader
+
+from app.utils.certificate_parser import parse_certificate_text
+
+# Configurações (sobrescrevíveis via .env)
+PDF_EXTRACTION_WORKERS = int(os.getenv("PDF_EXTRACTION_WORKERS", str(os.cpu_count() or 2)))
+# "process" (padrão) ou "thread" (útil em ambientes sem multiprocessing e nos testes)
+PDF_EXTRACTION_EXECUTOR = os.getenv("PDF_EXTRACTION_EXECUTOR", "process")
+PDF_EXTRACTION_MAX_PAGES = int(os.getenv("PDF_EXTRACTION_MAX_PAGES", "10"))
+
+_REQUIRED_FIELDS = ("issue_date", "expiration_date", "cnpj", "authentication_code")
+
+
+# Função executada nos workers (nível de módulo para ser picklable)
+def extract_pdf(source: Union[str, bytes], max_pages: int = PDF_EXTRACTION_MAX_PAGES) -> dict:
+    """
+    Texto + campos de uma certidão. 'source' = caminho local ou os bytes do PDF (S3).
+    Retorna {'pages', 'total_pages', 'chars', 'fields', 'seconds'}; erros de leitura sobem.
+    """
+    started = time.perf_counter()
+    reader = PdfReader(source if isinstance(source, str) else io.BytesIO(source))
+    texts = []
+    fields = {}
+    for page in reader.pages[:max_pages]:
+        texts.append(page.extract_text() or "")
+        fields = parse_certificate_text("\n".join(texts))
+        if all(fields.get(name) for name in _REQUIRED_FIELDS):
+            break
+    return {
+        "pages": len(texts),
+        "total_pages": len(reader.pages),
+        "chars": sum(len(text) for text in texts),
+        "fields": fields,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+class PdfExtractorPool:
+    """
+    Executor de extração com métricas. Criado sob demanda (o import não sobe processos).
+    run() devolve um (resultado, erro) por PDF, na ordem de entrada: um PDF corrompido
+    não derruba o lote.
+    """
+
+    def __init__(self, workers: int = PDF_EXTRACTION_WORKERS, executor_kind: str = PDF_EXTRACTION_EXECUTOR):
+        self.workers = max(1, workers)
+        self.executor_kind = executor_kind
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.pages = 0
+        self.busy_seconds = 0.0
+
+    def run(self, sources: List[Union[str, bytes]], max_pages: int = PDF_EXTRACTION_MAX_PAGES) -> List[Tuple[Optional[dict], Optional[str]]]:
+        executor = self._get_executor()
+        futures = [executor.submit(extract_pdf, source, max_pages) for source in sources]
+        with self._lock:
+            self.submitted += len(futures)
+
+        outcomes = []
+        for future in futures:
+            try:
+                result = future.result()
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                outcomes.append((None, f"{type(e).__name__}: {e}"))
+                continue
+            with self._lock:
+                self.completed += 1
+                self.pages += result["pages"]
+                self.busy_seconds += result["seconds"]
+            outcomes.append((result, None))
+        return outcomes
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "executor": self.executor_kind,
+                "workers": self.workers,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "pages": self.pages,
+                # Vazão de um worker ocupado (tempo de CPU gasto nos jobs, sem fila)
+                "pages_per_second_per_worker": round(self.pages / self.busy_seconds, 1) if self.busy_seconds else 0.0,
+            }
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.executor_kind == "thread":
+                        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pdf")
+                    else:
+                        # 'spawn': igual em Linux e Windows, não herda conexões do processo da API
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=self.workers,
+                            mp_context=multiprocessing.get_context("spawn"),
+                        )
+        return self._executor
+
+
+# Instância única do processo
+pdf_extractor = PdfExtractorPool()
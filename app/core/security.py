@@ -2,9 +2,14 @@
 Núcleo de Segurança.
 Responsável por Criptografia (Hash de Senha) e Tokenização (JWT).
 """
+import base64
+import hashlib
+import hmac
+import json
 import os
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Tuple
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 
@@ -17,13 +22,51 @@ if SECRET_KEY == "troque_isso_por_uma_hash_bem_segura_no_env":
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Links de download assinados: curtos, o visualizador de PDF pede um novo a cada abertura
+DOWNLOAD_URL_TTL_SECONDS = int(os.getenv("DOWNLOAD_URL_TTL_SECONDS", "300"))
+# Chave própria derivada da SECRET_KEY: um token de download nunca vale como JWT (e vice-versa)
+_DOWNLOAD_SIGNING_KEY = hmac.new(SECRET_KEY.encode(), b"licitadoc:download-url:v1", hashlib.sha256).digest()
+
+# Custo do Bcrypt (log2 das iterações). Cada +1 dobra o tempo de login.
+# Política por deployment: hashes com custo diferente são refeitos no próximo login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+if not 4 <= BCRYPT_ROUNDS <= 31:
+    raise ValueError("BCRYPT_ROUNDS deve estar entre 4 e 31.")
+
 # Contexto de Criptografia (Bcrypt é padrão de mercado)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min == max == default: qualquer hash fora do custo atual é marcado para atualização
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Valida se a senha digitada bate com o hash do banco."""
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Valida a senha e, se o hash estiver fora da política atual (custo/algoritmo),
+    devolve um novo hash para ser gravado. Retorna (valido, novo_hash_ou_None).
+    Hash corrompido/irreconhecível conta como senha inválida (com o mesmo custo de CPU).
+    """
+    try:
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    except ValueError:
+        pwd_context.dummy_verify()
+        return False, None
+
+def dummy_verify_password() -> bool:
+    """
+    Gasta o mesmo tempo de um verify real contra um hash fictício no custo atual.
+    Usado quando o usuário não existe, para o tempo do login não revelar isso.
+    """
+    pwd_context.dummy_verify()
+    return False
+
 def get_password_hash(password: str) -> str:
     """Gera o hash seguro da senha."""
     return pwd_context.hash(password)
@@ -43,4 +86,53 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode.update({"exp": expire})
     
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
\ No newline at end of file
+    return encoded_jwt
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def create_download_token(
+    item_id: str, content_hash: str, filename: str, ttl_seconds: Optional[int] = None
+) -> Tuple[str, datetime]:
+    """
+    Token HMAC-SHA256 de download: amarra item, hash do conteúdo, nome e validade.
+    Quem tem o token baixa o arquivo sem sessão de banco nem JWT (ver /documents/signed/{token}).
+    O payload é legível (base64): o caminho no storage não vai nele, o servidor o deriva do hash.
+    Retorna (token, expira_em).
+    """
+    expires = int(time.time()) + (ttl_seconds or DOWNLOAD_URL_TTL_SECONDS)
+    payload = json.dumps(
+        {"i": item_id, "h": content_hash, "n": filename, "e": expires},
+        separators=(",", ":"),
+    ).encode()
+    signature = hmac.new(_DOWNLOAD_SIGNING_KEY, payload, hashlib.sha256).digest()
+    return f"{_b64encode(payload)}.{_b64encode(signature)}", datetime.fromtimestamp(expires, tz=timezone.utc)
+
+
+def verify_download_token(token: str) -> dict:
+    """
+    Valida assinatura e validade. Retorna o payload
+    ({'i': item_id, 'h': content_hash, 'n': filename, 'e': expira_em_epoch}).
+    Levanta ValueError se o token foi adulterado ou expirou.
+    """
+    try:
+        encoded_payload, encoded_signature = token.split(".")
+        payload = _b64decode(encoded_payload)
+        signature = _b64decode(encoded_signature)
+    except ValueError:
+        raise ValueError("Link de download inválido.")
+
+    expected = hmac.new(_DOWNLOAD_SIGNING_KEY, payload, hashlib.sha256).digest()
+    if not hmac.compare_digest(signature, expected):
+        raise ValueError("Link de download inválido.")
+
+    data = json.loads(payload)
+    if data["e"] < time.time():
+        raise ValueError("Link de download expirado.")
+    return data
@@ -1,43 +1,316 @@
 """
 Módulo de Armazenamento (Storage).
-Abstrai a lógica de salvar arquivos. Hoje é local, amanhã pode ser S3/Azure.
+Abstrai a lógica de salvar arquivos. Os bytes ficam no backend configurado em
+STORAGE_BACKEND (disco local ou S3, ver storage_backends.py); o banco só guarda a chave.
+
+Todo upload passa por ingest_upload(): leitura em blocos fixos (aiofiles, sem
+ocupar o threadpool), SHA-256 e tamanho calculados na mesma passada, limite de
+tamanho aplicado durante a leitura (aborta no meio do stream), checagem dos
+bytes mágicos '%PDF-' no primeiro bloco e gravação num arquivo temporário
+entregue ao backend só no sucesso (rename atômico no disco local, upload
+multipart no S3). O temporário é sempre local: o hash define a chave final.
+
+Armazenamento endereçado por conteúdo: o nome final é o próprio SHA-256, com
+dois níveis de diretório ('storage/blobs/ab/cd/abcd...'). Reenviar um arquivo que
+já existe não grava nada: só a linha nova no banco aponta para o mesmo blob.
+As referências são as linhas de documents/certificates com aquele file_path
+(ver BlobRepository); o blob só é apagado pelo job 'storage.gc', depois de uma
+carência, se nenhuma linha voltou a apontar para ele. Reusar um blob renova o
+last_modified dele (backend.touch): o GC também poupa o que foi tocado dentro da
+carência, então um upload que deduplicou não perde o arquivo antes de comitar.
 """
-import shutil
+import hashlib
+import mimetypes
 import os
+import shutil
 import uuid
-from fastapi import UploadFile
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+import aiofiles
+import aiofiles.os
+from fastapi import Request, UploadFile
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.storage_backends import StorageBackend, content_disposition, create_backend
+from app.utils import http_conditional
 
 # Define o caminho absoluto para evitar erros de diretório relativo
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-UPLOAD_DIR = os.path.join(BASE_DIR, "storage", "uploads")
+UPLOAD_DIR = os.path.join(BASE_DIR, "storage", "uploads") # Legado: arquivos com nome UUID (antes dos blobs)
+BLOB_DIR = os.path.join(BASE_DIR, "storage", "blobs")
+BLOB_PREFIX = "storage/blobs/" # Prefixo do file_path de todo arquivo endereçado por conteúdo
+
+# Limites do upload (sobrescrevíveis via .env)
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(25 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+# Upload em lote (/documents/upload/bulk): arquivos por requisição e ingests simultâneos
+UPLOAD_BULK_MAX_FILES = int(os.getenv("UPLOAD_BULK_MAX_FILES", "50"))
+UPLOAD_BULK_CONCURRENCY = int(os.getenv("UPLOAD_BULK_CONCURRENCY", "8"))
+
+# Downloads do S3: redirecionar para URL pré-assinada em vez de passar os bytes pela API.
+# Desligado por padrão: o front baixa com header Authorization, que o S3 recusa num redirect.
+STORAGE_PRESIGN_DOWNLOADS = os.getenv("STORAGE_PRESIGN_DOWNLOADS", "false").lower() in ("1", "true", "yes")
+STORAGE_PRESIGN_EXPIRES = int(os.getenv("STORAGE_PRESIGN_EXPIRES", "300"))
+
+# Offload do download para o proxy (disco local): a API só autoriza e devolve um header,
+# o nginx/Apache envia o arquivo com sendfile (zero-copy) e atende Range sozinho.
+#   DOWNLOAD_OFFLOAD=x-accel-redirect  -> nginx:
+#       location /_protected/ { internal; alias /caminho/do/projeto/; }
+#   DOWNLOAD_OFFLOAD=x-sendfile        -> Apache mod_xsendfile / lighttpd (caminho absoluto)
+#   vazio/off                          -> FileResponse pela própria API (padrão)
+DOWNLOAD_OFFLOAD = os.getenv("DOWNLOAD_OFFLOAD", "off").lower()
+DOWNLOAD_ACCEL_PREFIX = os.getenv("DOWNLOAD_ACCEL_PREFIX", "/_protected/")
+
+# Documentos são privados: o navegador pode guardar, mas revalida (If-None-Match) a cada uso
+DOWNLOAD_CACHE_CONTROL = "private, no-cache"
+
+# A especificação aceita lixo antes do cabeçalho: procuramos nos primeiros 1024 bytes
+PDF_MAGIC = b"%PDF-"
+PDF_MAGIC_WINDOW = 1024
+
+
+class UploadRejected(Exception):
+    """Upload recusado pela validação (vira HTTP 'status_code' no handler global do main.py)."""
+    status_code = 400
+
+
+class UploadTooLarge(UploadRejected):
+    status_code = 413
+
+
+class UnsupportedFileType(UploadRejected):
+    status_code = 415
+
+
+@dataclass(frozen=True)
+class StoredFile:
+    """Resultado do ingest: onde o arquivo ficou e o que foi gravado."""
+    path: str       # Caminho relativo (ex: 'storage/blobs/ab/cd/<sha256>'), o que vai para o banco
+    size: int       # Bytes do conteúdo
+    sha256: str     # Hash hexadecimal do conteúdo
+    deduplicated: bool = False  # True = o blob já existia, nada foi gravado
+
+
+_backend: Optional[StorageBackend] = None
+
+
+def get_backend() -> StorageBackend:
+    """Backend do processo (criado na primeira chamada; o client S3 é reaproveitado)."""
+    global _backend
+    if _backend is None:
+        _backend = create_backend(BASE_DIR)
+    return _backend
+
 
 def init_storage():
     """Cria a pasta storage/uploads se não existir."""
     os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-def save_file_locally(file: UploadFile) -> str:
-    """
-    Salva o arquivo recebido no disco com um nome UUID único.
-    Retorna: Caminho relativo para salvar no banco.
-    """
-    init_storage()
-    
-    # Extrai extensão (ex: .pdf)
-    filename = file.filename or "unknown"
-    extension = filename.split(".")[-1] if "." in filename else "bin"
-    
-    # Gera nome único
-    unique_name = f"{uuid.uuid4()}.{extension}"
-    
-    # Monta caminho completo (seguro para Windows/Linux)
-    file_path = os.path.join(UPLOAD_DIR, unique_name)
-    
-    # Salva o conteúdo
+
+def absolute_path(relative_path: str) -> str:
+    """
+    Caminho no disco LOCAL de um file_path do banco (caminhos absolutos antigos passam direto).
+    Só para ferramentas que leem o legado do disco; o resto passa pelo backend.
+    """
+    return os.path.join(BASE_DIR, relative_path)
+
+
+def blob_path(sha256: str) -> str:
+    """file_path (relativo) do blob de um conteúdo: 'storage/blobs/ab/cd/abcd...'."""
+    return f"{BLOB_PREFIX}{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def is_blob(file_path: Optional[str]) -> bool:
+    return bool(file_path) and file_path.startswith(BLOB_PREFIX)
+
+
+def media_type_for(filename: Optional[str]) -> str:
+    """Content-Type pela extensão do nome original (o documento de identidade do cadastro pode ser foto)."""
+    return (filename and mimetypes.guess_type(filename)[0]) or "application/octet-stream"
+
+
+async def ingest_upload(
+    file: UploadFile,
+    max_bytes: Optional[int] = None,
+    require_pdf: bool = True,
+    chunk_size: Optional[int] = None,
+) -> StoredFile:
+    """
+    Grava o upload no blob do seu SHA-256 (ou reaproveita o blob existente).
+    Levanta UploadTooLarge / UnsupportedFileType (nada fica no disco) ou IOError em falha de gravação.
+    Sem max_bytes/chunk_size, valem UPLOAD_MAX_BYTES/UPLOAD_CHUNK_SIZE.
+    """
+    max_bytes = max_bytes or UPLOAD_MAX_BYTES
+    chunk_size = chunk_size or UPLOAD_CHUNK_SIZE
+
+    # Content-Length do multipart já conhecido: recusa antes de ler um byte
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLarge(f"Arquivo excede o limite de {max_bytes} bytes.")
+
+    # Temporários dentro de BLOB_DIR: no backend local é o mesmo disco, então o rename é atômico
+    temp_dir = os.path.join(BLOB_DIR, ".tmp")
+    await aiofiles.os.makedirs(temp_dir, exist_ok=True)
+    temp_path = os.path.join(temp_dir, f"{uuid.uuid4()}.part")
+
+    digest = hashlib.sha256()
+    size = 0
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        async with aiofiles.open(temp_path, "wb") as buffer:
+            while chunk := await file.read(chunk_size):
+                if size == 0 and require_pdf and PDF_MAGIC not in chunk[:PDF_MAGIC_WINDOW]:
+                    raise UnsupportedFileType("O conteúdo enviado não é um PDF válido.")
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Arquivo excede o limite de {max_bytes} bytes.")
+                digest.update(chunk)
+                await buffer.write(chunk)
+        if size == 0 and require_pdf:
+            raise UnsupportedFileType("O arquivo enviado está vazio.")
+
+        sha256 = digest.hexdigest()
+        relative = blob_path(sha256)
+        backend = get_backend()
+        # Existe e foi tocado numa chamada só: nenhum GC apaga o blob entre a checagem e o commit
+        deduplicated = await run_in_threadpool(backend.touch, relative)
+        if deduplicated:
+            # Mesmo conteúdo já armazenado: descarta a cópia, o insert vira só metadado
+            await _discard(temp_path)
+        else:
+            await run_in_threadpool(backend.put_file, relative, temp_path)
+    except UploadRejected:
+        await _discard(temp_path)
+        raise
     except Exception as e:
+        await _discard(temp_path)
         raise IOError(f"Falha ao gravar arquivo no disco: {e}")
-        
-    # Retorna caminho relativo (para portabilidade do banco)
-    return f"storage/uploads/{unique_name}"
\ No newline at end of file
+    finally:
+        await file.close()
+
+    return StoredFile(path=relative, size=size, sha256=sha256, deduplicated=deduplicated)
+
+
+def remove_file(file_path: str) -> bool:
+    """Apaga o arquivo de um file_path do banco. False se ele já não existia."""
+    return get_backend().delete(file_path)
+
+
+def download_response(
+    request: Request,
+    file_path: str,
+    filename: str,
+    media_type: str = "application/pdf",
+    content_hash: Optional[str] = None,
+    last_modified: Optional[datetime] = None,
+):
+    """
+    Resposta de download de um file_path, conforme o backend:
+    disco local -> X-Accel-Redirect/X-Sendfile (DOWNLOAD_OFFLOAD) ou FileResponse (sendfile, Range);
+    S3 -> stream do objeto com Range (ou redirect pré-assinado).
+
+    ETag (content_hash) e Last-Modified vêm do banco: If-None-Match/If-Modified-Since
+    que batem viram 304 antes de qualquer acesso ao storage.
+    Levanta FileNotFoundError se o arquivo não existe no storage.
+    """
+    headers = {**http_conditional.validators(content_hash, last_modified), "Cache-Control": DOWNLOAD_CACHE_CONTROL}
+    if http_conditional.is_not_modified(request.headers, headers.get("ETag"), last_modified):
+        return Response(status_code=304, headers=headers)
+
+    backend = get_backend()
+    local = backend.local_path(file_path)
+    if local is not None:
+        offloaded = _offload_response(file_path, local, filename, media_type, headers)
+        if offloaded is not None:
+            return offloaded
+        if not os.path.isfile(local):
+            raise FileNotFoundError(file_path)
+        # O FileResponse já atende Range/If-Range e mantém o ETag/Last-Modified passados aqui
+        return FileResponse(path=local, filename=filename, media_type=media_type, headers=headers)
+
+    info = backend.stat(file_path)
+    if info is None:
+        raise FileNotFoundError(file_path)
+    if STORAGE_PRESIGN_DOWNLOADS:
+        url = backend.presign(file_path, STORAGE_PRESIGN_EXPIRES, filename)
+        if url:
+            return RedirectResponse(url, status_code=307)
+
+    headers.update({"Accept-Ranges": "bytes", "Content-Disposition": content_disposition(filename)})
+    try:
+        byte_range = http_conditional.requested_range(request.headers, info.size, headers)
+    except http_conditional.RangeNotSatisfiable:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{info.size}"})
+
+    if byte_range is None:
+        headers["Content-Length"] = str(info.size)
+        return StreamingResponse(backend.get_stream(file_path), media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    headers.update({"Content-Range": f"bytes {start}-{end}/{info.size}", "Content-Length": str(end - start + 1)})
+    return StreamingResponse(
+        backend.read_range(file_path, start, end), status_code=206, media_type=media_type, headers=headers,
+    )
+
+
+def _offload_response(file_path: str, local: str, filename: str, media_type: str, headers: dict) -> Optional[Response]:
+    """
+    Resposta vazia com X-Accel-Redirect/X-Sendfile, ou None para servir pela API.
+    Não toca no disco: arquivo ausente vira 404 do próprio proxy.
+    """
+    if DOWNLOAD_OFFLOAD == "x-accel-redirect":
+        # A location interna mapeia a raiz do projeto: caminhos absolutos antigos ficam de fora
+        if os.path.isabs(file_path):
+            return None
+        target = {"X-Accel-Redirect": DOWNLOAD_ACCEL_PREFIX + quote(file_path)}
+    elif DOWNLOAD_OFFLOAD == "x-sendfile":
+        target = {"X-Sendfile": local}
+    else:
+        return None
+    return Response(
+        media_type=media_type,
+        headers={**headers, **target, "Content-Disposition": content_disposition(filename)},
+    )
+
+
+def hash_file(path: str, chunk_size: Optional[int] = None) -> Tuple[str, int]:
+    """(SHA-256, tamanho) de um arquivo no disco, lido em blocos."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as handle:
+        while chunk := handle.read(chunk_size or UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            digest.update(chunk)
+    return digest.hexdigest(), size
+
+
+def adopt_file(source_path: str, chunk_size: Optional[int] = None) -> Tuple[StoredFile, str]:
+    """
+    Traz um arquivo já existente no disco local (legado 'storage/uploads', 'uploads/')
+    para o blob store do backend configurado.
+    O original NÃO é apagado aqui: o chamador remove depois de gravar o novo file_path no banco.
+    Retorna (blob, caminho absoluto do original).
+    """
+    source = absolute_path(source_path)
+    sha256, size = hash_file(source, chunk_size)
+    relative = blob_path(sha256)
+    backend = get_backend()
+    deduplicated = backend.touch(relative)
+    if not deduplicated:
+        temp_path = os.path.join(BLOB_DIR, ".tmp", f"{uuid.uuid4()}.part")
+        os.makedirs(os.path.dirname(temp_path), exist_ok=True)
+        try:
+            os.link(source, temp_path) # Mesmo disco: sem cópia de bytes
+        except OSError:
+            shutil.copyfile(source, temp_path)
+        backend.put_file(relative, temp_path)
+    return StoredFile(path=relative, size=size, sha256=sha256, deduplicated=deduplicated), source
+
+
+async def _discard(path: str) -> None:
+    try:
+        await aiofiles.os.remove(path)
+    except FileNotFoundError:
+        pass
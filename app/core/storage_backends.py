@@ -0,0 +1,317 @@
+"""
+Backends de Armazenamento (Disco Local / S3).
+O resto da aplicação só conhece chaves: o file_path gravado no banco
+(ex: 'storage/blobs/ab/cd/<sha256>'). Onde os bytes moram fica aqui.
+
+- LocalStorageBackend: chave = caminho relativo à raiz do projeto (comportamento histórico).
+- S3StorageBackend: chave = nome do objeto no bucket. Um client boto3 por processo
+  (thread-safe, com pool de conexões HTTP), uploads grandes em multipart e URLs pré-assinadas.
+  Funciona com qualquer serviço compatível (MinIO, moto) via S3_ENDPOINT_URL.
+
+Com o S3 os nós da API não dividem disco: qualquer réplica grava e serve qualquer arquivo.
+"""
+import os
+import shutil
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import BinaryIO, Iterator, Optional
+from urllib.parse import quote
+
+# Configuração (sobrescrevível via .env)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local").lower() # 'local' | 's3'
+S3_BUCKET = os.getenv("S3_BUCKET", "")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None # MinIO/compatíveis; vazio = AWS
+S3_REGION = os.getenv("S3_REGION", "us-east-1")
+S3_KEY_PREFIX = os.getenv("S3_KEY_PREFIX", "")
+S3_MULTIPART_THRESHOLD = int(os.getenv("S3_MULTIPART_THRESHOLD", str(8 * 1024 * 1024)))
+S3_MULTIPART_CHUNKSIZE = int(os.getenv("S3_MULTIPART_CHUNKSIZE", str(8 * 1024 * 1024)))
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", "4"))         # Partes em paralelo por upload
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "50")) # Conexões HTTP do client (compartilhado)
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class ObjectStat:
+    """Metadados de um objeto armazenado."""
+    key: str
+    size: int
+    last_modified: datetime # Sempre em UTC
+    etag: Optional[str] = None # Só o S3 informa (entre aspas, como no header)
+
+
+class StorageBackend(ABC):
+    """Contrato de um backend. Métodos síncronos: nas rotas async, rodar no threadpool."""
+    name = "abstract"
+
+    @abstractmethod
+    def put_stream(self, key: str, stream: BinaryIO) -> None:
+        """Grava o conteúdo de um arquivo aberto (lido até o fim) na chave."""
+
+    def put_file(self, key: str, local_path: str) -> None:
+        """
+        Move um arquivo local (ex: o temporário do ingest) para a chave.
+        O arquivo local deixa de existir. Padrão: envia o stream e apaga.
+        """
+        with open(local_path, "rb") as handle:
+            self.put_stream(key, handle)
+        os.remove(local_path)
+
+    @abstractmethod
+    def get_stream(self, key: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Conteúdo completo em blocos. FileNotFoundError se a chave não existe."""
+
+    @abstractmethod
+    def read_range(self, key: str, start: int, end: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Bytes de 'start' a 'end' (inclusive, como no header Range) em blocos."""
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """Apaga a chave. False se ela já não existia."""
+
+    @abstractmethod
+    def stat(self, key: str) -> Optional[ObjectStat]:
+        """Metadados da chave, ou None se ela não existe."""
+
+    def exists(self, key: str) -> bool:
+        return self.stat(key) is not None
+
+    @abstractmethod
+    def touch(self, key: str) -> bool:
+        """
+        Renova o last_modified da chave (reuso de um blob pela deduplicação: o GC não apaga
+        o que foi tocado dentro da carência). False se a chave não existe.
+        """
+
+    def presign(self, key: str, expires_in: int = 300, filename: Optional[str] = None) -> Optional[str]:
+        """URL temporária para baixar direto do storage. None = backend não suporta (servir pela API)."""
+        return None
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Caminho no disco deste nó, quando existe (permite FileResponse/sendfile). None no S3."""
+        return None
+
+
+class LocalStorageBackend(StorageBackend):
+    """Arquivos no disco local, sob 'root' (a raiz do projeto)."""
+    name = "local"
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def local_path(self, key: str) -> str:
+        # Caminhos absolutos antigos gravados no banco passam direto pelo join
+        return os.path.join(self.root, key)
+
+    def put_stream(self, key: str, stream: BinaryIO) -> None:
+        target = self.local_path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temp_path = f"{target}.{uuid.uuid4()}.part"
+        try:
+            with open(temp_path, "wb") as buffer:
+                shutil.copyfileobj(stream, buffer, DEFAULT_CHUNK_SIZE)
+            os.replace(temp_path, target)
+        except BaseException:
+            _remove_quietly(temp_path)
+            raise
+
+    def put_file(self, key: str, local_path: str) -> None:
+        target = self.local_path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.replace(local_path, target) # Mesmo disco: rename atômico, sem copiar bytes
+        except OSError:
+            super().put_file(key, local_path)
+
+    def get_stream(self, key: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        handle = open(self.local_path(key), "rb") # Abre já aqui: FileNotFoundError antes do 1º bloco
+        return _iter_file(handle, chunk_size)
+
+    def read_range(self, key: str, start: int, end: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        handle = open(self.local_path(key), "rb")
+        handle.seek(start)
+        return _iter_file(handle, chunk_size, remaining=end - start + 1)
+
+    def delete(self, key: str) -> bool:
+        try:
+            os.remove(self.local_path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def touch(self, key: str) -> bool:
+        try:
+            os.utime(self.local_path(key))
+            return True
+        except (FileNotFoundError, NotADirectoryError):
+            return False
+
+    def stat(self, key: str) -> Optional[ObjectStat]:
+        try:
+            info = os.stat(self.local_path(key))
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        return ObjectStat(
+            key=key,
+            size=info.st_size,
+            last_modified=datetime.fromtimestamp(info.st_mtime, tz=timezone.utc),
+        )
+
+
+class S3StorageBackend(StorageBackend):
+    """Objetos num bucket S3 (ou compatível). 'client' permite injetar um client pronto."""
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        region: str = "us-east-1",
+        key_prefix: str = "",
+        multipart_threshold: int = S3_MULTIPART_THRESHOLD,
+        multipart_chunksize: int = S3_MULTIPART_CHUNKSIZE,
+        max_concurrency: int = S3_MAX_CONCURRENCY,
+        max_pool_connections: int = S3_MAX_POOL_CONNECTIONS,
+        client=None,
+    ):
+        # Import tardio: quem usa só o disco local não precisa do boto3 carregado
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+        from botocore.config import Config
+
+        if not bucket:
+            raise ValueError("S3_BUCKET não configurado.")
+        self.bucket = bucket
+        self.key_prefix = key_prefix
+        self.client = client or boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            config=Config(max_pool_connections=max_pool_connections, retries={"max_attempts": 5, "mode": "standard"}),
+        )
+        # Acima do threshold o boto3 faz multipart (partes de 'chunksize' enviadas em paralelo)
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=max_concurrency,
+        )
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.key_prefix}{key}"
+
+    def put_stream(self, key: str, stream: BinaryIO) -> None:
+        self.client.upload_fileobj(
+            stream, self.bucket, self._object_key(key),
+            ExtraArgs={"ContentType": "application/octet-stream"}, Config=self.transfer_config,
+        )
+
+    def put_file(self, key: str, local_path: str) -> None:
+        self.client.upload_file(
+            local_path, self.bucket, self._object_key(key),
+            ExtraArgs={"ContentType": "application/octet-stream"}, Config=self.transfer_config,
+        )
+        os.remove(local_path)
+
+    def _get_body(self, key: str, **kwargs):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._object_key(key), **kwargs)["Body"]
+        except self.client.exceptions.NoSuchKey:
+            raise FileNotFoundError(key)
+
+    def get_stream(self, key: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        return _iter_body(self._get_body(key), chunk_size)
+
+    def read_range(self, key: str, start: int, end: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        return _iter_body(self._get_body(key, Range=f"bytes={start}-{end}"), chunk_size)
+
+    def delete(self, key: str) -> bool:
+        # O DeleteObject do S3 não diz se a chave existia: consulta antes
+        if self.stat(key) is None:
+            return False
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+        return True
+
+    def touch(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        # O S3 não tem utime: copiar o objeto sobre ele mesmo (cópia no servidor) renova o LastModified
+        object_key = self._object_key(key)
+        try:
+            self.client.copy_object(
+                Bucket=self.bucket, Key=object_key, CopySource={"Bucket": self.bucket, "Key": object_key},
+                MetadataDirective="REPLACE", ContentType="application/octet-stream",
+            )
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def stat(self, key: str) -> Optional[ObjectStat]:
+        from botocore.exceptions import ClientError
+
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return ObjectStat(
+            key=key,
+            size=head["ContentLength"],
+            last_modified=head["LastModified"].astimezone(timezone.utc),
+            etag=head.get("ETag"),
+        )
+
+    def presign(self, key: str, expires_in: int = 300, filename: Optional[str] = None) -> Optional[str]:
+        params = {"Bucket": self.bucket, "Key": self._object_key(key)}
+        if filename:
+            # Mesmo header do download pela API (aspas, ';' e acentos escapados)
+            params["ResponseContentDisposition"] = content_disposition(filename)
+        return self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=expires_in)
+
+
+def content_disposition(filename: str) -> str:
+    """Content-Disposition de download. Mesmo formato do FileResponse: nome fora do ASCII seguro vai em filename* (RFC 5987)."""
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def create_backend(local_root: str) -> StorageBackend:
+    """Instancia o backend escolhido em STORAGE_BACKEND."""
+    if STORAGE_BACKEND == "s3":
+        return S3StorageBackend(
+            bucket=S3_BUCKET, endpoint_url=S3_ENDPOINT_URL, region=S3_REGION, key_prefix=S3_KEY_PREFIX,
+        )
+    if STORAGE_BACKEND != "local":
+        raise ValueError(f"STORAGE_BACKEND inválido: '{STORAGE_BACKEND}' (use 'local' ou 's3').")
+    return LocalStorageBackend(local_root)
+
+
+def _iter_file(handle: BinaryIO, chunk_size: int, remaining: Optional[int] = None) -> Iterator[bytes]:
+    with handle:
+        while remaining is None or remaining > 0:
+            chunk = handle.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+def _iter_body(body, chunk_size: int) -> Iterator[bytes]:
+    try:
+        yield from body.iter_chunks(chunk_size)
+    finally:
+        body.close()
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
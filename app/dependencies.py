@@ -5,50 +5,105 @@ Centraliza a lógica de autenticação (JWT) e autorização (Roles).
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
 
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db, is_routed, use_primary
 from app.core.security import SECRET_KEY, ALGORITHM
+from app.core.auth_cache import Principal, CompanyLinkSnapshot, principal_cache
 from app.models.user_model import UserRole, User, UserCompanyLink, UserCompanyRole
-from app.repositories.user_repository import UserRepository
+from app.repositories.user_repository import UserRepository, AsyncUserRepository
 
 # Configura o esquema de segurança para o Swagger UI
 # tokenUrl: Indica para o Swagger onde ele deve enviar o form de login (username/password)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    """
-    Decodifica o Token JWT e recupera o usuário logado.
-    Usada como dependência obrigatória em rotas protegidas.
-    """
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Credenciais de autenticação inválidas ou expiradas.",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+def _decode_token(token: str) -> dict:
+    """Valida assinatura/expiração do JWT e devolve as claims (exige 'sub')."""
     try:
-        # 1. Tenta decodificar o token
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        
-        if email is None:
-            raise credentials_exception
-            
     except JWTError:
         # Token expirado ou assinatura inválida
-        raise credentials_exception
-        
+        raise _credentials_exception()
+    if payload.get("sub") is None:
+        raise _credentials_exception()
+    return payload
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+    """
+    Decodifica o Token JWT e recupera o usuário logado.
+    Usada como dependência obrigatória em rotas protegidas.
+
+    Retorna um Principal (retrato imutável do usuário) servido do principal_cache
+    quando possível: no hit não há jwt.decode nem ida ao banco.
+    """
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached
+
+    payload = _decode_token(token)
+
     # 2. Verifica se o usuário ainda existe no banco
     # (Segurança extra: se o user foi deletado, o token antigo para de funcionar)
-    user = UserRepository.get_by_email(db, email=email)
+    # Uma única query traz o usuário e todos os vínculos (sem lazy load por link)
+    user = UserRepository.get_by_email_with_links(db, email=payload["sub"])
+    if user is None and is_routed(db):
+        # Réplica atrasada (usuário recém-cadastrado): confirma no primário antes do 401
+        use_primary(db)
+        user = UserRepository.get_by_email_with_links(db, email=payload["sub"])
     if user is None:
-        raise credentials_exception
-        
+        raise _credentials_exception()
+
+    principal = Principal.from_user(user, payload)
+    principal_cache.put(token, principal)
+    return principal
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """
+    Mesmo contrato de get_current_user, para rotas 'async def'.
+    Roda no event loop: nem o hit do cache nem a query ocupam o threadpool.
+    """
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached
+
+    payload = _decode_token(token)
+    user = await AsyncUserRepository.get_by_email_with_links(db, email=payload["sub"])
+    if user is None and is_routed(db):
+        use_primary(db)
+        user = await AsyncUserRepository.get_by_email_with_links(db, email=payload["sub"])
+    if user is None:
+        raise _credentials_exception()
+
+    principal = Principal.from_user(user, payload)
+    principal_cache.put(token, principal)
+    return principal
+
+def get_current_db_user(
+    principal: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    Carrega a entidade User (ORM) do usuário logado.
+    Só para rotas que precisam do perfil completo ou vão alterá-lo (ex: /users/me).
+    """
+    use_primary(db)  # Perfil que será alterado/devolvido logo após uma escrita
+    user = UserRepository.get_by_id_with_links(db, principal.id)
+    if user is None:
+        raise _credentials_exception()
     return user
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+def get_current_active_user(current_user: Principal = Depends(get_current_user)) -> Principal:
     """
     Verifica se o usuário está ativo.
     Útil para rotas onde o usuário precisa estar logado e ativo (mas não necessariamente Admin).
@@ -57,7 +112,7 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
         raise HTTPException(status_code=400, detail="Usuário inativo")
     return current_user
 
-def get_current_active_admin(current_user: User = Depends(get_current_user)) -> User:
+def get_current_active_admin(current_user: Principal = Depends(get_current_user)) -> Principal:
     """
     Dependência de Autorização: Apenas ADMINs podem passar.
     """
@@ -68,18 +123,24 @@ def get_current_active_admin(current_user: User = Depends(get_current_user)) ->
         )
     return current_user
 
+# Variantes para rotas 'async def' (mesmas regras, Principal resolvido por get_current_user_async)
+async def get_current_active_user_async(current_user: Principal = Depends(get_current_user_async)) -> Principal:
+    return get_current_active_user(current_user)
+
+async def get_current_active_admin_async(current_user: Principal = Depends(get_current_user_async)) -> Principal:
+    return get_current_active_admin(current_user)
+
 def verify_company_access(
     company_id: str, 
-    user: User, 
+    user: Principal, 
     required_role: Optional[str] = None
-) -> UserCompanyLink:
+) -> CompanyLinkSnapshot:
     """
     Verifica se o usuário tem acesso à empresa especificada.
     Se required_role for passado (ex: MASTER), verifica se ele tem esse cargo.
     """
-    # Procura o vínculo na lista de links do usuário (carregada na memória)
-    # Isso evita uma query extra no banco se o user já estiver carregado
-    link = next((l for l in user.company_links if l.company_id == company_id), None)
+    # Busca O(1) no índice do Principal (já em memória, sem query)
+    link = user.get_link(company_id)
 
     if not link or not link.is_active:
         raise HTTPException(
@@ -2,10 +2,17 @@
 Ponto de Entrada da Aplicação (Entrypoint).
 Inicializa o FastAPI, configura Middlewares e registra as Rotas.
 """
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 
-from app.core.database import engine, Base
+from app.core import job_queue
+from app.core.database import engine, Base, DB_POOL_RETRY_AFTER
+from app.core.password_hasher import PasswordHasherSaturated
+from app.core.storage import UploadRejected
 from app.routers import (
     auth_router, 
     document_router, 
@@ -15,14 +22,31 @@ from app.routers import (
     dashboard_router,
     company_router
 )
-from app.models import certificate_model
+from app.models import certificate_model, company_vault_stats_model, job_model
+from app.repositories.blob_repository import STORAGE_GC_IN_API, STORAGE_GC_POLL_INTERVAL
+from app.services import job_handlers
 
 # Inicialização do Banco de Dados (Modo Dev)
 # Cria as tabelas se não existirem. Em produção, use Alembic migrations.
 # Base.metadata.create_all(bind=engine)
 
+# --- GC do Storage sem Worker Dedicado ---
+# Exclusões só agendam o job 'storage.gc'. Com a fila desligada (padrão) ninguém roda
+# run_worker, então a própria API apaga os arquivos soltos numa thread.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    storage_gc_worker = None
+    if STORAGE_GC_IN_API and not job_queue.JOB_QUEUE_ENABLED:
+        storage_gc_worker = job_queue.start_embedded_worker(
+            [job_handlers.STORAGE_GC], poll_interval=STORAGE_GC_POLL_INTERVAL
+        )
+    yield
+    if storage_gc_worker is not None:
+        storage_gc_worker.stop()
+
 # Configuração da Aplicação
 app = FastAPI(
+    lifespan=lifespan,
     title="LicitaDoc API",
     version="1.0.3", 
     description="""
@@ -52,8 +76,33 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"], # Permite GET, POST, PUT, DELETE, etc.
     allow_headers=["*"], # Permite Authorization e outros headers
+    expose_headers=["X-Next-Cursor"], # Cursor da paginação do Cofre (keyset)
 )
 
+# --- Tratamento Global de Sobrecarga ---
+# Pool de bcrypt cheio: recusa rápido (503) em vez de enfileirar e travar a API
+@app.exception_handler(PasswordHasherSaturated)
+async def password_hasher_saturated_handler(request: Request, exc: PasswordHasherSaturated):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+# Pool de conexões esgotado ('QueuePool limit'): 503 com Retry-After em vez de 500 genérico
+@app.exception_handler(PoolTimeoutError)
+async def db_pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Servidor ocupado: nenhuma conexão com o banco disponível. Tente novamente."},
+        headers={"Retry-After": str(DB_POOL_RETRY_AFTER)},
+    )
+
+# Upload recusado no ingest (413 grande demais, 415 não é PDF, 400 demais casos)
+@app.exception_handler(UploadRejected)
+async def upload_rejected_handler(request: Request, exc: UploadRejected):
+    return JSONResponse(status_code=exc.status_code, content={"detail": str(exc)})
+
 # --- Registro de Rotas (Routers) ---
 app.include_router(auth_router.router)
 app.include_router(user_router.router)
@@ -3,7 +3,7 @@ Modelagem de Certificados (Core).
 Representa o documento estruturado e validado, vinculado a um Tipo específico.
 """
 import enum
-from sqlalchemy import Column, String, Date, ForeignKey, DateTime, JSON
+from sqlalchemy import Column, String, Date, ForeignKey, DateTime, JSON, Index, BigInteger
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base, generate_uuid
@@ -30,8 +30,10 @@ class Certificate(Base):
     # =================================================================
     # Arquivo Físico
     # =================================================================
-    file_path = Column(String, nullable=False) # Caminho no Storage (S3/Local)
+    file_path = Column(String, nullable=False, index=True) # Caminho no Storage (S3/Local); blobs são compartilhados
     filename = Column(String, nullable=False)  # Nome original do arquivo (ex: 'CND_Federal_2024.pdf')
+    content_hash = Column(String(64), nullable=True, index=True) # SHA-256 do conteúdo (Null = upload anterior ao ingest)
+    file_size = Column(BigInteger, nullable=True) # Bytes gravados
     
     # =================================================================
     # Dados Extraídos das Certidões
@@ -57,6 +59,14 @@ class Certificate(Base):
     # =================================================================
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Índices Compostos (Listagem do Cofre / Paginação keyset)
+    __table_args__ = (
+        Index("ix_certificates_company_created", "company_id", "created_at", "id"),
+        Index("ix_certificates_company_expiration", "company_id", "expiration_date"),
+        # Job de status: certidões sem vencimento, pela emissão + validade padrão de cada Tipo
+        Index("ix_certificates_type_issue", "type_id", "issue_date"),
+    )
     
     # Relacionamentos
     company = relationship("app.models.company_model.Company") 
@@ -0,0 +1,27 @@
+"""
+Modelagem das Estatísticas do Cofre (Visão Materializada por Empresa).
+Uma linha por empresa com os contadores de 'documents' + 'certificates' por status.
+Mantida incrementalmente a cada flush (ver app/repositories/vault_stats_repository.py)
+e reconstruída em lote por `python -m app.scripts.rebuild_vault_stats`.
+"""
+from sqlalchemy import Column, String, Integer, Date, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class CompanyVaultStats(Base):
+    __tablename__ = "company_vault_stats"
+
+    company_id = Column(String, ForeignKey("companies.id", ondelete="CASCADE"), primary_key=True)
+
+    # Contadores (legado + certidões)
+    total = Column(Integer, nullable=False, default=0, server_default="0")
+    valid = Column(Integer, nullable=False, default=0, server_default="0")
+    warning = Column(Integer, nullable=False, default=0, server_default="0")
+    expired = Column(Integer, nullable=False, default=0, server_default="0")
+    processing = Column(Integer, nullable=False, default=0, server_default="0")
+    error = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Menor vencimento entre os itens em dia (status valid/warning)
+    next_expiration = Column(Date, nullable=True)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -4,7 +4,7 @@ Responsável por mapear a tabela 'documents' e suas regras de negócio.
 """
 import uuid
 import enum
-from sqlalchemy import Column, String, Date, ForeignKey, DateTime, Text, Enum
+from sqlalchemy import Column, String, Date, ForeignKey, DateTime, Text, Enum, Index, BigInteger
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -48,7 +48,19 @@ class Document(Base):
     file_path = Column(
         String, 
         nullable=False,
-        doc="Caminho relativo ou absoluto onde o arquivo foi salvo no disco/bucket"
+        index=True,
+        doc="Caminho relativo ou absoluto onde o arquivo foi salvo no disco/bucket (blobs são compartilhados)"
+    )
+    content_hash = Column(
+        String(64),
+        nullable=True,
+        index=True,
+        doc="SHA-256 (hex) do conteúdo, calculado no upload (Null = arquivo anterior ao ingest)"
+    )
+    file_size = Column(
+        BigInteger,
+        nullable=True,
+        doc="Tamanho do arquivo em bytes"
     )
 
     # =================================================================
@@ -91,4 +103,16 @@ class Document(Base):
         DateTime(timezone=True), 
         server_default=func.now(),
         doc="Data e hora exata do upload"
-    )
\ No newline at end of file
+    )
+
+    # =================================================================
+    # Índices Compostos (Listagem do Cofre)
+    # =================================================================
+    __table_args__ = (
+        # Paginação keyset: WHERE company_id = ? ORDER BY created_at DESC, id DESC
+        Index("ix_documents_company_created", "company_id", "created_at", "id"),
+        Index("ix_documents_company_status", "company_id", "status"),
+        Index("ix_documents_company_expiration", "company_id", "expiration_date"),
+        # Job de status: faixas de vencimento sobre todas as empresas
+        Index("ix_documents_expiration", "expiration_date"),
+    )
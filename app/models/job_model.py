@@ -0,0 +1,54 @@
+"""
+Modelagem da Fila de Jobs (Trabalho em Segundo Plano).
+Cada linha é uma tarefa a executar fora da requisição (leitura de certidões, refresh
+de status, reconstrução de estatísticas...). Os workers (python -m app.scripts.run_worker)
+disputam as linhas pelo banco: sem Redis nem broker externo.
+Ver app/repositories/job_repository.py (reserva/retry) e app/core/job_queue.py (worker).
+"""
+import enum
+from sqlalchemy import Column, String, Integer, DateTime, JSON, Text, Index
+from app.core.database import Base, generate_uuid
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"     # ⏳ Aguardando (ou aguardando o próximo retry em run_at)
+    RUNNING = "running"   # ⚙️ Reservado por um worker até locked_until
+    DONE = "done"         # ✅ Concluído
+    FAILED = "failed"     # 🚫 Esgotou as tentativas (ou tipo sem handler)
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    job_type = Column(String, nullable=False, index=True) # Ex: 'certificate.extract'
+    payload = Column(JSON, nullable=True)
+
+    # Maior = mais urgente (uploads na frente das manutenções)
+    priority = Column(Integer, nullable=False, default=0, server_default="0")
+    status = Column(String, nullable=False, default=JobStatus.QUEUED.value, server_default=JobStatus.QUEUED.value)
+
+    # Mesma chave = mesmo job (enfileirar de novo devolve o existente)
+    idempotency_key = Column(String, nullable=True, unique=True)
+
+    # Tentativas e backoff
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    max_attempts = Column(Integer, nullable=False, default=5, server_default="5")
+    run_at = Column(DateTime(timezone=True), nullable=False) # Não executa antes disso (retry com backoff)
+    last_error = Column(Text, nullable=True)
+
+    # Reserva (lease): passado locked_until sem conclusão, o worker é dado como morto
+    locked_by = Column(String, nullable=True)
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+
+    result = Column(JSON, nullable=True)
+
+    # Auditoria (base das métricas de latência)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True) # Início da última tentativa
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Reserva: próximos 'queued' vencidos, por prioridade
+        Index("ix_jobs_claim", "status", "priority", "run_at"),
+        # Métricas: concluídos recentes por tipo
+        Index("ix_jobs_type_finished", "job_type", "finished_at"),
+    )
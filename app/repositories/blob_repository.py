@@ -0,0 +1,125 @@
+"""
+Repositório do Blob Store (Armazenamento Endereçado por Conteúdo).
+Não existe tabela de blobs: as referências de um arquivo são as linhas de
+'documents' e 'certificates' cujo file_path aponta para ele. Contar na hora
+(índice em file_path) evita um contador paralelo que poderia divergir.
+
+Nada é apagado na requisição: um upload concorrente do mesmo conteúdo pode ter visto
+o blob (deduplicated) e ainda não ter comitado a linha dele. Quem solta um arquivo
+chama schedule_release(), que agenda um job 'storage.gc' para depois da carência;
+o job (collect) reconta as referências antes de apagar e poupa o blob modificado
+dentro da carência (o ingest renova o last_modified a cada deduplicação).
+Quem roda o job: o worker dedicado (JOB_QUEUE_ENABLED) ou, com a fila desligada,
+o worker embutido na própria API (STORAGE_GC_IN_API, ver app/main.py).
+"""
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import select, union_all, func
+from sqlalchemy.orm import Session
+
+from app.core import storage
+from app.models.document_model import Document
+from app.models.certificate_model import Certificate
+from app.models.job_model import Job
+from app.repositories.job_repository import JobRepository, utcnow
+
+STORAGE_GC_JOB = "storage.gc"
+# Carência entre soltar o arquivo e apagar: bem acima da duração de qualquer upload
+STORAGE_GC_GRACE_SECONDS = int(os.getenv("STORAGE_GC_GRACE_SECONDS", "3600"))
+# Fila desligada: a API roda o GC numa thread, consultando a fila a cada STORAGE_GC_POLL_INTERVAL segundos
+STORAGE_GC_IN_API = os.getenv("STORAGE_GC_IN_API", "true").lower() in ("1", "true", "yes")
+STORAGE_GC_POLL_INTERVAL = float(os.getenv("STORAGE_GC_POLL_INTERVAL", "60"))
+
+_FILE_MODELS = (Document, Certificate)
+
+
+class BlobRepository:
+
+    @staticmethod
+    def count_references(db: Session, file_path: str) -> int:
+        """Quantas linhas (legado + certidões) apontam para este arquivo."""
+        branches = [
+            select(func.count()).select_from(model).where(model.file_path == file_path).scalar_subquery()
+            for model in _FILE_MODELS
+        ]
+        return db.execute(select(branches[0] + branches[1])).scalar_one()
+
+    @staticmethod
+    def schedule_release(db: Session, file_paths: List[str], now: Optional[datetime] = None) -> Optional[Job]:
+        """
+        Marca arquivos como possíveis órfãos (linha apagada, insert desfeito): o job 'storage.gc'
+        roda depois de STORAGE_GC_GRACE_SECONDS. Chamar DEPOIS do commit/rollback da requisição.
+        Se nem o enfileiramento funcionar, o arquivo só sobra no storage (nunca some um que está em uso).
+        """
+        paths = sorted(set(filter(None, file_paths)))
+        if not paths:
+            return None
+        run_at = (now or utcnow()) + timedelta(seconds=STORAGE_GC_GRACE_SECONDS)
+        try:
+            return JobRepository.enqueue(db, STORAGE_GC_JOB, {"file_paths": paths}, run_at=run_at)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def collect(db: Session, file_paths: List[str], now: Optional[datetime] = None) -> int:
+        """
+        Apaga do storage os arquivos que continuam sem nenhuma referência (job 'storage.gc').
+        Arquivo modificado dentro da carência fica: um upload deduplicou nele e ainda pode comitar.
+        Retorna quantos foram apagados.
+        """
+        backend = storage.get_backend()
+        touched_after = (now or utcnow()) - timedelta(seconds=STORAGE_GC_GRACE_SECONDS)
+        removed = 0
+        for file_path in set(filter(None, file_paths)):
+            if BlobRepository.count_references(db, file_path) > 0:
+                continue
+            info = backend.stat(file_path)
+            if info is None or info.last_modified > touched_after:
+                continue
+            if storage.remove_file(file_path):
+                removed += 1
+        return removed
+
+    @staticmethod
+    def storage_report(db: Session) -> dict:
+        """
+        Economia da deduplicação: bytes lógicos (soma por linha) x físicos (um por blob).
+        Só considera arquivos já no blob store; os legados aparecem em 'legacy_files'.
+        """
+        items = union_all(*[
+            select(model.file_path.label("file_path"), model.file_size.label("file_size"))
+            for model in _FILE_MODELS
+        ]).subquery("items")
+
+        per_blob = select(
+            items.c.file_path,
+            func.count().label("refs"),
+            func.max(items.c.file_size).label("size"),
+        ).where(items.c.file_path.like(f"{storage.BLOB_PREFIX}%"))\
+            .group_by(items.c.file_path)\
+            .subquery("per_blob")
+
+        row = db.execute(select(
+            func.count().label("blobs"),
+            func.coalesce(func.sum(per_blob.c.refs), 0).label("references"),
+            func.coalesce(func.sum(per_blob.c.size * per_blob.c.refs), 0).label("logical_bytes"),
+            func.coalesce(func.sum(per_blob.c.size), 0).label("physical_bytes"),
+        )).one()
+
+        legacy = db.execute(
+            select(func.count()).select_from(items).where(items.c.file_path.notlike(f"{storage.BLOB_PREFIX}%"))
+        ).scalar_one()
+
+        logical, physical = int(row.logical_bytes), int(row.physical_bytes)
+        return {
+            "blobs": row.blobs,
+            "references": int(row.references),
+            "duplicate_references": int(row.references) - row.blobs,
+            "logical_bytes": logical,
+            "physical_bytes": physical,
+            "bytes_saved": logical - physical,
+            "dedup_ratio": round(logical / physical, 3) if physical else 1.0,
+            "legacy_files": legacy,
+        }
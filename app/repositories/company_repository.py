@@ -2,11 +2,14 @@
 Repositório de Empresas.
 Gerencia o ciclo de vida das entidades Company no banco de dados.
 """
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from typing import Optional, List
 
 from app.models.company_model import Company
+from app.models.user_model import User, UserCompanyLink
 from app.schemas.company_schemas import CompanyCreate, CompanyUpdate
 
 class CompanyRepository:
@@ -38,6 +41,52 @@ class CompanyRepository:
         """Busca empresa por UUID."""
         return db.query(Company).filter(Company.id == company_id).first()
     
+    @staticmethod
+    def list_members(
+        db: Session,
+        company_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        role: Optional[str] = None,
+        is_active: Optional[bool] = None
+    ) -> List[dict]:
+        """
+        Membros da empresa numa única query (JOIN link -> user), só com as colunas
+        da resposta. Sem objetos ORM e sem lazy load de 'link.user' por linha.
+        Ordem estável (entrada na equipe, depois user_id) para a paginação.
+        """
+        stmt = CompanyRepository._members_stmt(company_id, skip, limit, role, is_active)
+        return CompanyRepository._shape_members(db.execute(stmt).mappings())
+
+    @staticmethod
+    def _members_stmt(
+        company_id: str, skip: int, limit: int, role: Optional[str], is_active: Optional[bool]
+    ):
+        stmt = select(
+            User.id.label("user_id"),
+            User.email,
+            UserCompanyLink.role,
+            UserCompanyLink.is_active.label("status"),
+            UserCompanyLink.created_at.label("joined_at"),
+        ).join(User, User.id == UserCompanyLink.user_id)\
+         .where(UserCompanyLink.company_id == company_id)
+
+        if role is not None:
+            stmt = stmt.where(UserCompanyLink.role == role)
+        if is_active is not None:
+            stmt = stmt.where(UserCompanyLink.is_active == is_active)
+
+        return stmt.order_by(UserCompanyLink.created_at, User.id).offset(skip).limit(limit)
+
+    @staticmethod
+    def _shape_members(rows) -> List[dict]:
+        members = []
+        for row in rows:
+            member = dict(row)
+            member["name"] = row["email"].split("@")[0] # User ainda não tem campo de nome
+            members.append(member)
+        return members
+
     @staticmethod
     def get_by_cnpj(db: Session, cnpj: str) -> Optional[Company]:
         """Busca empresa por CNPJ (Único)."""
@@ -87,4 +136,25 @@ class CompanyRepository:
             return True
         except SQLAlchemyError as e:
             db.rollback()
-            raise ValueError(f"Erro ao deletar empresa (possível vínculo com dados): {str(e)}")
\ No newline at end of file
+            raise ValueError(f"Erro ao deletar empresa (possível vínculo com dados): {str(e)}")
+
+
+class AsyncCompanyRepository:
+    """Versão assíncrona (AsyncSession) das leituras de empresa usadas nas rotas quentes."""
+
+    @staticmethod
+    async def get_by_id(db: AsyncSession, company_id: str) -> Optional[Company]:
+        return await db.get(Company, company_id)
+
+    @staticmethod
+    async def list_members(
+        db: AsyncSession,
+        company_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        role: Optional[str] = None,
+        is_active: Optional[bool] = None
+    ) -> List[dict]:
+        stmt = CompanyRepository._members_stmt(company_id, skip, limit, role, is_active)
+        result = await db.execute(stmt)
+        return CompanyRepository._shape_members(result.mappings())
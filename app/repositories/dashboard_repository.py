@@ -0,0 +1,156 @@
+"""
+Repositório do Dashboard.
+Estatísticas do painel em uma ida ao banco: contagens lidas da visão materializada
+'company_vault_stats' (busca por chave primária) e os itens recentes na mesma query.
+"""
+from sqlalchemy import select, func, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import Optional, List
+
+from app.models.company_model import Company
+from app.models.user_model import User
+from app.models.company_vault_stats_model import CompanyVaultStats
+from app.repositories.document_repository import DocumentRepository
+from app.utils.status_classifier import classify_rows
+
+# Quantos itens recentes o painel exibe
+RECENT_LIMIT = 5
+
+
+def _created_desc(db, recent):
+    """Mesma ordem da listagem (grafias do created_at no SQLite normalizadas)."""
+    return DocumentRepository._created_sort_key(recent.c.created_at, db.get_bind().dialect.name).desc()
+
+
+def _split_recent(rows, columns) -> List[dict]:
+    """Extrai os itens recentes das linhas do LEFT JOIN (linha sem item = painel vazio)."""
+    return classify_rows([
+        {col: row[col] for col in columns}
+        for row in rows
+        if row["id"] is not None
+    ])
+
+
+class DashboardRepository:
+
+    @staticmethod
+    def get_client_stats(db: Session, company_id: str) -> Optional[dict]:
+        """
+        Painel de UMA empresa: dados da empresa, contagens por status (legado + certidões)
+        e os 5 itens mais recentes do cofre, tudo num único SELECT:
+
+            empresa LEFT JOIN company_vault_stats (PK) LEFT JOIN (UNION ALL ... LIMIT 5) ON true
+
+        As contagens não varrem o cofre: vêm da linha materializada da empresa
+        (sem linha = cofre vazio). Retorna None se a empresa não existir.
+
+        Ao contrário da listagem, docs_valid/docs_warning/docs_expired NÃO são derivados
+        na leitura: contam o status persistido, que o job de status recalcula pela mesma
+        regra do vencimento efetivo (StatusRefreshService). Entre duas execuções do job,
+        um item que mudou de faixa ainda conta na faixa antiga.
+        """
+        stmt, recent_columns = DashboardRepository._client_stats_stmt(db, company_id)
+        return DashboardRepository._shape_client(db.execute(stmt).mappings().all(), recent_columns)
+
+    @staticmethod
+    def get_admin_stats(db: Session) -> dict:
+        """
+        Painel global: totais (empresas, usuários, documentos legado + certidões)
+        e os 5 itens mais recentes do sistema inteiro, num único SELECT.
+        O total de documentos soma a company_vault_stats (uma linha por empresa).
+        """
+        stmt, recent_columns = DashboardRepository._admin_stats_stmt(db)
+        return DashboardRepository._shape_admin(db.execute(stmt).mappings().all(), recent_columns)
+
+    # --- SQL E FORMATAÇÃO (compartilhados com AsyncDashboardRepository) ---
+
+    @staticmethod
+    def _client_stats_stmt(db, company_id: str):
+        stats = CompanyVaultStats
+        company = select(
+            Company.razao_social.label("company_name"),
+            Company.is_contract_signed,
+            Company.is_payment_active,
+            Company.is_admin_verified,
+            func.coalesce(stats.total, 0).label("total_docs"),
+            func.coalesce(stats.valid, 0).label("docs_valid"),
+            func.coalesce(stats.warning, 0).label("docs_warning"),
+            func.coalesce(stats.expired, 0).label("docs_expired"),
+            stats.next_expiration,
+        ).select_from(Company)\
+            .outerjoin(stats, stats.company_id == Company.id)\
+            .where(Company.id == company_id)\
+            .subquery("company")
+
+        recent = DocumentRepository._build_unified_stmt(db, company_id, limit=RECENT_LIMIT).subquery("recent")
+
+        stmt = select(company, recent)\
+            .select_from(company.outerjoin(recent, true()))\
+            .order_by(_created_desc(db, recent), recent.c.id.desc())
+        return stmt, recent.c.keys()
+
+    @staticmethod
+    def _shape_client(rows, recent_columns) -> Optional[dict]:
+        if not rows:
+            return None
+
+        head = rows[0]
+        return {
+            "company_name": head["company_name"],
+            "total_docs": head["total_docs"],
+            "docs_valid": head["docs_valid"],
+            "docs_warning": head["docs_warning"],
+            "docs_expired": head["docs_expired"],
+            "next_expiration": head["next_expiration"],
+            "is_contract_signed": bool(head["is_contract_signed"]),
+            "is_payment_active": bool(head["is_payment_active"]),
+            "is_admin_verified": bool(head["is_admin_verified"]),
+            "recent_docs": _split_recent(rows, recent_columns),
+        }
+
+    @staticmethod
+    def _admin_stats_stmt(db):
+        totals = select(
+            select(func.count()).select_from(Company).scalar_subquery().label("total_companies"),
+            select(func.count()).select_from(User).scalar_subquery().label("total_users"),
+            select(func.coalesce(func.sum(CompanyVaultStats.total), 0)).scalar_subquery().label("total_documents"),
+        ).subquery("totals")
+
+        recent = DocumentRepository._build_unified_stmt(db, None, limit=RECENT_LIMIT).subquery("recent")
+
+        stmt = select(totals, recent)\
+            .select_from(totals.outerjoin(recent, true()))\
+            .order_by(_created_desc(db, recent), recent.c.id.desc())
+        return stmt, recent.c.keys()
+
+    @staticmethod
+    def _shape_admin(rows, recent_columns) -> dict:
+        head = rows[0]
+        return {
+            "total_companies": head["total_companies"],
+            "total_users": head["total_users"],
+            "total_documents": head["total_documents"],
+            "recent_documents": _split_recent(rows, recent_columns),
+        }
+
+
+class AsyncDashboardRepository:
+    """Versão assíncrona (AsyncSession) do painel: mesmos SELECTs, execução com await."""
+
+    @staticmethod
+    async def get_client_stats(db: AsyncSession, company_id: str) -> Optional[dict]:
+        stmt, recent_columns = DashboardRepository._client_stats_stmt(db, company_id)
+        result = await db.execute(stmt)
+        return DashboardRepository._shape_client(result.mappings().all(), recent_columns)
+
+    @staticmethod
+    async def get_admin_stats(db: AsyncSession) -> dict:
+        stmt, recent_columns = DashboardRepository._admin_stats_stmt(db)
+        result = await db.execute(stmt)
+        return DashboardRepository._shape_admin(result.mappings().all(), recent_columns)
+
+    @staticmethod
+    async def get_recent_companies(db: AsyncSession, limit: int = RECENT_LIMIT) -> List[Company]:
+        result = await db.execute(select(Company).order_by(Company.created_at.desc()).limit(limit))
+        return result.scalars().all()
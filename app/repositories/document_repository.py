@@ -2,15 +2,25 @@
 Repositório de Documentos e Certificados.
 Responsável pela persistência e leitura unificada (Cofre).
 """
+import base64
+import binascii
+import json
+from sqlalchemy import select, union_all, literal, null, cast, func, and_, or_, case, type_coerce, Boolean, String, Date, Integer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
-from typing import Optional, List
-from datetime import date
+from typing import Optional, List, Tuple, Iterator, AsyncIterator
+from datetime import date, datetime
 
 from app.models.document_model import Document, DocumentStatus
 from app.models.certificate_model import Certificate, CertificateStatus
 from app.models.document_category_model import DocumentCategory
 from app.models.document_type_model import DocumentType
+from app.utils.status_classifier import (
+    classify_rows, effective_expiration_sql, status_filter, ISSUE_DATE_KEY, VALIDITY_DAYS_KEY
+)
+# Registra os listeners que mantêm a company_vault_stats a cada flush
+from app.repositories import vault_stats_repository  # noqa: F401
 
 from app.schemas.document_schemas import (
     DocumentCategoryCreate, DocumentCategoryUpdate,
@@ -34,12 +44,14 @@ class DocumentRepository:
     @staticmethod
     def create_legacy(
         db: Session, title: str, filename: str, file_path: str, company_id: str, 
-        expiration_date: Optional[date] = None, uploaded_by_id: Optional[str] = None
+        expiration_date: Optional[date] = None, uploaded_by_id: Optional[str] = None,
+        content_hash: Optional[str] = None, file_size: Optional[int] = None
     ) -> Document:
         db_doc = Document(
             title=title, filename=filename, file_path=file_path,
             company_id=company_id, expiration_date=expiration_date,
-            status=DocumentStatus.VALID.value, uploaded_by_id=uploaded_by_id
+            status=DocumentStatus.VALID.value, uploaded_by_id=uploaded_by_id,
+            content_hash=content_hash, file_size=file_size
         )
         try:
             db.add(db_doc)
@@ -54,13 +66,16 @@ class DocumentRepository:
     @staticmethod
     def create_certificate(
         db: Session, type_id: str, filename: str, file_path: str, company_id: str,
-        expiration_date: Optional[date] = None, authentication_code: Optional[str] = None
+        expiration_date: Optional[date] = None, authentication_code: Optional[str] = None,
+        content_hash: Optional[str] = None, file_size: Optional[int] = None,
+        status: str = CertificateStatus.VALID.value
     ) -> Certificate:
         cert = Certificate(
             type_id=type_id, filename=filename, file_path=file_path,
             company_id=company_id, expiration_date=expiration_date,
             authentication_code=authentication_code,
-            status=CertificateStatus.VALID.value
+            status=status,
+            content_hash=content_hash, file_size=file_size
         )
         try:
             db.add(cert)
@@ -71,69 +86,257 @@ class DocumentRepository:
             db.rollback()
             raise ValueError(f"Erro ao registrar certificado estruturado: {str(e)}")
 
-    # --- BUSCA UNIFICADA (MERGE) ---
+    # --- UPLOAD EM LOTE (Onboarding) ---
+    @staticmethod
+    def get_existing_type_ids(db: Session, type_ids: List[str]) -> set:
+        """Quais dos type_ids informados existem no catálogo (uma query para o lote todo)."""
+        if not type_ids:
+            return set()
+        return set(db.execute(select(DocumentType.id).where(DocumentType.id.in_(set(type_ids)))).scalars())
+
+    @staticmethod
+    def create_bulk(
+        db: Session, company_id: str, items: List[dict], uploaded_by_id: Optional[str] = None,
+        certificate_status: str = CertificateStatus.VALID.value
+    ) -> List[object]:
+        """
+        Registra vários uploads numa única transação: um flush só, então os INSERTs de cada
+        tabela saem agrupados (executemany) e a company_vault_stats recebe um único delta.
+        Cada item: filename, file_path, content_hash, file_size, expiration_date e, para
+        certidões, type_id/authentication_code (sem type_id vira documento legado, com title).
+        Tudo ou nada: em erro, rollback e ValueError. Retorna os objetos na ordem dos itens,
+        já recarregados com um SELECT por tabela (created_at vem do banco): sem isso, o
+        expire_on_commit faria cada acesso posterior custar uma ida ao banco por linha.
+        """
+        rows = []
+        for item in items:
+            common = dict(
+                filename=item["filename"], file_path=item["file_path"], company_id=company_id,
+                expiration_date=item.get("expiration_date"),
+                content_hash=item.get("content_hash"), file_size=item.get("file_size"),
+            )
+            if item.get("type_id"):
+                rows.append(Certificate(
+                    type_id=item["type_id"], authentication_code=item.get("authentication_code"),
+                    status=certificate_status, **common
+                ))
+            else:
+                rows.append(Document(
+                    title=item.get("title") or "Documento Sem Título", status=DocumentStatus.VALID.value,
+                    uploaded_by_id=uploaded_by_id, **common
+                ))
+        try:
+            db.add_all(rows)
+            db.flush()
+            # Ids lidos antes do commit: depois dele, ler row.id já seria um SELECT
+            ids = {model: [row.id for row in rows if isinstance(row, model)] for model in (Document, Certificate)}
+            db.commit()
+            for model, model_ids in ids.items():
+                if model_ids:
+                    db.query(model).filter(model.id.in_(model_ids)).populate_existing().all()
+            return rows
+        except SQLAlchemyError as e:
+            db.rollback()
+            raise ValueError(f"Erro ao registrar o lote de documentos: {str(e)}")
+
+    # --- BUSCA UNIFICADA (UNION ALL) ---
+    @staticmethod
+    def _unified_select():
+        """
+        Monta o SELECT único que funde 'documents' e 'certificates' no banco (UNION ALL).
+        Projeta apenas as colunas do DocumentResponse, sem hidratar objetos ORM, mais
+        emissão/validade padrão, consumidas (e removidas) por classify_rows.
+        """
+        legacy = select(
+            Document.id.label("id"),
+            func.coalesce(Document.title, "Documento Legado").label("title"),
+            Document.filename.label("filename"),
+            Document.expiration_date.label("expiration_date"),
+            Document.status.label("status"),
+            Document.created_at.label("created_at"),
+            literal(False, type_=Boolean).label("is_structured"),
+            cast(null(), String).label("type_id"),
+            cast(null(), String).label("category_id"),
+            cast(null(), String).label("type_name"),
+            cast(null(), String).label("category_name"),
+            cast(null(), String).label("authentication_code"),
+            cast(null(), Date).label(ISSUE_DATE_KEY),
+            cast(null(), Integer).label(VALIDITY_DAYS_KEY),
+        )
+
+        structured = select(
+            Certificate.id.label("id"),
+            func.coalesce(DocumentType.name, "Certidão").label("title"),
+            Certificate.filename.label("filename"),
+            Certificate.expiration_date.label("expiration_date"),
+            Certificate.status.label("status"),
+            Certificate.created_at.label("created_at"),
+            literal(True, type_=Boolean).label("is_structured"),
+            Certificate.type_id.label("type_id"),
+            DocumentType.category_id.label("category_id"),
+            DocumentType.name.label("type_name"),
+            DocumentCategory.name.label("category_name"),
+            Certificate.authentication_code.label("authentication_code"),
+            Certificate.issue_date.label(ISSUE_DATE_KEY),
+            DocumentType.validity_days_default.label(VALIDITY_DAYS_KEY),
+        ).select_from(Certificate)\
+            .outerjoin(DocumentType, Certificate.type_id == DocumentType.id)\
+            .outerjoin(DocumentCategory, DocumentType.category_id == DocumentCategory.id)
+
+        return legacy, structured
+
+    @staticmethod
+    def encode_cursor(item: dict) -> str:
+        """Gera o cursor opaco (keyset) a partir do último item de uma página."""
+        raw = json.dumps([item["created_at"].isoformat(), item["id"]])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+        """Lê o cursor gerado por encode_cursor. Lança ValueError se estiver corrompido."""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            created_at, item_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            return datetime.fromisoformat(created_at), str(item_id)
+        except (ValueError, TypeError, binascii.Error):
+            raise ValueError("Cursor de paginação inválido.")
+
+    @staticmethod
+    def _created_sort_key(created_col, dialect_name: str):
+        """
+        Chave de ordenação do created_at (ORDER BY e cursor usam a mesma).
+        No SQLite o DateTime é texto e o server_default (CURRENT_TIMESTAMP) grava sem
+        microssegundos: o mesmo instante tem duas grafias, e '...:00' < '...:00.000000' como texto.
+        A grafia curta é completada com '.000000', então todo valor compara no formato longo.
+        No Postgres é a própria coluna (o índice composto atende o ORDER BY).
+        """
+        if dialect_name != "sqlite":
+            return created_col
+        text = type_coerce(created_col, String)
+        return case((func.length(text) == 19, text + ".000000"), else_=text)
+
+    @staticmethod
+    def _keyset_before(created_col, id_col, cursor_ts: datetime, cursor_id: str, dialect_name: str):
+        """Condição keyset: (created_at, id) < (cursor_ts, cursor_id), em ordem decrescente."""
+        key = DocumentRepository._created_sort_key(created_col, dialect_name)
+        if dialect_name == "sqlite":
+            bound = literal(f"{cursor_ts:%Y-%m-%d %H:%M:%S}.{cursor_ts.microsecond:06d}", String)
+        else:
+            bound = cursor_ts
+        return or_(key < bound, and_(key == bound, id_col < cursor_id))
+
     @staticmethod
-    def get_unified_by_company(db: Session, company_id: str) -> List[dict]:
+    def _build_unified_stmt(
+        db: Session, company_id: Optional[str],
+        limit: Optional[int] = None, cursor: Optional[str] = None,
+        status: Optional[str] = None, category_id: Optional[str] = None,
+        type_id: Optional[str] = None, expires_before: Optional[date] = None,
+        is_structured: Optional[bool] = None
+    ):
+        """
+        UNION ALL das duas tabelas, ordenado por (created_at, id) no próprio SQL
+        (mais recentes primeiro). Filtros e cursor (keyset) são aplicados dentro de
+        cada ramo do UNION, para que cada tabela use seu índice composto
+        (company_id, created_at, id) e a página custe o mesmo em qualquer profundidade.
+        company_id=None lista todas as empresas (uso exclusivo do painel Admin).
+        Retorna None quando a combinação de filtros não pode trazer nenhum item.
+        """
+        legacy, structured = DocumentRepository._unified_select()
+        keyset = DocumentRepository.decode_cursor(cursor) if cursor else None
+        dialect_name = db.get_bind().dialect.name
+
+        branches = []
+        # Legados não têm Tipo/Categoria: qualquer filtro de catálogo os exclui
+        if is_structured is not True and not type_id and not category_id:
+            branches.append((legacy, Document))
+        if is_structured is not False:
+            branches.append((structured, Certificate))
+
+        selects = []
+        for stmt, model in branches:
+            if company_id is not None:
+                stmt = stmt.where(model.company_id == company_id)
+            if status:
+                stmt = stmt.where(status_filter(model, status, dialect_name))
+            if expires_before:
+                # Mesmo vencimento efetivo do status (certidão sem data: emissão + validade do Tipo)
+                stmt = stmt.where(effective_expiration_sql(model, dialect_name) < expires_before)
+            if model is Certificate and type_id:
+                stmt = stmt.where(Certificate.type_id == type_id)
+            if model is Certificate and category_id:
+                stmt = stmt.where(DocumentType.category_id == category_id)
+            if keyset:
+                stmt = stmt.where(DocumentRepository._keyset_before(
+                    model.created_at, model.id, keyset[0], keyset[1], dialect_name
+                ))
+            if limit:
+                # Cada ramo já corta no limite: o UNION nunca lê mais que 2 * limit linhas
+                created_key = DocumentRepository._created_sort_key(model.created_at, dialect_name)
+                branch = stmt.order_by(created_key.desc(), model.id.desc()).limit(limit).subquery()
+                stmt = select(branch)
+            selects.append(stmt)
+
+        if not selects:
+            return None
+
+        unified = union_all(*selects).subquery("unified")
+        created_key = DocumentRepository._created_sort_key(unified.c.created_at, dialect_name)
+        stmt = select(unified).order_by(created_key.desc(), unified.c.id.desc())
+        if limit:
+            stmt = stmt.limit(limit)
+        return stmt
+
+    @staticmethod
+    def get_unified_by_company(db: Session, company_id: str, **filters) -> List[dict]:
         """
         Faz a fusão da tabela antiga 'documents' com a nova 'certificates'.
         Retorna uma lista de dicionários mapeados para o UnifiedDocumentResponse.
+        Aceita os filtros/paginação de _build_unified_stmt (limit, cursor, status...).
+        O status é derivado do vencimento na leitura (classify_rows).
         """
-        unified_list = []
-        
-        # 1. Busca Legados
-        legacies = db.query(Document).filter(Document.company_id == company_id).all()
-        for doc in legacies:
-            unified_list.append({
-                "id": doc.id,
-                "title": doc.title or "Documento Legado",
-                "filename": doc.filename,
-                "expiration_date": doc.expiration_date,
-                "status": doc.status,
-                "created_at": doc.created_at,
-                "is_structured": False,
-                # 👇 CORREÇÃO: Garantindo que as chaves existam mesmo sendo nulas 👇
-                "type_id": None,
-                "category_id": None,
-                "type_name": None,
-                "category_name": None,
-                "authentication_code": None
-            })
-
-        # 2. Busca Certificados Novos (Com JOIN para pegar nomes da Categoria e Tipo)
-        certificates = db.query(Certificate)\
-            .options(joinedload(Certificate.document_type).joinedload(DocumentType.category))\
-            .filter(Certificate.company_id == company_id).all()
-            
-        for cert in certificates:
-            unified_list.append({
-                "id": cert.id,
-                "title": cert.document_type.name if cert.document_type else "Certidão",
-                "filename": cert.filename,
-                "expiration_date": cert.expiration_date,
-                "status": cert.status,
-                "created_at": cert.created_at,
-                "is_structured": True,
-                "type_id": cert.type_id,
-                "category_id": cert.document_type.category_id if cert.document_type else None,
-                "type_name": cert.document_type.name if cert.document_type else None,
-                "category_name": cert.document_type.category.name if cert.document_type and cert.document_type.category else None,
-                "authentication_code": cert.authentication_code
-            })
-
-        # Ordena tudo por data de criação (Mais recentes primeiro)
-        unified_list.sort(key=lambda x: x["created_at"], reverse=True)
-        return unified_list
-        
+        stmt = DocumentRepository._build_unified_stmt(db, company_id, **filters)
+        if stmt is None:
+            return []
+        return classify_rows([dict(row) for row in db.execute(stmt).mappings()])
+
     @staticmethod
-    def get_file_path(db: Session, item_id: str) -> Optional[str]:
-        """Busca o caminho físico do arquivo, seja ele legado ou certificado"""
-        doc = db.query(Document).filter(Document.id == item_id).first()
-        if doc: return doc.file_path
-        
-        cert = db.query(Certificate).filter(Certificate.id == item_id).first()
-        if cert: return cert.file_path
-        
-        return None
+    def iter_unified_by_company(db: Session, company_id: str, chunk_size: int = 1000, **filters) -> Iterator[dict]:
+        """
+        Versão em streaming da listagem unificada (exportações).
+        Usa yield_per (cursor no servidor no Postgres): a memória fica limitada a
+        'chunk_size' linhas, seja qual for o tamanho do cofre.
+        """
+        stmt = DocumentRepository._build_unified_stmt(db, company_id, **filters)
+        if stmt is None:
+            return
+        result = db.execute(stmt, execution_options={"yield_per": chunk_size})
+        try:
+            # Classifica um lote por vez: a memória segue limitada a 'chunk_size' linhas
+            for partition in result.mappings().partitions():
+                yield from classify_rows([dict(row) for row in partition])
+        finally:
+            result.close()
+
+    @staticmethod
+    def get_file_path(db: Session, item_id: str):
+        """
+        Localiza o arquivo de um item, seja ele legado ou certificado, numa única ida ao banco:
+        UNION ALL das duas buscas por PK com LIMIT 1, projetando só o necessário.
+        Retorna a linha (file_path, filename, company_id, content_hash, created_at) ou None.
+        company_id vem junto para a checagem de dono sem outra query; filename é o nome
+        original do upload (o blob não tem extensão).
+        """
+        branches = [
+            select(
+                model.file_path.label("file_path"),
+                model.filename.label("filename"),
+                model.company_id.label("company_id"),
+                model.content_hash.label("content_hash"),
+                model.created_at.label("created_at"),
+            ).where(model.id == item_id)
+            for model in (Document, Certificate)
+        ]
+        return db.execute(union_all(*branches).limit(1)).first()
     
     # =================================================================
     # CRUD DE CATEGORIAS (Admin)
@@ -225,4 +428,47 @@ class DocumentRepository:
             raise ValueError("Não é possível eliminar este Tipo. Já existem certidões de clientes vinculadas a ele no Cofre.")
             
         db.delete(db_type)
-        db.commit()
\ No newline at end of file
+        db.commit()
+
+
+class AsyncDocumentRepository:
+    """
+    Versão assíncrona (AsyncSession) das leituras do Cofre.
+    Reaproveita os SELECTs do DocumentRepository: só a execução muda.
+    """
+
+    @staticmethod
+    async def get_all_categories_with_types(db: AsyncSession) -> List[DocumentCategory]:
+        result = await db.execute(
+            select(DocumentCategory)
+            .options(joinedload(DocumentCategory.types))
+            .order_by(DocumentCategory.order)
+        )
+        return result.unique().scalars().all()
+
+    @staticmethod
+    async def get_unified_by_company(db: AsyncSession, company_id: str, **filters) -> List[dict]:
+        """Mesmo contrato de DocumentRepository.get_unified_by_company."""
+        stmt = DocumentRepository._build_unified_stmt(db, company_id, **filters)
+        if stmt is None:
+            return []
+        result = await db.execute(stmt)
+        return classify_rows([dict(row) for row in result.mappings()])
+
+    @staticmethod
+    async def stream_unified_by_company(
+        db: AsyncSession, company_id: str, chunk_size: int = 1000, **filters
+    ) -> AsyncIterator[List[dict]]:
+        """
+        Exportação em streaming: entrega lotes de até 'chunk_size' linhas já classificadas,
+        lidos de um cursor no servidor (memória constante).
+        """
+        stmt = DocumentRepository._build_unified_stmt(db, company_id, **filters)
+        if stmt is None:
+            return
+        result = await db.stream(stmt, execution_options={"yield_per": chunk_size})
+        try:
+            async for partition in result.mappings().partitions():
+                yield classify_rows([dict(row) for row in partition])
+        finally:
+            await result.close()
@@ -0,0 +1,281 @@
+"""
+Repositório da Fila de Jobs (tabela 'jobs').
+Toda a coordenação entre workers passa pelo banco:
+
+- enqueue(): idempotente pela idempotency_key (a mesma chave devolve o job existente);
+- claim(): reserva os próximos jobs vencidos por prioridade. No Postgres,
+  SELECT ... FOR UPDATE SKIP LOCKED (cada worker pula as linhas já travadas por outro);
+  no SQLite, que não tem SKIP LOCKED, um UPDATE condicionado ao status (compare-and-set):
+  o SQLite serializa as escritas e só um worker vê a linha ainda em 'queued';
+- extend_lease(): o worker renova a reserva enquanto o handler roda (heartbeat);
+- complete()/fail(): só valem para quem ainda detém a reserva; fail() reagenda com
+  backoff exponencial até max_attempts;
+- release_expired(): devolve à fila os jobs de workers que morreram (lease vencido);
+- metrics(): backlog, vazão e latência por tipo de job, calculados a partir da tabela.
+"""
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+
+from sqlalchemy import select, update, func
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.models.job_model import Job, JobStatus
+
+# Configurações (sobrescrevíveis via .env)
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))           # Reserva de um worker sobre o job
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "10"))  # 10s, 20s, 40s...
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "3600"))
+JOB_METRICS_SAMPLE = int(os.getenv("JOB_METRICS_SAMPLE", "10000"))        # Concluídos lidos para os percentis
+
+_LEASE_EXPIRED = "Reserva expirou sem conclusão (worker interrompido?)."
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def as_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    # O SQLite devolve datas sem fuso (gravadas em UTC)
+    if moment is not None and moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+def backoff_delay(attempts: int) -> timedelta:
+    """Espera antes da próxima tentativa: base * 2^(tentativas-1), limitada a JOB_RETRY_MAX_SECONDS."""
+    seconds = JOB_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(seconds, JOB_RETRY_MAX_SECONDS))
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, int(round(fraction * (len(samples) - 1))))
+    return samples[index]
+
+
+def latency_summary(samples: List[float]) -> dict:
+    samples = sorted(samples)
+    return {
+        "avg": round(sum(samples) / len(samples) * 1000, 1) if samples else 0.0,
+        "p95": round(_percentile(samples, 0.95) * 1000, 1),
+        "max": round(samples[-1] * 1000, 1) if samples else 0.0,
+    }
+
+
+class JobRepository:
+
+    @staticmethod
+    def get_by_key(db: Session, idempotency_key: str) -> Optional[Job]:
+        return db.query(Job).filter(Job.idempotency_key == idempotency_key).first()
+
+    @staticmethod
+    def enqueue(
+        db: Session, job_type: str, payload: Optional[dict] = None, priority: int = 0,
+        idempotency_key: Optional[str] = None, max_attempts: int = JOB_MAX_ATTEMPTS,
+        run_at: Optional[datetime] = None
+    ) -> Job:
+        """Enfileira (e comita) um job. Com idempotency_key já usada, devolve o job existente."""
+        if max_attempts <= 0:
+            raise ValueError("max_attempts deve ser maior que zero.")
+        if idempotency_key:
+            existing = JobRepository.get_by_key(db, idempotency_key)
+            if existing:
+                return existing
+
+        now = utcnow()
+        job = Job(
+            job_type=job_type, payload=payload or {}, priority=priority,
+            idempotency_key=idempotency_key, max_attempts=max_attempts,
+            run_at=run_at or now, created_at=now,
+        )
+        try:
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+            return job
+        except IntegrityError:
+            # Outro processo enfileirou a mesma chave entre a busca e o INSERT
+            db.rollback()
+            existing = JobRepository.get_by_key(db, idempotency_key) if idempotency_key else None
+            if existing:
+                return existing
+            raise ValueError("Erro ao enfileirar job: violação de integridade.")
+        except SQLAlchemyError as e:
+            db.rollback()
+            raise ValueError(f"Erro ao enfileirar job: {str(e)}")
+
+    @staticmethod
+    def claim(
+        db: Session, worker_id: str, limit: int = 1, job_types: Optional[Iterable[str]] = None,
+        lease_seconds: int = JOB_LEASE_SECONDS, now: Optional[datetime] = None
+    ) -> List[Job]:
+        """Reserva até 'limit' jobs vencidos (maior prioridade primeiro) para 'worker_id'."""
+        now = now or utcnow()
+        candidates = select(Job.id)\
+            .where(Job.status == JobStatus.QUEUED.value, Job.run_at <= now)\
+            .order_by(Job.priority.desc(), Job.run_at, Job.id)\
+            .limit(limit)
+        if job_types:
+            candidates = candidates.where(Job.job_type.in_(list(job_types)))
+
+        skip_locked = db.get_bind().dialect.name == "postgresql"
+        if skip_locked:
+            # Linhas travadas por outro worker (até o commit dele) ficam de fora
+            candidates = candidates.with_for_update(skip_locked=True)
+        ids = db.execute(candidates).scalars().all()
+        if not skip_locked:
+            # Fecha a leitura antes de escrever: no SQLite em WAL, promover uma leitura antiga
+            # a escrita falha na hora ('database is locked') se outro worker já gravou
+            db.commit()
+        if not ids:
+            return []
+
+        claimed = db.execute(
+            update(Job)
+            .where(Job.id.in_(ids), Job.status == JobStatus.QUEUED.value)
+            .values(
+                status=JobStatus.RUNNING.value, locked_by=worker_id,
+                locked_until=now + timedelta(seconds=lease_seconds),
+                attempts=Job.attempts + 1, started_at=now, finished_at=None,
+            )
+            .returning(Job.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        db.commit()
+        if not claimed:
+            return []
+        return db.query(Job)\
+            .filter(Job.id.in_(claimed))\
+            .order_by(Job.priority.desc(), Job.run_at, Job.id)\
+            .populate_existing()\
+            .all()
+
+    @staticmethod
+    def extend_lease(
+        db: Session, job_id: str, worker_id: str, lease_seconds: int = JOB_LEASE_SECONDS, now: Optional[datetime] = None
+    ) -> bool:
+        """Empurra o locked_until de um job em execução. False = a reserva já não é deste worker."""
+        changed = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == JobStatus.RUNNING.value, Job.locked_by == worker_id)
+            .values(locked_until=(now or utcnow()) + timedelta(seconds=lease_seconds))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        return changed == 1
+
+    @staticmethod
+    def _finish(db: Session, job: Job, worker_id: str, **values) -> bool:
+        # Só quem detém a reserva encerra o job: se o lease venceu e outro worker o pegou, vale a dele
+        changed = db.execute(
+            update(Job)
+            .where(Job.id == job.id, Job.status == JobStatus.RUNNING.value, Job.locked_by == worker_id)
+            .values(locked_until=None, **values)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        return changed == 1
+
+    @staticmethod
+    def complete(db: Session, job: Job, worker_id: str, result: Optional[dict] = None, now: Optional[datetime] = None) -> bool:
+        """Marca como concluído. False = a reserva já não era deste worker."""
+        return JobRepository._finish(
+            db, job, worker_id, status=JobStatus.DONE.value, result=result,
+            finished_at=now or utcnow(), last_error=None,
+        )
+
+    @staticmethod
+    def fail(
+        db: Session, job: Job, worker_id: str, error: str, retry: bool = True, now: Optional[datetime] = None
+    ) -> bool:
+        """Registra a falha: volta para a fila com backoff ou, sem tentativas restantes, vira 'failed'."""
+        now = now or utcnow()
+        if retry and job.attempts < job.max_attempts:
+            return JobRepository._finish(
+                db, job, worker_id, status=JobStatus.QUEUED.value, last_error=error,
+                run_at=now + backoff_delay(job.attempts),
+            )
+        return JobRepository._finish(db, job, worker_id, status=JobStatus.FAILED.value, last_error=error, finished_at=now)
+
+    @staticmethod
+    def release_expired(db: Session, now: Optional[datetime] = None) -> dict:
+        """Jobs 'running' com lease vencido: de volta à fila (ou 'failed', se já esgotaram as tentativas)."""
+        now = now or utcnow()
+        expired = (Job.status == JobStatus.RUNNING.value, Job.locked_until < now)
+        requeued = db.execute(
+            update(Job)
+            .where(*expired, Job.attempts < Job.max_attempts)
+            .values(status=JobStatus.QUEUED.value, locked_until=None, run_at=now, last_error=_LEASE_EXPIRED)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        failed = db.execute(
+            update(Job)
+            .where(*expired, Job.attempts >= Job.max_attempts)
+            .values(status=JobStatus.FAILED.value, locked_until=None, finished_at=now, last_error=_LEASE_EXPIRED)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        return {"requeued": requeued, "failed": failed}
+
+    @staticmethod
+    def metrics(db: Session, window_minutes: int = 60, now: Optional[datetime] = None) -> dict:
+        """
+        Por tipo de job: contagem por status, atraso do backlog (o 'queued' vencido mais antigo)
+        e, na janela, vazão (concluídos/min) e latências: espera na fila (run_at -> início),
+        execução (início -> fim) e total (criação -> fim), em ms.
+        """
+        now = now or utcnow()
+        since = now - timedelta(minutes=window_minutes)
+        by_type = defaultdict(lambda: {
+            "counts": {status.value: 0 for status in JobStatus},
+            "backlog_lag_seconds": 0.0,
+            "completed": 0,
+            "failed": 0,
+        })
+
+        for job_type, status, count in db.execute(
+            select(Job.job_type, Job.status, func.count()).group_by(Job.job_type, Job.status)
+        ):
+            by_type[job_type]["counts"][status] = count
+
+        for job_type, oldest in db.execute(
+            select(Job.job_type, func.min(Job.run_at))
+            .where(Job.status == JobStatus.QUEUED.value, Job.run_at <= now)
+            .group_by(Job.job_type)
+        ):
+            by_type[job_type]["backlog_lag_seconds"] = round((now - as_utc(oldest)).total_seconds(), 1)
+
+        for job_type, count in db.execute(
+            select(Job.job_type, func.count())
+            .where(Job.status == JobStatus.FAILED.value, Job.finished_at >= since)
+            .group_by(Job.job_type)
+        ):
+            by_type[job_type]["failed"] = count
+
+        waits, runs, totals = defaultdict(list), defaultdict(list), defaultdict(list)
+        recent = db.execute(
+            select(Job.job_type, Job.created_at, Job.run_at, Job.started_at, Job.finished_at)
+            .where(Job.status == JobStatus.DONE.value, Job.finished_at >= since)
+            .order_by(Job.finished_at.desc())
+            .limit(JOB_METRICS_SAMPLE)
+        )
+        for job_type, created_at, run_at, started_at, finished_at in recent:
+            created_at, run_at, started_at, finished_at = map(as_utc, (created_at, run_at, started_at, finished_at))
+            by_type[job_type]["completed"] += 1
+            waits[job_type].append(max((started_at - run_at).total_seconds(), 0.0))
+            runs[job_type].append((finished_at - started_at).total_seconds())
+            totals[job_type].append((finished_at - created_at).total_seconds())
+
+        report = {}
+        for job_type, entry in sorted(by_type.items()):
+            entry["throughput_per_minute"] = round(entry["completed"] / window_minutes, 2) if window_minutes else 0.0
+            entry["wait_ms"] = latency_summary(waits[job_type])
+            entry["run_ms"] = latency_summary(runs[job_type])
+            entry["total_ms"] = latency_summary(totals[job_type])
+            report[job_type] = entry
+        return {"window_minutes": window_minutes, "job_types": report}
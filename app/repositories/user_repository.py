@@ -2,11 +2,13 @@
 Repositório de Usuários.
 Camada responsável por todas as operações diretas no banco de dados referentes a Usuários.
 """
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from typing import Optional
 
-from app.models.user_model import User
+from app.models.user_model import User, UserCompanyLink
 from app.schemas.user_schemas import UserCreate
 from app.core.security import get_password_hash
 
@@ -50,4 +52,63 @@ class UserRepository:
         
     @staticmethod
     def get_by_id(db: Session, user_id: str) -> Optional[User]:
-        return db.query(User).filter(User.id == user_id).first()
\ No newline at end of file
+        return db.query(User).filter(User.id == user_id).first()
+
+    @staticmethod
+    def get_by_email_with_links(db: Session, email: str) -> Optional[User]:
+        """
+        Usuário + vínculos + empresas vinculadas numa única query (JOIN).
+        Evita um SELECT por acesso a 'company_links' e outro por 'link.company'.
+        """
+        return db.query(User)\
+            .options(joinedload(User.company_links).joinedload(UserCompanyLink.company))\
+            .filter(User.email == email)\
+            .first()
+
+    @staticmethod
+    def get_by_id_with_links(db: Session, user_id: str) -> Optional[User]:
+        """Mesmo carregamento de get_by_email_with_links, buscando pelo ID."""
+        return db.query(User)\
+            .options(joinedload(User.company_links).joinedload(UserCompanyLink.company))\
+            .filter(User.id == user_id)\
+            .first()
+
+    @staticmethod
+    def update_password_hash(db: Session, user: User, password_hash: str) -> User:
+        """Grava um novo hash de senha (ex: rehash após mudança de custo do bcrypt)."""
+        user.password_hash = password_hash
+        db.commit()
+        return user
+
+
+class AsyncUserRepository:
+    """
+    Versão assíncrona (AsyncSession) das operações do caminho quente: login e autenticação.
+    Mesmas queries do UserRepository; convive com ele durante a migração das rotas.
+    """
+
+    @staticmethod
+    def _with_links():
+        return select(User).options(joinedload(User.company_links).joinedload(UserCompanyLink.company))
+
+    @staticmethod
+    async def get_by_email(db: AsyncSession, email: str) -> Optional[User]:
+        result = await db.execute(select(User).where(User.email == email).limit(1))
+        return result.scalars().first()
+
+    @staticmethod
+    async def get_by_email_with_links(db: AsyncSession, email: str) -> Optional[User]:
+        """Usuário + vínculos + empresas numa única query (sem lazy load, proibido no async)."""
+        result = await db.execute(AsyncUserRepository._with_links().where(User.email == email))
+        return result.unique().scalars().first()
+
+    @staticmethod
+    async def get_by_id_with_links(db: AsyncSession, user_id: str) -> Optional[User]:
+        result = await db.execute(AsyncUserRepository._with_links().where(User.id == user_id))
+        return result.unique().scalars().first()
+
+    @staticmethod
+    async def update_password_hash(db: AsyncSession, user: User, password_hash: str) -> User:
+        user.password_hash = password_hash
+        await db.commit()
+        return user
@@ -0,0 +1,266 @@
+"""
+Repositório das Estatísticas do Cofre (company_vault_stats).
+Mantém, por empresa, os contadores por status de 'documents' + 'certificates'
+e o próximo vencimento, para o painel ler uma linha por chave primária
+em vez de reagregar o cofre inteiro a cada acesso.
+
+Manutenção:
+- Incremental: listeners de flush (final do arquivo) aplicam deltas na mesma
+  transação de qualquer insert/delete/troca de status feita via ORM
+  (DocumentRepository, uploads do Admin, cadastro, exclusões...).
+- Em lote: apply_status_changes() com os deltas de uma troca de status set-based que não
+  passa pelo ORM (job de status), recompute() para reagregar empresas inteiras e
+  rebuild() para reconciliação total.
+
+As duas convivem: as linhas nunca são apagadas para recalcular (UPSERT a partir da
+agregação), e deltas e recálculos travam as linhas da company_vault_stats (FOR UPDATE,
+em ordem de company_id) antes de escrever. Um upload concorrente a um recálculo espera
+por ele em vez de achar a linha sumida e tentar inseri-la de novo.
+"""
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, Mapping, Optional, Set, Tuple
+
+from sqlalchemy import select, union_all, func, case, insert, delete, update, literal, or_, inspect, event, true, Date
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.company_model import Company
+from app.models.company_vault_stats_model import CompanyVaultStats
+from app.models.document_model import Document, DocumentStatus
+from app.models.certificate_model import Certificate
+
+# Status com contador próprio (os demais entram só no total)
+STATUS_COLUMNS = ("valid", "warning", "expired", "processing", "error")
+_VAULT_MODELS = (Document, Certificate)
+# Só itens "em dia" contam para o próximo vencimento (ignora vencidos e os ainda em leitura)
+_ACTIVE_STATUSES = (DocumentStatus.VALID.value, DocumentStatus.WARNING.value)
+_stats = CompanyVaultStats.__table__
+
+
+class VaultStatsRepository:
+
+    @staticmethod
+    def get(db: Session, company_id: str) -> Optional[CompanyVaultStats]:
+        """Leitura por chave primária. None = empresa sem nenhum item registrado."""
+        return db.get(CompanyVaultStats, company_id)
+
+    @staticmethod
+    def _aggregate_select(company_ids: Optional[Iterable[str]] = None):
+        """SELECT agrupado por empresa sobre o UNION ALL das duas tabelas (fonte da verdade)."""
+        branches = []
+        for model in _VAULT_MODELS:
+            stmt = select(
+                model.company_id.label("company_id"),
+                model.status.label("status"),
+                model.expiration_date.label("expiration_date"),
+            )
+            if company_ids is not None:
+                stmt = stmt.where(model.company_id.in_(list(company_ids)))
+            branches.append(stmt)
+        items = union_all(*branches).subquery("items")
+
+        columns = [items.c.company_id, func.count().label("total")]
+        for status in STATUS_COLUMNS:
+            columns.append(func.coalesce(func.sum(case((items.c.status == status, 1), else_=0)), 0).label(status))
+        columns.append(
+            func.min(case((items.c.status.in_(_ACTIVE_STATUSES), items.c.expiration_date))).label("next_expiration")
+        )
+        return select(*columns).group_by(items.c.company_id)
+
+    @staticmethod
+    def _next_expiration_subquery(company_id: str):
+        """Menor vencimento entre os itens em dia de UMA empresa (usa os índices company_id + expiration_date)."""
+        branches = [
+            select(func.min(model.expiration_date).label("d")).where(
+                model.company_id == company_id,
+                model.status.in_(_ACTIVE_STATUSES),
+            )
+            for model in _VAULT_MODELS
+        ]
+        both = union_all(*branches).subquery("next_exp")
+        return select(func.min(both.c.d)).scalar_subquery()
+
+    @staticmethod
+    def recompute(db: Session, company_ids: Iterable[str]) -> int:
+        """
+        Recalcula do zero as linhas das empresas informadas (UPSERT a partir da agregação).
+        Use após UPDATEs em massa que não passam pelo ORM. Não faz commit.
+        """
+        company_ids = list(set(company_ids))
+        if not company_ids:
+            return 0
+        return VaultStatsRepository._rebuild(db, company_ids)
+
+    @staticmethod
+    def apply_status_changes(db: Session, changes: Mapping[Tuple[str, str], int], target: str) -> None:
+        """
+        Deltas de um UPDATE de status em massa: changes = {(company_id, status antigo): linhas},
+        todas indo para 'target'. Só as linhas das empresas afetadas mudam (nada é reagregado);
+        o próximo vencimento é relido pelo índice (company_id, expiration_date). Não faz commit.
+        """
+        deltas: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        for (company_id, old_status), amount in changes.items():
+            if old_status in STATUS_COLUMNS:
+                deltas[company_id][old_status] -= amount
+            if target in STATUS_COLUMNS:
+                deltas[company_id][target] += amount
+        if not deltas:
+            return
+
+        conn = db.connection()
+        VaultStatsRepository._lock_rows(conn, deltas)
+        missing = []
+        for company_id in sorted(deltas):
+            values = {column: _stats.c[column] + delta for column, delta in deltas[company_id].items() if delta}
+            values["next_expiration"] = VaultStatsRepository._next_expiration_subquery(company_id)
+            values["updated_at"] = func.now()
+            result = conn.execute(update(_stats).where(_stats.c.company_id == company_id).values(**values))
+            if result.rowcount == 0:
+                missing.append(company_id)
+        if missing:
+            # Empresa sem linha (anterior à tabela): a agregação já enxerga o UPDATE
+            VaultStatsRepository._rebuild(db, missing)
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """Reconciliação total: reagrega todas as empresas. Não faz commit."""
+        return VaultStatsRepository._rebuild(db, None)
+
+    @staticmethod
+    def _lock_rows(conn, company_ids: Optional[Iterable[str]]) -> None:
+        """
+        SELECT ... FOR UPDATE nas linhas (ordenado, para dois recálculos não se travarem em cruz).
+        No SQLite o FOR UPDATE não existe (e não faz falta: ele já serializa as escritas).
+        """
+        stmt = select(_stats.c.company_id).order_by(_stats.c.company_id).with_for_update()
+        if company_ids is not None:
+            stmt = stmt.where(_stats.c.company_id.in_(sorted(company_ids)))
+        conn.execute(stmt).all()
+
+    @staticmethod
+    def _rebuild(db: Session, company_ids: Optional[list]) -> int:
+        conn = db.connection()
+        VaultStatsRepository._lock_rows(conn, company_ids)
+
+        aggregate = VaultStatsRepository._aggregate_select(company_ids).subquery("aggregate")
+        columns = ["company_id", "total", *STATUS_COLUMNS, "next_expiration"]
+        # 'WHERE true': no SQLite, INSERT ... SELECT ... ON CONFLICT é ambíguo sem WHERE
+        source = select(*[aggregate.c[column] for column in columns]).where(true())
+
+        dialect_insert = postgresql.insert if conn.dialect.name == "postgresql" else sqlite.insert
+        upsert = dialect_insert(_stats).from_select(columns, source)
+        upsert = upsert.on_conflict_do_update(
+            index_elements=[_stats.c.company_id],
+            set_={**{column: upsert.excluded[column] for column in columns[1:]}, "updated_at": func.now()},
+        )
+        result = conn.execute(upsert)
+
+        # Empresas que ficaram sem nenhum item não aparecem na agregação: zera em vez de apagar
+        emptied = update(_stats).where(_stats.c.company_id.notin_(select(aggregate.c.company_id)))
+        if company_ids is not None:
+            emptied = emptied.where(_stats.c.company_id.in_(company_ids))
+        conn.execute(emptied.values(
+            **{column: 0 for column in ("total", *STATUS_COLUMNS)}, next_expiration=None, updated_at=func.now()
+        ))
+        return result.rowcount
+
+    # --- MANUTENÇÃO INCREMENTAL (chamada pelos listeners de flush) ---
+
+    @staticmethod
+    def apply_flush(session: Session) -> None:
+        """Traduz o que acabou de ser gravado em deltas na company_vault_stats."""
+        deleted_companies = {obj.id for obj in session.deleted if isinstance(obj, Company)}
+        new_companies = [obj.id for obj in session.new if isinstance(obj, Company)]
+
+        deltas: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        new_expirations: Dict[str, date] = {}
+        refresh_next: Set[str] = set()
+        full_recompute: Set[str] = set()
+
+        def count(company_id, status, sign):
+            deltas[company_id]["total"] += sign
+            if status in STATUS_COLUMNS:
+                deltas[company_id][status] += sign
+
+        for obj in session.new:
+            if isinstance(obj, _VAULT_MODELS):
+                count(obj.company_id, obj.status, +1)
+                if obj.expiration_date and obj.status in _ACTIVE_STATUSES:
+                    current = new_expirations.get(obj.company_id)
+                    new_expirations[obj.company_id] = min(current, obj.expiration_date) if current else obj.expiration_date
+
+        for obj in session.deleted:
+            if isinstance(obj, _VAULT_MODELS):
+                count(obj.company_id, obj.status, -1)
+                refresh_next.add(obj.company_id)
+
+        for obj in session.dirty:
+            if not isinstance(obj, _VAULT_MODELS):
+                continue
+            attrs = inspect(obj).attrs
+            status_h, company_h, exp_h = attrs.status.history, attrs.company_id.history, attrs.expiration_date.history
+            if not (status_h.has_changes() or company_h.has_changes() or exp_h.has_changes()):
+                continue
+
+            old_company = company_h.deleted[0] if company_h.deleted else obj.company_id
+            refresh_next.update({old_company, obj.company_id})
+            if status_h.has_changes() or company_h.has_changes():
+                if status_h.has_changes() and not status_h.deleted:
+                    # Valor antigo nunca foi carregado: não dá para subtrair, recalcula a empresa
+                    full_recompute.add(obj.company_id)
+                    continue
+                old_status = status_h.deleted[0] if status_h.deleted else obj.status
+                count(old_company, old_status, -1)
+                count(obj.company_id, obj.status, +1)
+
+        conn = session.connection()
+        if deleted_companies:
+            conn.execute(delete(_stats).where(_stats.c.company_id.in_(deleted_companies)))
+        for company_id in new_companies:
+            conn.execute(insert(_stats).values(company_id=company_id))
+
+        touched = (set(deltas) | set(new_expirations) | refresh_next) - deleted_companies - full_recompute
+        if touched:
+            # Espera um recálculo em andamento dessas empresas terminar antes de somar o delta
+            VaultStatsRepository._lock_rows(conn, touched)
+        for company_id in sorted(touched):
+            values = {
+                column: _stats.c[column] + delta
+                for column, delta in deltas.get(company_id, {}).items() if delta
+            }
+            if company_id in refresh_next:
+                values["next_expiration"] = VaultStatsRepository._next_expiration_subquery(company_id)
+            elif company_id in new_expirations:
+                new_date = literal(new_expirations[company_id], Date)
+                values["next_expiration"] = case(
+                    (or_(_stats.c.next_expiration.is_(None), _stats.c.next_expiration > new_date), new_date),
+                    else_=_stats.c.next_expiration,
+                )
+            values["updated_at"] = func.now()
+
+            result = conn.execute(update(_stats).where(_stats.c.company_id == company_id).values(**values))
+            if result.rowcount == 0:
+                # Empresa anterior à tabela (ou sem linha): a agregação já enxerga este flush
+                full_recompute.add(company_id)
+
+        full_recompute -= deleted_companies
+        if full_recompute:
+            VaultStatsRepository._rebuild(session, list(full_recompute))
+
+
+# --- LISTENERS ---
+
+@event.listens_for(Session, "before_flush")
+def _load_vault_items_before_delete(session, flush_context, instances):
+    # Garante company_id/status em memória antes do DELETE (depois a linha já não existe)
+    for obj in session.deleted:
+        if isinstance(obj, _VAULT_MODELS):
+            obj.company_id, obj.status
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_vault_stats(session, flush_context):
+    # Nesse ponto o SQL já foi emitido, mas new/dirty/deleted e o histórico ainda refletem o flush
+    if any(isinstance(obj, (*_VAULT_MODELS, Company)) for obj in (*session.new, *session.dirty, *session.deleted)):
+        VaultStatsRepository.apply_flush(session)
@@ -2,21 +2,25 @@
 Router Administrativo.
 Gerenciamento global de empresas (Backoffice).
 """
-import shutil
-import os
-import uuid
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.core.database import get_db
+from app.core.database import get_db, get_pool_stats, replica_set
+from app.core.auth_cache import principal_cache
+from app.core.password_hasher import password_hasher
+from app.core.storage import ingest_upload, download_response, UploadRejected
 from app.dependencies import get_current_active_admin
 from app.schemas.company_schemas import CompanyCreate, CompanyUpdate, CompanyResponse
 from app.repositories.company_repository import CompanyRepository
+from app.repositories.blob_repository import BlobRepository
+from app.repositories.job_repository import JobRepository
 from app.models.user_model import User
 from app.models.company_model import Company
-from app.models.document_model import Document
+from app.models.document_model import Document, DocumentStatus
+from app.schemas.document_schemas import ExportFormatEnum
+from app.utils.export_helper import stream_vault_export
 
 
 # Prefixo /admin + Tag "Administração" organiza tudo no Swagger
@@ -139,6 +143,7 @@ def get_company_details(
 )
 def list_company_documents(
     company_id: str,
+    export: Optional[ExportFormatEnum] = Query(None, description="Exporta o cofre completo (legado + certidões) em streaming"),
     db: Session = Depends(get_db),
     current_admin = Depends(get_current_active_admin)
 ):
@@ -147,6 +152,9 @@ def list_company_documents(
     if not company:
         raise HTTPException(status_code=404, detail="Empresa não encontrada")
 
+    if export:
+        return stream_vault_export(db, company_id, export)
+
     # Busca documentos
     docs = db.query(Document).filter(Document.company_id == company_id).all()
     return docs
@@ -157,53 +165,54 @@ def list_company_documents(
     summary="[Admin] Upload de Documento",
     description="Envia um arquivo em nome da empresa."
 )
-def upload_company_document(
+async def upload_company_document(
     company_id: str,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     current_admin = Depends(get_current_active_admin)
 ):
     # 1. Verifica empresa
-    company = db.query(Company).filter(Company.id == company_id).first()
+    company = await run_in_threadpool(db.get, Company, company_id)
     if not company:
         raise HTTPException(status_code=404, detail="Empresa não encontrada")
 
-    # 2. Prepara o salvamento do arquivo
-    # Cria diretório uploads se não existir
-    upload_dir = "uploads"
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    # Gera nome único para não sobrescrever (uuid + nome original)
-    file_extension = os.path.splitext(file.filename)[1]
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = os.path.join(upload_dir, unique_filename)
-
-    # 3. Salva no disco
+    # 2. Salva no disco (ingest em streaming: limite de tamanho, '%PDF', SHA-256, rename atômico)
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        stored = await ingest_upload(file)
+    except UploadRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao salvar arquivo: {str(e)}")
 
-    # 4. Registra no Banco de Dados
+    # 3. Registra no Banco de Dados
     new_doc = Document(
         filename=file.filename,
-        file_path=file_path,
+        file_path=stored.path,
+        content_hash=stored.sha256,
+        file_size=stored.size,
         company_id=company_id,
         uploaded_by_id=current_admin.id, # Rastreabilidade: quem subiu foi o Admin
-        status="active"
+        status=DocumentStatus.VALID.value
     )
-    
-    db.add(new_doc)
-    db.commit()
-    db.refresh(new_doc)
-    
-    return new_doc
+
+    def persist():
+        db.add(new_doc)
+        db.commit()
+        db.refresh(new_doc)
+        return new_doc
+
+    try:
+        return await run_in_threadpool(persist)
+    except Exception:
+        await run_in_threadpool(db.rollback)
+        await run_in_threadpool(BlobRepository.schedule_release, db, [stored.path])
+        raise
 
 @router.get("/companies/{company_id}/documents/{doc_id}/download")
 def download_company_document(
     company_id: str,
     doc_id: str,
+    request: Request,
     db: Session = Depends(get_db),
     current_admin = Depends(get_current_active_admin)
 ):
@@ -212,16 +221,14 @@ def download_company_document(
     if not doc:
         raise HTTPException(status_code=404, detail="Documento não encontrado")
     
-    # 2. Verifica se arquivo existe no disco
-    if not os.path.exists(doc.file_path):
+    # 2. Retorna o arquivo para download (404 se ele não existe no storage)
+    try:
+        return download_response(
+            request, doc.file_path, doc.filename, media_type='application/octet-stream',
+            content_hash=doc.content_hash, last_modified=doc.created_at,
+        )
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Arquivo físico não encontrado no servidor")
-        
-    # 3. Retorna o arquivo para download
-    return FileResponse(
-        path=doc.file_path, 
-        filename=doc.filename,
-        media_type='application/octet-stream'
-    )
 
 @router.delete("/companies/{company_id}/documents/{doc_id}")
 def delete_company_document(
@@ -233,13 +240,46 @@ def delete_company_document(
     doc = db.query(Document).filter(Document.id == doc_id, Document.company_id == company_id).first()
     if not doc:
         raise HTTPException(status_code=404, detail="Documento não encontrado")
-        
-    # 1. Remove do disco (opcional: pode manter backup se quiser)
-    if os.path.exists(doc.file_path):
-        os.remove(doc.file_path)
-        
-    # 2. Remove do banco
+
+    # 1. Remove do banco
+    file_path = doc.file_path
     db.delete(doc)
     db.commit()
-    
-    return {"message": "Documento removido com sucesso"}
\ No newline at end of file
+
+    # 2. O arquivo sai do storage depois da carência, se nenhuma outra linha usar o mesmo blob
+    BlobRepository.schedule_release(db, [file_path])
+
+    return {"message": "Documento removido com sucesso"}
+
+@router.get(
+    "/storage/report",
+    summary="[Admin] Economia da Deduplicação",
+    description="Blobs, referências e bytes economizados pelo armazenamento endereçado por conteúdo."
+)
+def get_storage_report(db: Session = Depends(get_db), current_admin = Depends(get_current_active_admin)):
+    return BlobRepository.storage_report(db)
+
+@router.get(
+    "/metrics",
+    summary="[Admin] Métricas Internas",
+    description="Contadores de runtime do processo atual (cache de autenticação, pool de bcrypt, pool do banco)."
+)
+def get_runtime_metrics(current_admin = Depends(get_current_active_admin)):
+    return {
+        "auth_cache": principal_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "db_pool": get_pool_stats(),
+        "db_replicas": replica_set.stats() if replica_set else [],
+    }
+
+@router.get(
+    "/jobs/metrics",
+    summary="[Admin] Métricas da Fila de Jobs",
+    description="Por tipo de job: backlog por status, atraso da fila, vazão e latências (espera, execução, total) na janela."
+)
+def get_job_metrics(
+    window_minutes: int = Query(60, ge=1, le=24 * 60),
+    db: Session = Depends(get_db),
+    current_admin = Depends(get_current_active_admin)
+):
+    return JobRepository.metrics(db, window_minutes=window_minutes)
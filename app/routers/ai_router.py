@@ -2,8 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
+from app.core.auth_cache import Principal
 from app.dependencies import get_current_user
-from app.models.user_model import User
 from app.services.ai_service import AIService
 from app.schemas.ai_schemas import ChatRequest, ChatResponse
 
@@ -24,7 +24,7 @@ router = APIRouter(prefix="/ai", tags=["Inteligência Artificial"])
 def chat_with_concierge(
     request: ChatRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Endpoint simplificado: Apenas repassa a intenção para o Service.
@@ -4,21 +4,25 @@ Controla as rotas relacionadas a cadastro, login e gestão de acesso.
 Versão Definitiva: Suporta Upload (Form), JSON Legado e Login via /token.
 """
 from datetime import timedelta
-from typing import Optional
+from typing import List, Optional, Tuple
 from fastapi import APIRouter, Depends, HTTPException, status, Form, UploadFile, File
 from fastapi.security import OAuth2PasswordRequestForm
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
 
-from app.core.database import get_db
-from app.core.security import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, verify_password, get_password_hash
+from app.core.database import get_db, get_async_db
+from app.core.security import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.core.password_hasher import password_hasher
 
 # Models & Repos
 from app.models.user_model import User, UserCompanyLink, UserCompanyRole, UserRole
 from app.models.company_model import Company
 from app.models.document_model import Document, DocumentStatus 
-from app.utils.file_helper import save_upload_file
-from app.repositories.user_repository import UserRepository
+from app.core.storage import StoredFile, ingest_upload
+from app.repositories.blob_repository import BlobRepository
+from app.repositories.user_repository import UserRepository, AsyncUserRepository
 from app.schemas.user_schemas import Token
 
 router = APIRouter(prefix="/auth", tags=["Autenticação"])
@@ -27,7 +31,7 @@ router = APIRouter(prefix="/auth", tags=["Autenticação"])
 # app/routers/auth_router.py
 
 @router.post("/register", status_code=status.HTTP_201_CREATED)
-def register(
+async def register(
     email: EmailStr = Form(..., description="Email do usuário"),
     password: str = Form(..., description="Senha"),
     legal_name: str = Form(..., description="Razão Social"),
@@ -41,15 +45,51 @@ def register(
     db: Session = Depends(get_db)
 ):
     # 1. Validação Inicial (Antes de tentar salvar qualquer coisa)
-    if UserRepository.get_by_email(db, email):
+    if await run_in_threadpool(UserRepository.get_by_email, db, email):
         raise HTTPException(status_code=400, detail="Email já cadastrado.")
 
+    # 2. Bcrypt no pool dedicado (não ocupa o threadpool da API)
+    password_hash = await password_hasher.hash(password)
+
+    # 3. Arquivos: ingest em streaming antes da transação (upload recusado = nada é criado)
+    # O documento de identidade pode ser foto: só ele dispensa a checagem de PDF
+    uploads = [
+        (social_contract, "Contrato Social", True),
+        (cnpj_card, "Cartão CNPJ", True),
+        (responsible_doc, "Documento Identidade", False),
+    ]
+    stored_files = []
+    try:
+        for upload_file, title, require_pdf in uploads:
+            if upload_file:
+                stored = await ingest_upload(upload_file, require_pdf=require_pdf)
+                stored_files.append((stored, upload_file.filename, title))
+    except Exception:
+        await run_in_threadpool(BlobRepository.schedule_release, db, [stored.path for stored, _, _ in stored_files])
+        raise
+
+    # 4. Transação (DB) continua síncrona, no threadpool
+    try:
+        return await run_in_threadpool(
+            _create_account, db, email, password_hash, legal_name, trade_name, cnpj,
+            responsible_name, cpf, stored_files
+        )
+    except Exception:
+        # Cadastro desfeito: os arquivos já gravados não podem ficar órfãos
+        await run_in_threadpool(BlobRepository.schedule_release, db, [stored.path for stored, _, _ in stored_files])
+        raise
+
+def _create_account(
+    db: Session, email: str, password_hash: str, legal_name: str, trade_name: Optional[str],
+    cnpj: str, responsible_name: str, cpf: str, stored_files: List[Tuple[StoredFile, str, str]]
+) -> dict:
+    """Cria Usuário + Empresa + Vínculo + Documentos iniciais numa transação atômica."""
     # Início da Transação Atômica
     try:
         # 2. Cria Usuário
         new_user = User(
             email=email, 
-            password_hash=get_password_hash(password),
+            password_hash=password_hash,
             role=UserRole.CLIENT.value,
             is_active=True, 
             cpf=cpf
@@ -78,36 +118,18 @@ def register(
         )
         db.add(link)
 
-        # 5. Processamento de Arquivos (Aqui estava o erro)
-        def process_file(upload_file: UploadFile, title: str):
-            if not upload_file: 
-                return
-            
-            try:
-                # O save_upload_file retorna (caminho, tamanho)
-                # Certifique-se que sua função save_upload_file retorna dois valores!
-                path, size = save_upload_file(upload_file, "companies")
-                
-                doc = Document(
-                    title=title,
-                    filename=upload_file.filename,
-                    file_path=path,
-                    # Se seu Model Document tiver campo file_size, use a variável 'size' aqui
-                    # file_size=size, <--- Se não tiver o campo no model, remova essa linha
-                    company_id=new_company.id,
-                    uploaded_by_id=new_user.id,
-                    status=DocumentStatus.VALID.value
-                )
-                db.add(doc)
-            except Exception as e:
-                # Se der erro no upload, lançamos exceção para cancelar TUDO
-                print(f"Erro crítico no upload {title}: {e}")
-                raise ValueError(f"Falha ao salvar {title}: {str(e)}")
-
-        # Processa os arquivos
-        if social_contract: process_file(social_contract, "Contrato Social")
-        if cnpj_card: process_file(cnpj_card, "Cartão CNPJ")
-        if responsible_doc: process_file(responsible_doc, "Documento Identidade")
+        # 5. Documentos iniciais (arquivos já gravados pelo ingest)
+        for stored, filename, title in stored_files:
+            db.add(Document(
+                title=title,
+                filename=filename,
+                file_path=stored.path,
+                content_hash=stored.sha256,
+                file_size=stored.size,
+                company_id=new_company.id,
+                uploaded_by_id=new_user.id,
+                status=DocumentStatus.VALID.value
+            ))
 
         # 6. Se chegou até aqui sem erros, SALVA TUDO
         db.commit()
@@ -138,17 +160,32 @@ def register(
 # --- ROTA DE LOGIN (Token padrão OAuth2) ---
 # [CORREÇÃO CRÍTICA] Mudado de "/login" para "/token" para bater com os testes
 @router.post("/token", response_model=Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     """
     Login padrão OAuth2. Retorna Access Token.
+    A verificação do bcrypt roda no pool dedicado (503 se estiver saturado)
+    e o banco é acessado via AsyncSession: nada ocupa o threadpool.
     """
-    user = UserRepository.get_by_email(db, form_data.username)
-    if not user or not verify_password(form_data.password, user.password_hash):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Email ou senha incorretos",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Email ou senha incorretos",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    user = await AsyncUserRepository.get_by_email(db, form_data.username)
+    if not user:
+        # Mesmo custo de um login real: o tempo de resposta não revela se o e-mail existe
+        await password_hasher.dummy_verify()
+        raise credentials_exception
+
+    is_valid, new_hash = await password_hasher.verify_and_update(form_data.password, user.password_hash)
+    if not is_valid:
+        raise credentials_exception
+
+    # Política de custo mudou (BCRYPT_ROUNDS): aproveita a senha em claro para refazer o hash
+    if new_hash:
+        await AsyncUserRepository.update_password_hash(db, user, new_hash)
+
     if not user.is_active:
         raise HTTPException(status_code=403, detail="Usuário inativo.")
 
@@ -164,23 +201,27 @@ class UserSimpleCreate(BaseModel):
     password: str
 
 @router.post("/register-simple", status_code=status.HTTP_201_CREATED)
-def register_simple(user_in: UserSimpleCreate, db: Session = Depends(get_db)):
+async def register_simple(user_in: UserSimpleCreate, db: Session = Depends(get_db)):
     """
     Cadastro simplificado (JSON) apenas para testes legados ou criação rápida de Admin.
     """
-    if UserRepository.get_by_email(db, user_in.email):
+    if await run_in_threadpool(UserRepository.get_by_email, db, user_in.email):
         raise HTTPException(status_code=400, detail="Email já cadastrado")
     
     user = User(
         email=user_in.email,
-        password_hash=get_password_hash(user_in.password),
+        password_hash=await password_hasher.hash(user_in.password),
         is_active=True,
         role=UserRole.CLIENT.value
     )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return user
+
+    def persist():
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        return user
+
+    return await run_in_threadpool(persist)
 
 # --- ROTA AUXILIAR DE PAGAMENTO (Mantida) ---
 class PaymentSimulationRequest(BaseModel):
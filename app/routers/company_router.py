@@ -1,14 +1,16 @@
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Path, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import secrets
 from uuid import UUID
 
-from app.core.database import get_db
-from app.core.security import get_password_hash
-from app.dependencies import get_current_active_user, verify_company_access, get_current_user
+from app.core.database import get_db, get_async_db
+from app.core.password_hasher import password_hasher
+from app.core.auth_cache import Principal
+from app.dependencies import get_current_active_user, get_current_active_user_async, verify_company_access, get_current_user
 from app.models.user_model import User, UserCompanyLink, UserCompanyRole, UserRole
-from app.repositories.company_repository import CompanyRepository
+from app.repositories.company_repository import CompanyRepository, AsyncCompanyRepository
 from app.models.company_model import Company
 from app.schemas.company_schemas import (
     CompanyUpdate, 
@@ -25,7 +27,7 @@ router = APIRouter(prefix="/companies", tags=["Gestão de Empresas"])
 def update_company(
     company_in: CompanyUpdate,
     company_id: str = Path(..., description="ID da empresa a editar"),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -57,34 +59,28 @@ def update_company(
 
 # --- 2. LISTAR MEMBROS (Rota Existente Preservada) ---
 @router.get("/{company_id}/members", response_model=List[MemberResponse])
-def list_members(
+async def list_members(
     company_id: str,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    role: Optional[UserCompanyRole] = Query(None, description="MASTER ou VIEWER"),
+    status_filter: Optional[bool] = Query(None, alias="status", description="True = ativos, False = inativos"),
+    current_user: Principal = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Lista todos os membros da empresa."""
+    """Lista os membros da empresa (paginado, com filtros de cargo e status)."""
     # Qualquer membro (Viewer ou Master) pode ver a lista da equipe
     verify_company_access(company_id, current_user)
     
-    members_links = db.query(UserCompanyLink).filter(UserCompanyLink.company_id == company_id).all()
-    
-    results = []
-    for link in members_links:
-        user = link.user
-        results.append({
-            "user_id": user.id,
-            "name": getattr(user, "nome", None) or user.email.split("@")[0], # Fallback simples
-            "email": user.email,
-            "role": link.role,
-            "status": link.is_active,
-            "joined_at": link.created_at
-        })
-    return results
+    return await AsyncCompanyRepository.list_members(
+        db, company_id, skip=skip, limit=limit,
+        role=role.value if role else None, is_active=status_filter
+    )
 
 @router.get("/{company_id}", response_model=CompanyResponse)
 def get_company_by_id(
     company_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -113,7 +109,7 @@ def get_company_by_id(
 def get_companies(
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -134,11 +130,11 @@ def get_companies(
 # --- 3. ADICIONAR MEMBRO (Nova Rota da Sprint 15) ---
 
 # Helper local para garantir a mensagem de erro exata que o teste espera
-def check_is_master(user: User, company_id: str):
+def check_is_master(user: Principal, company_id: str):
     if user.role == UserRole.ADMIN.value:
         return True
     
-    link = next((l for l in user.company_links if l.company_id == company_id), None)
+    link = user.get_link(company_id)
     
     if not link or link.role != UserCompanyRole.MASTER.value:
         raise HTTPException(
@@ -151,7 +147,7 @@ def check_is_master(user: User, company_id: str):
 def add_member(
     company_id: str,
     data: CompanyMemberInvite,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -177,7 +173,7 @@ def add_member(
         temp_password = secrets.token_urlsafe(8) # Senha de 8 chars
         user = User(
             email=data.email,
-            password_hash=get_password_hash(temp_password),
+            password_hash=password_hasher.hash_blocking(temp_password),
             role=UserRole.CLIENT.value,
             is_active=True,
             cpf=data.cpf # Opcional
@@ -220,7 +216,7 @@ def add_member(
 def update_onboarding_step(
     company_id: str,
     step: str = Query(..., description="contract | payment"), # Qual passo foi concluído
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     # 1. Verifica permissão (apenas MASTER pode fazer isso)
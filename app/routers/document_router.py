@@ -1,24 +1,42 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, status, Query
-from fastapi.responses import FileResponse
+import asyncio
+from fastapi import APIRouter, BackgroundTasks, Depends, UploadFile, File, Form, HTTPException, status, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from datetime import date
 import os
 
-from app.core.database import get_db
-from app.dependencies import get_current_user, get_current_active_user
-from app.core.storage import save_file_locally
-from app.models.user_model import User, UserRole
-from app.repositories.document_repository import DocumentRepository
+from app.core.database import get_db, get_async_db
+from app.core import job_queue
+from app.core.auth_cache import Principal
+from app.core.security import create_download_token, verify_download_token
+from app.dependencies import get_current_user, get_current_active_user, get_current_active_user_async
+from app.core.storage import (
+    ingest_upload, download_response, media_type_for, blob_path, is_blob, UploadRejected,
+    UPLOAD_BULK_MAX_FILES, UPLOAD_BULK_CONCURRENCY
+)
+from app.models.certificate_model import Certificate, CertificateStatus
+from app.models.user_model import UserRole
+from app.repositories.blob_repository import BlobRepository
+from app.repositories.company_repository import CompanyRepository
+from app.repositories.document_repository import DocumentRepository, AsyncDocumentRepository
+from app.repositories.job_repository import JobRepository
+from app.services import certificate_extraction_service, job_handlers
+from app.utils.export_helper import stream_vault_export_async
 
 from app.schemas.document_schemas import (
-    DocumentResponse, DocumentCategoryResponse, DocumentTypeResponse,
+    DocumentResponse, DocumentCategoryResponse, DocumentTypeResponse, DocumentStatusEnum, ExportFormatEnum,
     DocumentCategoryCreate, DocumentCategoryUpdate,
-    DocumentTypeCreate, DocumentTypeUpdate
+    DocumentTypeCreate, DocumentTypeUpdate, SignedDownloadResponse,
+    BulkManifestItem, BulkUploadItemResult, BulkUploadResponse
 )
 
 router = APIRouter(prefix="/documents", tags=["Gestão de Documentos"])
 
+_MANIFEST_ADAPTER = TypeAdapter(List[BulkManifestItem])
+
 # --- 0. NOVO: CATÁLOGO DE TIPOS (Sprint 17) ---
 @router.get("/types", response_model=List[DocumentCategoryResponse])
 def get_document_types_catalog(db: Session = Depends(get_db)):
@@ -26,13 +44,22 @@ def get_document_types_catalog(db: Session = Depends(get_db)):
     return DocumentRepository.get_all_categories_with_types(db)
 
 # --- 1. LISTAGEM UNIFICADA ---
+# Rota mais acessada: async (AsyncSession), não disputa o threadpool do FastAPI
 @router.get("/", response_model=List[DocumentResponse])
-def list_documents(
+async def list_documents(
+    response: Response,
     company_id: Optional[str] = Query(None, description="Filtra por empresa"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Itens por página (omitido = cofre inteiro)"),
+    cursor: Optional[str] = Query(None, description="Cursor devolvido no header X-Next-Cursor da página anterior"),
+    status_filter: Optional[DocumentStatusEnum] = Query(None, alias="status", description="Filtra por status"),
+    category_id: Optional[str] = Query(None, description="Filtra por categoria (apenas estruturados)"),
+    type_id: Optional[str] = Query(None, description="Filtra por tipo (apenas estruturados)"),
+    expires_before: Optional[date] = Query(None, description="Vencimento anterior a esta data"),
+    is_structured: Optional[bool] = Query(None, description="True = certidões, False = legados"),
+    export: Optional[ExportFormatEnum] = Query(None, description="Exporta o cofre inteiro em streaming (ndjson/csv), ignorando a paginação"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user_async)
 ):
-    allowed_company_ids = [link.company_id for link in current_user.company_links]
     target_company_id = None
 
     if current_user.role == UserRole.ADMIN.value:
@@ -42,27 +69,51 @@ def list_documents(
              raise HTTPException(status_code=400, detail="Admins devem especificar o company_id para listar o cofre.")
     else:
         if company_id:
-            if company_id not in allowed_company_ids:
+            if not current_user.has_company(company_id):
                 raise HTTPException(status_code=403, detail="Acesso negado a esta empresa.")
             target_company_id = company_id
-        elif allowed_company_ids:
-            target_company_id = allowed_company_ids[0]
+        elif current_user.company_links:
+            target_company_id = current_user.company_links[0].company_id
         else:
             return []
 
-    # Retorna o merge (Documentos + Certificados)
-    return DocumentRepository.get_unified_by_company(db, target_company_id)
+    filters = dict(
+        status=status_filter.value if status_filter else None,
+        category_id=category_id, type_id=type_id,
+        expires_before=expires_before, is_structured=is_structured
+    )
+
+    # Exportação: linhas fluem do cursor do banco direto para a resposta
+    if export:
+        return stream_vault_export_async(db, target_company_id, export, **filters)
+
+    # Retorna o merge (Documentos + Certificados), paginado por keyset se 'limit' vier.
+    # Pedimos 1 item a mais para saber se existe próxima página sem um COUNT.
+    try:
+        items = await AsyncDocumentRepository.get_unified_by_company(
+            db, target_company_id,
+            limit=limit + 1 if limit else None, cursor=cursor, **filters
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if limit and len(items) > limit:
+        items = items[:limit]
+        response.headers["X-Next-Cursor"] = DocumentRepository.encode_cursor(items[-1])
+
+    return items
 
 # --- 2. UPLOAD INTELIGENTE ---
 @router.post("/upload", response_model=DocumentResponse, status_code=status.HTTP_201_CREATED)
-def upload_document(
+async def upload_document(
+    background_tasks: BackgroundTasks,
     title: Optional[str] = Form(None), # Agora opcional, pois certificados usam type_id
     type_id: Optional[str] = Form(None), # NOVO (Sprint 17)
     authentication_code: Optional[str] = Form(None), # NOVO (Sprint 17)
     file: UploadFile = File(...),
     expiration_date: Optional[date] = Form(None), 
     target_company_id: Optional[str] = Form(None),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     if current_user.role != UserRole.ADMIN.value:
@@ -74,74 +125,286 @@ def upload_document(
     if not target_company_id:
         raise HTTPException(status_code=400, detail="ID da empresa destino é obrigatório.")
 
+    # Ingest em streaming no event loop (limite de tamanho, '%PDF', SHA-256, rename atômico)
     try:
-        file_path = save_file_locally(file)
+        stored = await ingest_upload(file)
+    except UploadRejected:
+        raise
     except Exception:
         raise HTTPException(status_code=500, detail="Falha ao salvar arquivo no disco.")
 
-    # Roteamento de Lógica: Se tem 'type_id', vai pra tabela nova. Se não, vai pra velha.
-    if type_id:
+    # Gravação no banco (sessão síncrona) no threadpool
+    try:
+        created = await run_in_threadpool(
+            _register_upload, db, stored, file.filename, title, type_id, authentication_code,
+            expiration_date, target_company_id, current_user.id
+        )
+    except Exception as e:
+        # Sem registro no banco, o arquivo vira lixo (o GC confere se outro upload passou a usá-lo)
+        await run_in_threadpool(BlobRepository.schedule_release, db, [stored.path])
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # Certidão: o pool lê o PDF depois da resposta (status 'processing' até lá)
+    if created.status == CertificateStatus.PROCESSING.value:
+        await _schedule_extraction(db, [created.id], background_tasks)
+    return created
+
+async def _schedule_extraction(db: Session, certificate_ids: List[str], background_tasks: BackgroundTasks) -> None:
+    """Com a fila de jobs ligada, a leitura sobrevive a um restart da API; senão, BackgroundTasks."""
+    if job_queue.JOB_QUEUE_ENABLED:
         try:
-            cert = DocumentRepository.create_certificate(
-                db=db, type_id=type_id, filename=file.filename, file_path=file_path,
-                company_id=target_company_id, expiration_date=expiration_date,
-                authentication_code=authentication_code
-            )
-            # Retorna no formato unificado
-            return DocumentResponse(
-                id=cert.id, filename=cert.filename, status=cert.status, created_at=cert.created_at,
-                is_structured=True, type_id=type_id, authentication_code=authentication_code
+            # Ids recém-criados: o primeiro identifica este envio (repetir o enqueue não duplica o job)
+            await run_in_threadpool(
+                JobRepository.enqueue, db, job_handlers.CERTIFICATE_EXTRACT, {"certificate_ids": certificate_ids},
+                job_handlers.PRIORITY_UPLOAD, f"{job_handlers.CERTIFICATE_EXTRACT}:{certificate_ids[0]}"
             )
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
-    else:
-        # Modo Legado
-        if not title: title = "Documento Sem Título"
+            return
+        except ValueError as e:
+            print(f"⚠️ Fila de jobs indisponível, lendo as certidões em segundo plano: {e}")
+    background_tasks.add_task(certificate_extraction_service.extract_in_background, certificate_ids)
+
+def _certificate_status() -> str:
+    # Certidão nasce 'processing' quando o robô vai ler o PDF; senão, 'valid' como antes
+    if certificate_extraction_service.PDF_EXTRACTION_ENABLED:
+        return CertificateStatus.PROCESSING.value
+    return CertificateStatus.VALID.value
+
+def _register_upload(
+    db: Session, stored, filename: str, title: Optional[str], type_id: Optional[str],
+    authentication_code: Optional[str], expiration_date: Optional[date], company_id: str, uploaded_by_id: str
+) -> DocumentResponse:
+    # Roteamento de Lógica: Se tem 'type_id', vai pra tabela nova. Se não, vai pra velha.
+    if type_id:
+        cert = DocumentRepository.create_certificate(
+            db=db, type_id=type_id, filename=filename, file_path=stored.path,
+            company_id=company_id, expiration_date=expiration_date,
+            authentication_code=authentication_code,
+            content_hash=stored.sha256, file_size=stored.size,
+            status=_certificate_status()
+        )
+        # Retorna no formato unificado
+        return DocumentResponse(
+            id=cert.id, filename=cert.filename, status=cert.status, created_at=cert.created_at,
+            is_structured=True, type_id=type_id, authentication_code=authentication_code
+        )
+
+    # Modo Legado
+    doc = DocumentRepository.create_legacy(
+        db=db, title=title or "Documento Sem Título", filename=filename, file_path=stored.path,
+        company_id=company_id, expiration_date=expiration_date, uploaded_by_id=uploaded_by_id,
+        content_hash=stored.sha256, file_size=stored.size
+    )
+    return DocumentResponse(
+        id=doc.id, title=doc.title, filename=doc.filename, status=doc.status, 
+        created_at=doc.created_at, is_structured=False
+    )
+
+# --- 2.1 UPLOAD EM LOTE (Onboarding de Cliente) ---
+@router.post("/upload/bulk", response_model=BulkUploadResponse, status_code=status.HTTP_201_CREATED)
+async def upload_documents_bulk(
+    response: Response,
+    background_tasks: BackgroundTasks,
+    target_company_id: str = Form(...),
+    manifest: str = Form(..., description="JSON: lista com os metadados de cada arquivo, na mesma ordem dos arquivos"),
+    files: List[UploadFile] = File(...),
+    current_user: Principal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Vários PDFs de uma vez: ingest concorrente (até UPLOAD_BULK_CONCURRENCY arquivos em
+    paralelo) e um único INSERT em lote numa transação. Erros de um arquivo (não é PDF,
+    grande demais, tipo inexistente) não barram os demais: cada um tem seu resultado.
+    201 = todos registrados; 207 = parte falhou (ver 'results').
+    """
+    if current_user.role != UserRole.ADMIN.value:
+        raise HTTPException(status_code=403, detail="Apenas admins podem enviar documentos.")
+    if len(files) > UPLOAD_BULK_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"Máximo de {UPLOAD_BULK_MAX_FILES} arquivos por lote.")
+    entries = _parse_manifest(manifest, files)
+    if not await run_in_threadpool(CompanyRepository.get_by_id, db, target_company_id):
+        raise HTTPException(status_code=404, detail="Empresa não encontrada.")
+
+    # Cada arquivo termina com 201 ou com o erro dele
+    results = [
+        BulkUploadItemResult(index=index, filename=file.filename, ok=False, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        for index, file in enumerate(files)
+    ]
+
+    def reject(index: int, status_code: int, detail: str) -> None:
+        results[index].status_code, results[index].detail = status_code, detail
+
+    # 1. Validações baratas antes de ler qualquer byte (tipos conferidos numa query só)
+    known_types = await run_in_threadpool(
+        DocumentRepository.get_existing_type_ids, db, [entry.type_id for entry in entries if entry.type_id]
+    )
+    pending = []
+    for index, (file, entry) in enumerate(zip(files, entries)):
+        if not file.filename.lower().endswith(".pdf"):
+            reject(index, status.HTTP_400_BAD_REQUEST, "Apenas PDFs.")
+        elif entry.type_id and entry.type_id not in known_types:
+            reject(index, status.HTTP_400_BAD_REQUEST, "Tipo de documento não encontrado.")
+        else:
+            pending.append(index)
+
+    # 2. Ingest concorrente (hash, validação de PDF e gravação no storage de todos ao mesmo tempo)
+    semaphore = asyncio.Semaphore(UPLOAD_BULK_CONCURRENCY)
+
+    async def ingest(file: UploadFile):
+        async with semaphore:
+            return await ingest_upload(file)
+
+    outcomes = await asyncio.gather(*(ingest(files[index]) for index in pending), return_exceptions=True)
+    stored = {}
+    for index, outcome in zip(pending, outcomes):
+        if isinstance(outcome, UploadRejected):
+            reject(index, outcome.status_code, str(outcome))
+        elif isinstance(outcome, Exception):
+            reject(index, status.HTTP_500_INTERNAL_SERVER_ERROR, "Falha ao salvar arquivo no disco.")
+        else:
+            stored[index] = outcome
+
+    # 3. Um INSERT em lote, uma transação
+    created = []
+    if stored:
+        items = [
+            {
+                "filename": files[index].filename, "file_path": stored[index].path,
+                "content_hash": stored[index].sha256, "file_size": stored[index].size,
+                "title": entries[index].title, "type_id": entries[index].type_id,
+                "expiration_date": entries[index].expiration_date,
+                "authentication_code": entries[index].authentication_code,
+            }
+            for index in stored
+        ]
         try:
-            doc = DocumentRepository.create_legacy(
-                db=db, title=title, filename=file.filename, file_path=file_path,
-                company_id=target_company_id, expiration_date=expiration_date, uploaded_by_id=current_user.id
-            )
-            return DocumentResponse(
-                id=doc.id, title=doc.title, filename=doc.filename, status=doc.status, 
-                created_at=doc.created_at, is_structured=False
+            created = await run_in_threadpool(_register_bulk, db, target_company_id, items, current_user.id)
+        except ValueError as e:
+            # Sem registro no banco, os blobs do lote viram lixo; os que outra linha usa ficam (o GC reconta)
+            await run_in_threadpool(
+                BlobRepository.schedule_release, db, [stored_file.path for stored_file in stored.values()]
             )
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
+            for index in stored:
+                reject(index, status.HTTP_500_INTERNAL_SERVER_ERROR, str(e))
+
+    for index, document in zip(stored, created):
+        results[index].ok, results[index].status_code = True, status.HTTP_201_CREATED
+        results[index].document = document
+
+    processing = [document.id for document in created if document.status == CertificateStatus.PROCESSING.value]
+    if processing:
+        await _schedule_extraction(db, processing, background_tasks)
+
+    failed = sum(1 for result in results if not result.ok)
+    if failed:
+        response.status_code = status.HTTP_207_MULTI_STATUS
+    return BulkUploadResponse(created=len(created), failed=failed, results=results)
+
+def _parse_manifest(manifest: str, files: List[UploadFile]) -> List[BulkManifestItem]:
+    try:
+        entries = _MANIFEST_ADAPTER.validate_json(manifest)
+    except ValidationError as e:
+        error = e.errors(include_url=False)[0]
+        location = ".".join(str(part) for part in error["loc"])
+        raise HTTPException(status_code=400, detail=f"Manifesto inválido ({location or 'raiz'}): {error['msg']}")
+    if len(entries) != len(files):
+        raise HTTPException(status_code=400, detail="O manifesto precisa ter um item por arquivo, na mesma ordem.")
+    for index, (file, entry) in enumerate(zip(files, entries)):
+        if entry.filename and entry.filename != file.filename:
+            raise HTTPException(status_code=400, detail=f"Manifesto fora de ordem: item {index} é '{entry.filename}', arquivo é '{file.filename}'.")
+    return entries
+
+def _register_bulk(db: Session, company_id: str, items: List[dict], uploaded_by_id: str) -> List[DocumentResponse]:
+    """INSERT do lote e respostas montadas no threadpool: nenhum acesso ao ORM fica no event loop."""
+    rows = DocumentRepository.create_bulk(db, company_id, items, uploaded_by_id, _certificate_status())
+    return [_bulk_document_response(row) for row in rows]
+
+def _bulk_document_response(row) -> DocumentResponse:
+    if isinstance(row, Certificate):
+        return DocumentResponse(
+            id=row.id, filename=row.filename, status=row.status, created_at=row.created_at,
+            expiration_date=row.expiration_date, is_structured=True, type_id=row.type_id,
+            authentication_code=row.authentication_code
+        )
+    return DocumentResponse(
+        id=row.id, title=row.title, filename=row.filename, status=row.status,
+        created_at=row.created_at, expiration_date=row.expiration_date, is_structured=False
+    )
+
+def _download_filename(meta) -> str:
+    """Nome original do upload (o blob tem o hash como nome, sem extensão); sem ele, o nome no disco."""
+    return meta.filename or os.path.basename(meta.file_path)
+
+def _authorized_file(db: Session, item_id: str, current_user: Principal):
+    """Arquivo do item (legado ou certificado) + checagem de dono, numa única query."""
+    meta = DocumentRepository.get_file_path(db, item_id)
+    if not meta:
+        raise HTTPException(status_code=404, detail="Documento não encontrado")
+    if current_user.role != UserRole.ADMIN.value and not current_user.has_company(meta.company_id):
+        raise HTTPException(status_code=403, detail="Acesso negado a esta empresa.")
+    return meta
 
 # --- 3. DOWNLOAD UNIFICADO ---
 @router.get("/{item_id}/download")
 def download_document(
     item_id: str,
+    request: Request,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
-    # O repository agora descobre se é documento velho ou certificado novo
-    file_path = DocumentRepository.get_file_path(db, item_id)
-    
-    if not file_path:
-        raise HTTPException(status_code=404, detail="Documento não encontrado")
+    # O repository descobre se é documento velho ou certificado novo (e de qual empresa)
+    meta = _authorized_file(db, item_id, current_user)
+    filename = _download_filename(meta)
 
-    # (Lógica de segurança foi simplificada aqui para focar na entrega, em prod seria ideal 
-    # revalidar o ownership, mas o foco é que o arquivo exista fisicamente)
-    
-    if not os.path.exists(file_path):
+    try:
+        return download_response(
+            request, meta.file_path, filename, media_type=media_type_for(filename),
+            content_hash=meta.content_hash, last_modified=meta.created_at,
+        )
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Arquivo físico não encontrado no servidor.")
+    
+# --- 3.1 LINK DE DOWNLOAD ASSINADO ---
+@router.post("/{item_id}/download-url", response_model=SignedDownloadResponse)
+def create_download_url(
+    item_id: str,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """
+    Emite um link curto (DOWNLOAD_URL_TTL_SECONDS) para o visualizador de PDF.
+    As várias requisições que ele faz (Range, revalidação) não passam mais por JWT nem banco.
+    """
+    meta = _authorized_file(db, item_id, current_user)
+    # O token só leva o hash: vale para arquivos no blob store (o legado usa o download autenticado)
+    if not is_blob(meta.file_path) or meta.file_path != blob_path(meta.content_hash or ""):
+        raise HTTPException(status_code=409, detail="Arquivo ainda fora do armazenamento por conteúdo: use o download direto.")
 
-    # Pega só o nome final do arquivo para o FileResponse
-    filename = os.path.basename(file_path)
-
-    return FileResponse(
-        path=file_path,
-        filename=filename,
-        media_type='application/pdf'
+    token, expires_at = create_download_token(item_id, meta.content_hash, _download_filename(meta))
+    return SignedDownloadResponse(
+        url=request.app.url_path_for("download_signed", token=token), expires_at=expires_at
     )
+
+@router.get("/signed/{token}", name="download_signed")
+def download_signed(token: str, request: Request):
+    """Download pelo link assinado: valida o HMAC e serve o arquivo, sem sessão de banco."""
+    try:
+        grant = verify_download_token(token)
+    except ValueError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+
+    try:
+        return download_response(
+            request, blob_path(grant["h"]), grant["n"], media_type=media_type_for(grant["n"]), content_hash=grant["h"],
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Arquivo físico não encontrado no servidor.")
     
 # =================================================================
 # GESTÃO DO CATÁLOGO (CRUD Admin - Sprint 18)
 # =================================================================
 
-def verify_admin_access(current_user: User):
+def verify_admin_access(current_user: Principal):
     """Função auxiliar para garantir que apenas Admins mexem no catálogo."""
     if current_user.role != UserRole.ADMIN.value:
         raise HTTPException(status_code=403, detail="Acesso negado. Apenas administradores podem modificar o catálogo.")
@@ -152,7 +415,7 @@ def verify_admin_access(current_user: User):
 def create_category(
     cat_in: DocumentCategoryCreate, 
     db: Session = Depends(get_db), 
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     verify_admin_access(current_user)
     try:
@@ -165,7 +428,7 @@ def update_category(
     cat_id: str, 
     cat_in: DocumentCategoryUpdate, 
     db: Session = Depends(get_db), 
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     verify_admin_access(current_user)
     try:
@@ -177,7 +440,7 @@ def update_category(
 def delete_category(
     cat_id: str, 
     db: Session = Depends(get_db), 
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     verify_admin_access(current_user)
     try:
@@ -191,7 +454,7 @@ def delete_category(
 def create_document_type(
     type_in: DocumentTypeCreate, 
     db: Session = Depends(get_db), 
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     verify_admin_access(current_user)
     try:
@@ -204,7 +467,7 @@ def update_document_type(
     type_id: str, 
     type_in: DocumentTypeUpdate, 
     db: Session = Depends(get_db), 
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     verify_admin_access(current_user)
     try:
@@ -216,7 +479,7 @@ def update_document_type(
 def delete_document_type(
     type_id: str, 
     db: Session = Depends(get_db), 
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     verify_admin_access(current_user)
     try:
@@ -2,7 +2,7 @@ from typing import List
 from fastapi import APIRouter, Depends, status, HTTPException
 from sqlalchemy.orm import Session
 
-from app.dependencies import get_current_user
+from app.dependencies import get_current_db_user
 from app.core.database import get_db
 from app.models.user_model import User
 from app.schemas.user_schemas import UserResponse, UserUpdate
@@ -24,7 +24,7 @@ router = APIRouter(prefix="/users", tags=["Gestão de Usuários"])
     - Carregar dados básicos (Email, Empresa).
     """
 )
-def read_users_me(current_user: User = Depends(get_current_user)):
+def read_users_me(current_user: User = Depends(get_current_db_user)):
     """
     Retorna o objeto User completo (filtrado pelo Schema de Response).
     """
@@ -33,7 +33,7 @@ def read_users_me(current_user: User = Depends(get_current_user)):
 @router.patch("/me", response_model=UserResponse)
 def update_user_me(
     user_in: UserUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_db_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -53,14 +53,14 @@ def update_user_me(
     return current_user
 
 @router.get("/me/companies", response_model=List[CompanyWithRole])
-def read_my_companies(current_user: User = Depends(get_current_user)):
+def read_my_companies(current_user: User = Depends(get_current_db_user)):
     """
     Lista todas as empresas vinculadas ao usuário logado,
     incluindo o nível de acesso (role) em cada uma.
     """
     results = []
     
-    # O SQLAlchemy carrega 'company_links' automaticamente (Lazy Loading)
+    # 'company_links' e 'link.company' já vêm carregados (joinedload em get_current_db_user)
     for link in current_user.company_links:
         if link.is_active: 
             # Montamos o objeto de resposta mesclando dados da empresa + dados do link
@@ -14,6 +14,11 @@ class DocumentStatusEnum(str, Enum):
     PROCESSING = "processing" # Novo status da sprint 17
     ERROR = "error"
 
+class ExportFormatEnum(str, Enum):
+    """Formatos de exportação em streaming do Cofre."""
+    NDJSON = "ndjson" # Um JSON por linha
+    CSV = "csv"
+
 # --- SCHEMAS DE CATÁLOGO (Novo Sprint 17) ---
 class DocumentTypeResponse(BaseModel):
     id: str
@@ -72,4 +77,31 @@ class DocumentCategoryCreate(BaseModel):
 class DocumentCategoryUpdate(BaseModel):
     name: Optional[str] = None
     slug: Optional[str] = None
-    order: Optional[int] = None
\ No newline at end of file
+    order: Optional[int] = None
+
+class SignedDownloadResponse(BaseModel):
+    """Link temporário de download (dispensa o header Authorization)."""
+    url: str
+    expires_at: datetime
+
+# --- UPLOAD EM LOTE (Onboarding) ---
+class BulkManifestItem(BaseModel):
+    """Metadados de um arquivo do lote (mesma posição do arquivo no multipart)."""
+    filename: Optional[str] = Field(None, description="Se informado, precisa ser o nome do arquivo na mesma posição")
+    title: Optional[str] = Field(None, description="Título (só documentos legados, sem type_id)")
+    type_id: Optional[str] = Field(None, description="Tipo da certidão. Sem ele, vira documento legado")
+    expiration_date: Optional[date] = None
+    authentication_code: Optional[str] = None
+
+class BulkUploadItemResult(BaseModel):
+    index: int = Field(..., description="Posição do arquivo no envio")
+    filename: str
+    ok: bool
+    status_code: int = Field(..., description="201 se registrado; senão o código do erro deste arquivo")
+    detail: Optional[str] = None
+    document: Optional[DocumentResponse] = None
+
+class BulkUploadResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkUploadItemResult]
@@ -0,0 +1,73 @@
+"""
+Benchmark: Custo do Bcrypt x Logins por Segundo.
+Mede quantos verifies (o trabalho de CPU de um login) cada núcleo sustenta
+em cada nível de custo (BCRYPT_ROUNDS), para dimensionar os nós de autenticação.
+
+Como rodar:
+python -m app.scripts.benchmark_password_hashing
+python -m app.scripts.benchmark_password_hashing --rounds 10 11 12 13 --seconds 3 --processes 4
+
+Com --processes > 1, cada processo mede em paralelo e o relatório mostra
+o total agregado e a média por núcleo (revela perda por turbo/SMT).
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+# Adiciona o diretório raiz ao path
+sys.path.append(os.getcwd())
+
+from passlib.context import CryptContext
+
+DEFAULT_ROUNDS = [10, 11, 12, 13, 14]
+PASSWORD = "senha_de_benchmark_123"
+
+
+def make_context(rounds: int) -> CryptContext:
+    """Mesma configuração de app/core/security.py, só que com o custo fixado."""
+    return CryptContext(
+        schemes=["bcrypt"], deprecated="auto",
+        bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds, bcrypt__max_rounds=rounds,
+    )
+
+
+def measure(args) -> tuple:
+    """Roda verifies por `seconds` segundos. Retorna (verifies, segundos_reais)."""
+    rounds, seconds = args
+    context = make_context(rounds)
+    hashed = context.hash(PASSWORD)
+    count = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while True:
+        context.verify(PASSWORD, hashed)
+        count += 1
+        if time.perf_counter() >= deadline:
+            break
+    return count, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, nargs="+", default=DEFAULT_ROUNDS)
+    parser.add_argument("--seconds", type=float, default=2.0, help="Duração da medição por nível de custo")
+    parser.add_argument("--processes", type=int, default=1, help="Processos em paralelo (1 por núcleo)")
+    args = parser.parse_args()
+
+    print(f"Núcleos disponíveis: {os.cpu_count()} | processos: {args.processes}")
+    print(f"{'rounds':>6} {'ms/login':>10} {'logins/s/núcleo':>16} {'logins/s total':>15}")
+
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(processes=args.processes) as pool:
+        for rounds in args.rounds:
+            results = pool.map(measure, [(rounds, args.seconds)] * args.processes)
+            per_core = [count / elapsed for count, elapsed in results]
+            total = sum(per_core)
+            avg = total / len(per_core)
+            print(f"{rounds:>6} {1000 / avg:>10.1f} {avg:>16.1f} {total:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark: Leitura de Certidões x Páginas por Segundo.
+Gera um corpus de certidões sintéticas (app/utils/sample_certidao.py) e mede a vazão
+do pool de extração com 1, 2, 4... workers, para conferir que escala com os núcleos.
+
+Como rodar:
+python -m app.scripts.benchmark_pdf_extraction
+python -m app.scripts.benchmark_pdf_extraction --count 400 --extra-pages 3 --workers 1 2 4 8
+
+'por worker' = páginas/s dividido pelos workers: se cair muito com mais workers,
+o gargalo deixou de ser CPU (disco, memória, núcleos SMT). --executor thread mostra
+o efeito do GIL (a vazão total para de crescer).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Adiciona o diretório raiz ao path
+sys.path.append(os.getcwd())
+
+from app.core.pdf_extractor import PdfExtractorPool, PDF_EXTRACTION_MAX_PAGES
+from app.utils.sample_certidao import sample_corpus
+
+
+def default_levels() -> list:
+    levels, workers = [], 1
+    while workers < (os.cpu_count() or 1):
+        levels.append(workers)
+        workers *= 2
+    return levels + [os.cpu_count() or 1]
+
+
+def measure(corpus: list, workers: int, executor_kind: str, max_pages: int) -> dict:
+    pool = PdfExtractorPool(workers=workers, executor_kind=executor_kind)
+    try:
+        pool.run(corpus[:workers], max_pages) # Aquece (sobe os processos e importa o pypdf)
+        started = time.perf_counter()
+        outcomes = pool.run(corpus, max_pages)
+        elapsed = time.perf_counter() - started
+    finally:
+        pool.shutdown()
+
+    pages = sum(result["pages"] for result, _ in outcomes if result)
+    errors = sum(1 for _, error in outcomes if error)
+    parsed = sum(1 for result, _ in outcomes if result and result["fields"]["expiration_date"])
+    return {
+        "workers": workers,
+        "pdfs": len(corpus),
+        "pages": pages,
+        "errors": errors,
+        "parsed": parsed,
+        "seconds": round(elapsed, 3),
+        "pages_per_second": round(pages / elapsed, 1),
+        "pages_per_second_per_worker": round(pages / elapsed / workers, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=200, help="Certidões no corpus")
+    parser.add_argument("--extra-pages", type=int, default=1, help="Páginas de anexo por certidão")
+    parser.add_argument("--max-pages", type=int, default=PDF_EXTRACTION_MAX_PAGES, help="Páginas lidas no máximo por PDF")
+    parser.add_argument("--workers", type=int, nargs="+", default=default_levels())
+    parser.add_argument("--executor", choices=["process", "thread"], default="process")
+    args = parser.parse_args()
+
+    corpus = sample_corpus(args.count, extra_pages=args.extra_pages)
+    print(f"Núcleos disponíveis: {os.cpu_count()} | corpus: {len(corpus)} PDFs | executor: {args.executor}")
+    print(f"{'workers':>7} {'páginas/s':>10} {'por worker':>11} {'segundos':>9} {'lidas':>6} {'erros':>6}")
+
+    results = []
+    for workers in args.workers:
+        row = measure(corpus, workers, args.executor, args.max_pages)
+        results.append(row)
+        print(
+            f"{workers:>7} {row['pages_per_second']:>10.1f} {row['pages_per_second_per_worker']:>11.1f} "
+            f"{row['seconds']:>9.3f} {row['parsed']:>6} {row['errors']:>6}"
+        )
+    print(json.dumps(results, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Benchmark: Listagem Unificada do Cofre (ORM + merge em Python vs UNION ALL no banco).
+Compara a estratégia antiga de `get_unified_by_company` (duas queries ORM com
+joinedload, um dict por linha e sort em Python) com a nova (um único SELECT
+UNION ALL ordenado no SQL, sem identity map).
+
+Como rodar:
+python -m app.scripts.benchmark_unified_listing
+python -m app.scripts.benchmark_unified_listing --sizes 10000 100000 --url postgresql://...
+
+Sem --url, usa um SQLite temporário (descartado ao final).
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+# Adiciona o diretório raiz ao path
+sys.path.append(os.getcwd())
+
+from sqlalchemy import create_engine, insert, delete
+from sqlalchemy.orm import sessionmaker, joinedload
+
+from app.core.database import Base
+from app.models.company_model import Company
+from app.models.document_model import Document
+from app.models.certificate_model import Certificate
+from app.models.document_category_model import DocumentCategory
+from app.models.document_type_model import DocumentType
+from app.models.user_model import User  # noqa: F401 (registra o mapper)
+from app.repositories.document_repository import DocumentRepository
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+BATCH = 10_000
+
+
+def orm_merge_strategy(db, company_id):
+    """Réplica fiel da implementação anterior (baseline do benchmark)."""
+    unified_list = []
+    for doc in db.query(Document).filter(Document.company_id == company_id).all():
+        unified_list.append({
+            "id": doc.id, "title": doc.title or "Documento Legado", "filename": doc.filename,
+            "expiration_date": doc.expiration_date, "status": doc.status, "created_at": doc.created_at,
+            "is_structured": False, "type_id": None, "category_id": None, "type_name": None,
+            "category_name": None, "authentication_code": None,
+        })
+
+    certificates = db.query(Certificate)\
+        .options(joinedload(Certificate.document_type).joinedload(DocumentType.category))\
+        .filter(Certificate.company_id == company_id).all()
+    for cert in certificates:
+        unified_list.append({
+            "id": cert.id,
+            "title": cert.document_type.name if cert.document_type else "Certidão",
+            "filename": cert.filename, "expiration_date": cert.expiration_date,
+            "status": cert.status, "created_at": cert.created_at, "is_structured": True,
+            "type_id": cert.type_id,
+            "category_id": cert.document_type.category_id if cert.document_type else None,
+            "type_name": cert.document_type.name if cert.document_type else None,
+            "category_name": cert.document_type.category.name if cert.document_type and cert.document_type.category else None,
+            "authentication_code": cert.authentication_code,
+        })
+
+    unified_list.sort(key=lambda x: x["created_at"], reverse=True)
+    return unified_list
+
+
+def seed(engine, company_id, type_id, total):
+    """Insere `total` itens (metade legado, metade certidões) em lotes via executemany."""
+    base_ts = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(delete(Certificate).where(Certificate.company_id == company_id))
+        conn.execute(delete(Document).where(Document.company_id == company_id))
+
+        for start in range(0, total, BATCH):
+            docs, certs = [], []
+            for i in range(start, min(start + BATCH, total)):
+                row = {
+                    "id": str(uuid.uuid4()), "company_id": company_id,
+                    "filename": f"arquivo_{i}.pdf", "file_path": f"storage/uploads/{i}.pdf",
+                    "expiration_date": date(2025, 1, 1) + timedelta(days=i % 365),
+                    "status": "valid", "created_at": base_ts + timedelta(seconds=i),
+                }
+                if i % 2:
+                    certs.append({**row, "type_id": type_id, "authentication_code": f"AUTH{i}"})
+                else:
+                    docs.append({**row, "title": f"Documento {i}"})
+            if docs:
+                conn.execute(insert(Document), docs)
+            if certs:
+                conn.execute(insert(Certificate), certs)
+
+
+def timed(label, fn, repeat):
+    best = float("inf")
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = len(fn())
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<22} {best * 1000:>10.1f} ms  ({rows} linhas, {rows / best:,.0f} linhas/s)")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--url", default=None, help="URL do banco (padrão: SQLite temporário)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tmp_dir = None
+    url = args.url
+    if not url:
+        tmp_dir = tempfile.mkdtemp(prefix="licitadoc_bench_")
+        url = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    with Session() as db:
+        company = Company(cnpj=f"{uuid.uuid4().int % 10**14:014d}", razao_social="Benchmark S.A.")
+        category = DocumentCategory(name="Bench", slug=f"bench-{uuid.uuid4().hex[:8]}")
+        db.add_all([company, category])
+        db.flush()
+        doc_type = DocumentType(name="CND Bench", slug=f"cnd-{uuid.uuid4().hex[:8]}", category_id=category.id)
+        db.add(doc_type)
+        db.commit()
+        company_id, type_id = company.id, doc_type.id
+
+    print(f"Banco: {engine.url.render_as_string(hide_password=True)}")
+    for size in args.sizes:
+        print(f"\n== {size:,} itens ==")
+        seed(engine, company_id, type_id, size)
+
+        def run_old():
+            with Session() as db:
+                return orm_merge_strategy(db, company_id)
+
+        def run_new():
+            with Session() as db:
+                return DocumentRepository.get_unified_by_company(db, company_id)
+
+        old = timed("ORM + sort Python", run_old, args.repeat)
+        new = timed("UNION ALL (SQL)", run_new, args.repeat)
+        print(f"  speedup: {old / new:.2f}x")
+
+    engine.dispose()
+    if tmp_dir:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
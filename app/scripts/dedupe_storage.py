@@ -0,0 +1,47 @@
+"""
+Migração: Deduplica o Storage Existente (Blob Store Endereçado por Conteúdo).
+Move os arquivos antigos (nomes UUID) para 'storage/blobs/ab/cd/<sha256>',
+aponta documents/certificates para o blob e apaga as cópias duplicadas.
+No fim imprime o relatório da execução e a economia total do blob store.
+
+Como rodar (a partir da raiz do projeto, onde ficam 'storage/' e 'uploads/'):
+python -m app.scripts.dedupe_storage --dry-run     # só mede quanto seria economizado
+python -m app.scripts.dedupe_storage
+python -m app.scripts.dedupe_storage --batch-size 1000
+
+Pode ser interrompido e rodado de novo: retoma das linhas que ainda não apontam para blobs.
+"""
+import argparse
+import json
+import os
+import sys
+
+# Adiciona o diretório raiz ao path
+sys.path.append(os.getcwd())
+
+from app.core.database import SessionLocal
+from app.models import user_model, company_model, document_model, document_category_model, document_type_model, certificate_model  # noqa: F401
+from app.repositories.blob_repository import BlobRepository
+from app.services.storage_dedupe_service import StorageDedupeService, STORAGE_DEDUPE_BATCH_SIZE
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=STORAGE_DEDUPE_BATCH_SIZE, help="Linhas por lote/commit")
+    parser.add_argument("--dry-run", action="store_true", help="Só calcula, sem mover arquivos nem alterar o banco")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        report = StorageDedupeService.dedupe_existing(db, batch_size=args.batch_size, dry_run=args.dry_run)
+        print(json.dumps({"run": report.as_dict(), "storage": BlobRepository.storage_report(db)}, ensure_ascii=False))
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Erro na deduplicação: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Enfileira um Job (cron / manutenção manual).
+A chave de idempotência evita duplicatas quando o cron dispara duas vezes
+(ou em dois nós): a mesma chave devolve o job já existente.
+
+Como rodar:
+python -m app.scripts.enqueue_job status.refresh --key status.refresh:$(date +%F)
+python -m app.scripts.enqueue_job vault_stats.rebuild
+python -m app.scripts.enqueue_job certificate.extract --payload '{"certificate_ids": ["<uuid>"]}' --priority 10
+"""
+import argparse
+import json
+import os
+import sys
+
+# Adiciona o diretório raiz ao path
+sys.path.append(os.getcwd())
+
+from app.core.database import SessionLocal
+from app.core.job_queue import registered_types
+from app.models import user_model, company_model, document_model, document_category_model, document_type_model, certificate_model, job_model  # noqa: F401
+from app.repositories.job_repository import JobRepository, JOB_MAX_ATTEMPTS
+from app.services import job_handlers  # noqa: F401  (registra os tipos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("job_type", choices=registered_types())
+    parser.add_argument("--payload", type=json.loads, default={}, help="JSON com os parâmetros do job")
+    parser.add_argument("--priority", type=int, default=job_handlers.PRIORITY_MAINTENANCE, help="Maior = antes")
+    parser.add_argument("--key", help="Chave de idempotência")
+    parser.add_argument("--max-attempts", type=int, default=JOB_MAX_ATTEMPTS)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        job = JobRepository.enqueue(
+            db, args.job_type, args.payload, priority=args.priority,
+            idempotency_key=args.key, max_attempts=args.max_attempts,
+        )
+        print(json.dumps({"id": job.id, "job_type": job.job_type, "status": job.status, "attempts": job.attempts}, ensure_ascii=False))
+    except ValueError as e:
+        print(f"❌ Erro ao enfileirar: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Varredura: Lê as Certidões Pendentes (status 'processing').
+Normalmente a leitura roda em segundo plano logo após o upload; este script pega
+o que ficou para trás (servidor reiniciado no meio, PDF_EXTRACTION_ENABLED ligado
+depois dos uploads, certidões marcadas de volta como 'processing' para reler).
+
+Como rodar:
+python -m app.scripts.extract_certificates
+python -m app.scripts.extract_certificates --batch-size 64 --workers 8
+
+Imprime o relatório da execução e as métricas do pool de extração.
+"""
+import argparse
+import json
+import os
+import sys
+
+# Adiciona o diretório raiz ao path
+sys.path.append(os.getcwd())
+
+from app.core.database import SessionLocal
+from app.core.pdf_extractor import PdfExtractorPool, PDF_EXTRACTION_WORKERS
+from app.models import user_model, company_model, document_model, document_category_model, document_type_model, certificate_model  # noqa: F401
+from app.services.certificate_extraction_service import CertificateExtractionService, PDF_EXTRACTION_BATCH_SIZE
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=PDF_EXTRACTION_BATCH_SIZE, help="Certidões por lote/commit")
+    parser.add_argument("--workers", type=int, default=PDF_EXTRACTION_WORKERS, help="Processos de extração")
+    args = parser.parse_args()
+
+    pool = PdfExtractorPool(workers=args.workers)
+    db = SessionLocal()
+    try:
+        report = CertificateExtractionService.process_pending(db, batch_size=args.batch_size, pool=pool)
+        print(json.dumps({"run": report.as_dict(), "pool": pool.stats()}, ensure_ascii=False))
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Erro na leitura das certidões: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Teste de Carga: Teto de Concorrência das Rotas.
+Dispara N requisições simultâneas contra uma API já rodando e mede vazão,
+latência (p50/p95/max) e erros para cada nível de concorrência.
+
+Serve para comparar o antes/depois das rotas async (AsyncSession): com rotas
+síncronas o teto é o threadpool do AnyIO (40 threads) somado ao pool do banco;
+com as rotas async, o loop atende as requisições e só o pool do banco limita.
+
+Como rodar (API de pé, ex: uvicorn app.main:app --workers 1):
+python -m app.scripts.load_test_concurrency --token <JWT> --path "/documents/?company_id=<ID>"
+python -m app.scripts.load_test_concurrency --path /dashboard/client/stats --token <JWT> --concurrency 10 50 200 --requests 2000
+
+Para o "antes", rode o mesmo comando com a API no commit anterior às rotas async.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+
+# Adiciona o diretório raiz ao path
+sys.path.append(os.getcwd())
+
+DEFAULT_CONCURRENCY = [10, 50, 100, 200]
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_level(client: httpx.AsyncClient, path: str, concurrency: int, total: int) -> dict:
+    """Mantém 'concurrency' requisições em voo até completar 'total'."""
+    latencies, errors, statuses = [], 0, {}
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                response = await client.get(path)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+                statuses["exception"] = statuses.get("exception", 0) + 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "req_per_sec": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "max_ms": round(max(latencies, default=0), 1),
+        "errors": errors,
+        "statuses": {str(code): count for code, count in statuses.items()},
+    }
+
+
+async def main(args) -> list:
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    # Limites do cliente acima do maior nível: o gargalo medido precisa ser o servidor
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, limits=limits, timeout=args.timeout) as client:
+        await client.get(args.path)  # aquecimento (conexões, cache de autenticação)
+        results = []
+        for level in args.concurrency:
+            result = await run_level(client, args.path, level, args.requests)
+            results.append(result)
+            print(json.dumps(result))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mede o teto de concorrência de uma rota da API.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", default="/dashboard/client/stats", help="Rota GET a ser testada.")
+    parser.add_argument("--token", default=os.getenv("LOAD_TEST_TOKEN"), help="JWT (Bearer). Padrão: $LOAD_TEST_TOKEN.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--requests", type=int, default=1000, help="Requisições por nível de concorrência.")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,45 @@
+"""
+Reconciliação: Reconstrói a tabela company_vault_stats a partir do Cofre.
+A tabela é mantida incrementalmente a cada flush; este script recalcula tudo em lote
+(um INSERT ... SELECT agrupado com ON CONFLICT DO UPDATE) para corrigir qualquer divergência,
+ex: após cargas feitas direto no banco.
+
+Como rodar:
+python -m app.scripts.rebuild_vault_stats
+python -m app.scripts.rebuild_vault_stats --company-id <uuid> [--company-id <uuid> ...]
+"""
+import argparse
+import os
+import sys
+
+# Adiciona o diretório raiz ao path
+sys.path.append(os.getcwd())
+
+from app.core.database import SessionLocal
+from app.models import user_model, company_model, document_model, document_category_model, document_type_model, certificate_model  # noqa: F401
+from app.repositories.vault_stats_repository import VaultStatsRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--company-id", action="append", dest="company_ids", help="Reconstrói só estas empresas")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.company_ids:
+            rows = VaultStatsRepository.recompute(db, args.company_ids)
+        else:
+            rows = VaultStatsRepository.rebuild(db)
+        db.commit()
+        print(f"✅ company_vault_stats reconstruída: {rows} empresa(s) com itens no cofre.")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Erro ao reconstruir: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Job: Recalcula o status de vencimento de todo o Cofre (documentos + certidões).
+Aplica a janela de alerta (EXPIRATION_WARNING_DAYS) com UPDATEs set-based em lotes
+e imprime linhas alteradas e tempo gasto.
+
+Como rodar:
+python -m app.scripts.refresh_document_status
+python -m app.scripts.refresh_document_status --warning-days 15 --chunk-size 10000
+python -m app.scripts.refresh_document_status --every 3600   # agendado: roda a cada hora
+
+Em produção, prefira o cron do sistema (ex: '5 0 * * *') chamando a primeira forma.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date
+
+# Adiciona o diretório raiz ao path
+sys.path.append(os.getcwd())
+
+from app.core.database import SessionLocal
+from app.models import user_model, company_model, document_model, document_category_model, document_type_model, certificate_model  # noqa: F401
+from app.services.status_refresh_service import (
+    StatusRefreshService, EXPIRATION_WARNING_DAYS, STATUS_REFRESH_CHUNK_SIZE
+)
+
+
+def run_once(args) -> None:
+    db = SessionLocal()
+    try:
+        report = StatusRefreshService.refresh_all(
+            db,
+            today=date.fromisoformat(args.today) if args.today else None,
+            warning_days=args.warning_days,
+            chunk_size=args.chunk_size,
+        )
+        print(json.dumps(report.as_dict(), ensure_ascii=False))
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Erro ao recalcular status: {e}")
+        raise
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--warning-days", type=int, default=EXPIRATION_WARNING_DAYS, help="Janela de alerta em dias")
+    parser.add_argument("--chunk-size", type=int, default=STATUS_REFRESH_CHUNK_SIZE, help="Linhas por lote/commit")
+    parser.add_argument("--today", help="Data de referência (AAAA-MM-DD), útil para reprocessar")
+    parser.add_argument("--every", type=float, default=0, help="Repete a cada N segundos (0 = roda uma vez)")
+    args = parser.parse_args()
+
+    if args.every <= 0:
+        try:
+            run_once(args)
+        except Exception:
+            sys.exit(1)
+        return
+
+    while True:
+        try:
+            run_once(args)
+        except Exception:
+            pass # Já logado; tenta de novo no próximo ciclo
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Worker da Fila de Jobs (tabela 'jobs', sem Redis/broker).
+Consome os jobs enfileirados pela API (leitura de certidões pós-upload, GC dos arquivos
+soltos por exclusões e uploads desfeitos) e pelo cron (python -m app.scripts.enqueue_job). Para escalar, suba mais processos: a reserva
+pelo banco garante que cada job roda em um worker só.
+
+Como rodar:
+python -m app.scripts.run_worker
+python -m app.scripts.run_worker --types certificate.extract --batch-size 20
+python -m app.scripts.run_worker --drain     # processa o que houver na fila e sai
+
+Para com SIGTERM/Ctrl+C depois do job em andamento e imprime as métricas por tipo.
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+
+# Adiciona o diretório raiz ao path
+sys.path.append(os.getcwd())
+
+from app.core.job_queue import JobWorker, JOB_WORKER_BATCH_SIZE, JOB_WORKER_POLL_INTERVAL, registered_types
+from app.core.pdf_extractor import pdf_extractor
+from app.models import user_model, company_model, document_model, document_category_model, document_type_model, certificate_model, job_model  # noqa: F401
+from app.repositories.job_repository import JOB_LEASE_SECONDS
+from app.services import job_handlers  # noqa: F401  (registra os tipos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--types", nargs="+", choices=registered_types(), help="Só estes tipos de job (padrão: todos)")
+    parser.add_argument("--batch-size", type=int, default=JOB_WORKER_BATCH_SIZE, help="Jobs reservados por ciclo")
+    parser.add_argument("--poll-interval", type=float, default=JOB_WORKER_POLL_INTERVAL, help="Espera com a fila vazia (s)")
+    parser.add_argument("--lease-seconds", type=int, default=JOB_LEASE_SECONDS, help="Reserva de cada job")
+    parser.add_argument("--max-jobs", type=int, help="Sai depois de processar N jobs")
+    parser.add_argument("--drain", action="store_true", help="Sai quando a fila esvaziar")
+    args = parser.parse_args()
+
+    worker = JobWorker(
+        job_types=args.types, batch_size=args.batch_size,
+        poll_interval=args.poll_interval, lease_seconds=args.lease_seconds,
+    )
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: worker.stop())
+
+    print(f"⚙️ Worker {worker.worker_id} | tipos: {', '.join(args.types or registered_types())}")
+    try:
+        worker.run(max_jobs=args.max_jobs, stop_when_idle=args.drain)
+    except Exception as e:
+        print(f"❌ Erro no worker: {e}")
+        sys.exit(1)
+    finally:
+        pdf_extractor.shutdown()
+        print(json.dumps(worker.stats(), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Service de Leitura das Certidões (PROCESSING -> valid/warning/expired | error).
+Pega as certidões em 'processing', manda os PDFs para o pool de extração
+(app/core/pdf_extractor.py) em lotes e grava o resultado:
+
+- colunas tipadas (issue_date, expiration_date, authentication_code) só quando
+  estão vazias: o que o admin digitou no upload tem prioridade sobre o robô;
+- metadata_info['extraction'] com tudo que foi lido (CNPJs, páginas, datas);
+- status pelo vencimento (classify_status), ou 'error' quando o PDF não tem texto
+  (escaneado), não abre, ou traz um CNPJ que não é o da empresa dona.
+
+Roda em segundo plano logo após o upload (extract_in_background) e pelo script
+app/scripts/extract_certificates.py, que varre o que tiver ficado para trás.
+"""
+import os
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy.orm import Session, joinedload
+
+from app.core import storage
+from app.core.database import SessionLocal
+from app.core.pdf_extractor import PdfExtractorPool, pdf_extractor
+from app.models.certificate_model import Certificate, CertificateStatus
+from app.utils.status_classifier import classify_status
+
+PDF_EXTRACTION_ENABLED = os.getenv("PDF_EXTRACTION_ENABLED", "true").lower() in ("1", "true", "yes")
+PDF_EXTRACTION_BATCH_SIZE = int(os.getenv("PDF_EXTRACTION_BATCH_SIZE", "32"))
+
+
+@dataclass
+class ExtractionReport:
+    """Resultado de uma execução."""
+    processed: int = 0
+    extracted: int = 0
+    errors: int = 0
+    pages: int = 0
+    elapsed_seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "processed": self.processed,
+            "extracted": self.extracted,
+            "errors": self.errors,
+            "pages": self.pages,
+            "pages_per_second": round(self.pages / self.elapsed_seconds, 1) if self.elapsed_seconds else 0.0,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+        }
+
+
+class CertificateExtractionService:
+
+    @staticmethod
+    def process_pending(
+        db: Session,
+        batch_size: int = PDF_EXTRACTION_BATCH_SIZE,
+        pool: Optional[PdfExtractorPool] = None,
+        today: Optional[date] = None,
+    ) -> ExtractionReport:
+        """Processa todas as certidões em 'processing', em lotes (um commit por lote)."""
+        if batch_size <= 0:
+            raise ValueError("batch_size deve ser maior que zero.")
+        report = ExtractionReport()
+        started = time.perf_counter()
+        last_id = ""
+        while True:
+            batch = db.query(Certificate)\
+                .options(joinedload(Certificate.company))\
+                .filter(Certificate.status == CertificateStatus.PROCESSING.value, Certificate.id > last_id)\
+                .order_by(Certificate.id)\
+                .limit(batch_size)\
+                .all()
+            if not batch:
+                break
+            last_id = batch[-1].id
+            CertificateExtractionService._process_batch(db, batch, pool or pdf_extractor, report, today)
+        report.elapsed_seconds = time.perf_counter() - started
+        return report
+
+    @staticmethod
+    def process_ids(
+        db: Session, certificate_ids: List[str], pool: Optional[PdfExtractorPool] = None, today: Optional[date] = None
+    ) -> ExtractionReport:
+        """Processa certidões específicas (as recém-enviadas), se ainda estiverem em 'processing'."""
+        report = ExtractionReport()
+        started = time.perf_counter()
+        batch = db.query(Certificate)\
+            .options(joinedload(Certificate.company))\
+            .filter(Certificate.id.in_(certificate_ids), Certificate.status == CertificateStatus.PROCESSING.value)\
+            .all()
+        if batch:
+            CertificateExtractionService._process_batch(db, batch, pool or pdf_extractor, report, today)
+        report.elapsed_seconds = time.perf_counter() - started
+        return report
+
+    @staticmethod
+    def _process_batch(db: Session, batch: List[Certificate], pool: PdfExtractorPool, report: ExtractionReport, today: Optional[date]) -> None:
+        # Disco local: o worker abre o arquivo pelo caminho. S3: os bytes vão para o worker.
+        backend = storage.get_backend()
+        sources, outcomes = [], {}
+        for cert in batch:
+            local = backend.local_path(cert.file_path)
+            try:
+                sources.append((cert, local if local is not None else b"".join(backend.get_stream(cert.file_path))))
+            except FileNotFoundError:
+                outcomes[cert.id] = (None, "Arquivo não encontrado no storage.")
+
+        for (cert, _), outcome in zip(sources, pool.run([source for _, source in sources])):
+            outcomes[cert.id] = outcome
+
+        for cert in batch:
+            result, error = outcomes[cert.id]
+            CertificateExtractionService._apply(cert, result, error, today)
+            report.processed += 1
+            report.pages += result["pages"] if result else 0
+            if cert.status == CertificateStatus.ERROR.value:
+                report.errors += 1
+            else:
+                report.extracted += 1
+        db.commit()
+
+    @staticmethod
+    def _apply(cert: Certificate, result: Optional[dict], error: Optional[str], today: Optional[date]) -> None:
+        extraction = {"extracted_at": datetime.now(timezone.utc).isoformat()}
+        if error is None and not result["chars"]:
+            error = "PDF sem texto (provavelmente escaneado)."
+
+        if error is None:
+            fields = result["fields"]
+            extraction.update({
+                "pages": result["pages"],
+                "total_pages": result["total_pages"],
+                "issue_date": _iso(fields["issue_date"]),
+                "expiration_date": _iso(fields["expiration_date"]),
+                "validity_days": fields["validity_days"],
+                "cnpj": fields["cnpj"],
+                "cnpjs": fields["cnpjs"],
+                "authentication_code": fields["authentication_code"],
+            })
+            company_cnpj = cert.company.cnpj if cert.company else None
+            if fields["cnpjs"] and company_cnpj and company_cnpj not in fields["cnpjs"]:
+                error = "CNPJ da certidão não confere com o da empresa."
+
+        if error is not None:
+            extraction["error"] = error
+            cert.status = CertificateStatus.ERROR.value
+        else:
+            cert.issue_date = cert.issue_date or fields["issue_date"]
+            cert.expiration_date = cert.expiration_date or fields["expiration_date"]
+            cert.authentication_code = cert.authentication_code or fields["authentication_code"]
+            cert.status = classify_status(cert.expiration_date, today)
+
+        # Novo dict (o JSON não rastreia mutação in-place)
+        cert.metadata_info = {**(cert.metadata_info or {}), "extraction": extraction}
+
+
+def _iso(value: Optional[date]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def extract_in_background(certificate_ids: List[str]) -> None:
+    """
+    Tarefa de segundo plano do upload: sessão própria (a da requisição já fechou).
+    Falhas ficam em 'processing' e são retomadas pelo script de varredura.
+    """
+    db = SessionLocal()
+    try:
+        CertificateExtractionService.process_ids(db, certificate_ids)
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Erro na leitura das certidões {certificate_ids}: {e}")
+    finally:
+        db.close()
@@ -0,0 +1,68 @@
+"""
+Handlers da Fila de Jobs (o que cada tipo de job executa).
+Importar este módulo registra os tipos no worker (app/core/job_queue.py).
+Todos são seguros para repetir: um retry depois de uma falha parcial só refaz
+o que ainda falta (certidões ainda em 'processing', status ainda fora da faixa...).
+
+Tipos:
+- certificate.extract   {"certificate_ids": [...]} (vazio = todas as pendentes)
+- status.refresh        {"today": "AAAA-MM-DD"} (opcional)
+- vault_stats.rebuild   {"company_ids": [...]} (vazio = reconciliação total)
+- storage.dedupe        {"dry_run": false, "batch_size": 500}
+- storage.gc            {"file_paths": [...]} (agendado por BlobRepository.schedule_release)
+"""
+from datetime import date
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.job_queue import job_handler
+from app.repositories.blob_repository import BlobRepository, STORAGE_GC_JOB
+from app.repositories.vault_stats_repository import VaultStatsRepository
+from app.services.certificate_extraction_service import CertificateExtractionService
+from app.services.status_refresh_service import StatusRefreshService
+from app.services.storage_dedupe_service import StorageDedupeService, STORAGE_DEDUPE_BATCH_SIZE
+
+CERTIFICATE_EXTRACT = "certificate.extract"
+STATUS_REFRESH = "status.refresh"
+VAULT_STATS_REBUILD = "vault_stats.rebuild"
+STORAGE_DEDUPE = "storage.dedupe"
+STORAGE_GC = STORAGE_GC_JOB
+
+# Prioridades (maior = antes): o que o usuário acabou de enviar passa na frente das manutenções
+PRIORITY_UPLOAD = 10
+PRIORITY_MAINTENANCE = 0
+
+
+@job_handler(CERTIFICATE_EXTRACT)
+def extract_certificates(db: Session, payload: dict) -> Optional[dict]:
+    ids = payload.get("certificate_ids")
+    if ids:
+        return CertificateExtractionService.process_ids(db, ids).as_dict()
+    return CertificateExtractionService.process_pending(db).as_dict()
+
+
+@job_handler(STATUS_REFRESH)
+def refresh_status(db: Session, payload: dict) -> Optional[dict]:
+    today = date.fromisoformat(payload["today"]) if payload.get("today") else None
+    return StatusRefreshService.refresh_all(db, today=today).as_dict()
+
+
+@job_handler(VAULT_STATS_REBUILD)
+def rebuild_vault_stats(db: Session, payload: dict) -> Optional[dict]:
+    company_ids = payload.get("company_ids")
+    rows = VaultStatsRepository.recompute(db, company_ids) if company_ids else VaultStatsRepository.rebuild(db)
+    return {"companies": rows}
+
+
+@job_handler(STORAGE_DEDUPE)
+def dedupe_storage(db: Session, payload: dict) -> Optional[dict]:
+    report = StorageDedupeService.dedupe_existing(
+        db, batch_size=payload.get("batch_size", STORAGE_DEDUPE_BATCH_SIZE), dry_run=payload.get("dry_run", False)
+    )
+    return report.as_dict()
+
+
+@job_handler(STORAGE_GC)
+def collect_orphan_files(db: Session, payload: dict) -> Optional[dict]:
+    return {"removed": BlobRepository.collect(db, payload.get("file_paths") or [])}
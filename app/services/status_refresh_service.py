@@ -0,0 +1,121 @@
+"""
+Service de Atualização de Status (Vencimentos).
+Recalcula em lote o status (valid/warning/expired) de 'documents' e 'certificates'
+a partir do vencimento efetivo (o mesmo da leitura: expiration_date ou, em certidões,
+emissão + validade padrão do Tipo) e da janela de alerta (EXPIRATION_WARNING_DAYS).
+É esse status persistido que alimenta os contadores da company_vault_stats (painel).
+
+Estratégia set-based: para cada status alvo, lotes de chunk_size ids em ordem
+(keyset: id > último id do lote anterior, nada é relido) filtrados por faixas de data
+nas colunas indexadas (indexed_expiration_range), UPDATE por id e commit por lote.
+A company_vault_stats recebe só os deltas do lote (status antigo -> alvo, por empresa),
+sem reagregar o cofre. Transações curtas = nenhuma empresa fica bloqueada enquanto
+o job varre milhões de linhas.
+Itens em 'processing'/'error' ou sem vencimento efetivo não são tocados.
+"""
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.models.document_model import Document, DocumentStatus
+from app.models.certificate_model import Certificate
+from app.models.document_type_model import DocumentType
+from app.repositories.vault_stats_repository import VaultStatsRepository
+from app.utils.status_classifier import EXPIRATION_WARNING_DAYS, MANAGED_STATUSES, indexed_expiration_range
+
+STATUS_REFRESH_CHUNK_SIZE = int(os.getenv("STATUS_REFRESH_CHUNK_SIZE", "5000"))
+
+
+@dataclass
+class RefreshReport:
+    """Resultado de uma execução: linhas alteradas por tabela/status e tempo gasto."""
+    today: date
+    warning_days: int
+    changed: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    chunks: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def rows_changed(self) -> int:
+        return sum(sum(by_status.values()) for by_status in self.changed.values())
+
+    def as_dict(self) -> dict:
+        return {
+            "today": self.today.isoformat(),
+            "warning_days": self.warning_days,
+            "rows_changed": self.rows_changed,
+            "changed": self.changed,
+            "chunks": self.chunks,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+        }
+
+
+class StatusRefreshService:
+
+    @staticmethod
+    def refresh_all(
+        db: Session,
+        today: Optional[date] = None,
+        warning_days: int = EXPIRATION_WARNING_DAYS,
+        chunk_size: int = STATUS_REFRESH_CHUNK_SIZE,
+    ) -> RefreshReport:
+        """
+        Varre as duas tabelas e corrige o status de tudo que mudou de faixa.
+        Cada lote: SELECT ... FOR UPDATE dos próximos ids fora do status alvo (ORDER BY id LIMIT)
+        -> UPDATE por id -> deltas na company_vault_stats das empresas do lote -> COMMIT.
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size deve ser maior que zero.")
+
+        report = RefreshReport(today=today or date.today(), warning_days=warning_days)
+        started = time.perf_counter()
+        # Catálogo pequeno: a validade padrão de cada Tipo vira uma faixa própria de emissão
+        validity_by_type = dict(db.execute(
+            select(DocumentType.id, DocumentType.validity_days_default).where(DocumentType.validity_days_default > 0)
+        ).all())
+
+        for model in (Document, Certificate):
+            by_status = report.changed.setdefault(model.__tablename__, {})
+            for target in (DocumentStatus.EXPIRED.value, DocumentStatus.WARNING.value, DocumentStatus.VALID.value):
+                condition = (
+                    indexed_expiration_range(model, target, report.today, warning_days, validity_by_type),
+                    model.status.in_(MANAGED_STATUSES),
+                    model.status != target,
+                )
+                by_status[target] = 0
+                last_id = None
+                while True:
+                    stmt = select(model.id, model.company_id, model.status).where(*condition)
+                    if last_id is not None:
+                        stmt = stmt.where(model.id > last_id)
+                    # FOR UPDATE: um upload concorrente não troca status/vencimento entre o SELECT e o UPDATE
+                    batch = db.execute(stmt.order_by(model.id).limit(chunk_size).with_for_update()).all()
+                    if not batch:
+                        break
+                    last_id = batch[-1].id
+
+                    db.execute(
+                        update(model)
+                        .where(model.id.in_([row.id for row in batch]))
+                        .values(status=target)
+                        .execution_options(synchronize_session=False)
+                    )
+                    # UPDATE em massa não passa pelos listeners de flush: aplica os deltas do lote
+                    VaultStatsRepository.apply_status_changes(
+                        db, Counter((row.company_id, row.status) for row in batch), target
+                    )
+                    db.commit()
+
+                    by_status[target] += len(batch)
+                    report.chunks += 1
+                    if len(batch) < chunk_size:
+                        break
+
+        report.elapsed_seconds = time.perf_counter() - started
+        return report
@@ -0,0 +1,120 @@
+"""
+Service de Deduplicação do Storage (Migração para o Blob Store).
+Leva os arquivos antigos (nome UUID em 'storage/uploads' ou 'uploads/', no disco
+local) para o armazenamento endereçado por conteúdo do backend configurado:
+
+1. Lê as linhas de 'documents'/'certificates' que ainda não apontam para um blob
+   (em lotes, por id);
+2. Calcula o SHA-256 de cada arquivo e cria o blob (hardlink no disco local,
+   upload no S3); se o blob já existe, o arquivo era duplicado;
+3. Atualiza file_path/content_hash/file_size e faz COMMIT do lote;
+4. Só então apaga os originais. Se o processo cair no meio, o arquivo continua
+   acessível pelo caminho antigo ou pelo blob, e rodar de novo retoma do ponto.
+"""
+import os
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core import storage
+from app.models.document_model import Document
+from app.models.certificate_model import Certificate
+
+STORAGE_DEDUPE_BATCH_SIZE = int(os.getenv("STORAGE_DEDUPE_BATCH_SIZE", "500"))
+
+
+@dataclass
+class DedupeReport:
+    """Resultado de uma execução (dry_run = só mede, não mexe em nada)."""
+    dry_run: bool
+    rows_updated: int = 0
+    files_scanned: int = 0
+    duplicate_files: int = 0
+    missing_files: int = 0
+    bytes_scanned: int = 0
+    bytes_freed: int = 0
+    elapsed_seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "dry_run": self.dry_run,
+            "rows_updated": self.rows_updated,
+            "files_scanned": self.files_scanned,
+            "duplicate_files": self.duplicate_files,
+            "missing_files": self.missing_files,
+            "bytes_scanned": self.bytes_scanned,
+            "bytes_freed": self.bytes_freed,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+        }
+
+
+class StorageDedupeService:
+
+    @staticmethod
+    def dedupe_existing(db: Session, batch_size: int = STORAGE_DEDUPE_BATCH_SIZE, dry_run: bool = False) -> DedupeReport:
+        if batch_size <= 0:
+            raise ValueError("batch_size deve ser maior que zero.")
+
+        report = DedupeReport(dry_run=dry_run)
+        started = time.perf_counter()
+        adopted = {}        # file_path antigo -> StoredFile (várias linhas podem dividir o mesmo arquivo)
+        seen_hashes = set() # dry_run: blobs que "já existiriam"
+
+        for model in (Document, Certificate):
+            last_id = ""
+            while True:
+                rows = db.execute(
+                    select(model.id, model.file_path)
+                    .where(model.file_path.notlike(f"{storage.BLOB_PREFIX}%"), model.id > last_id)
+                    .order_by(model.id)
+                    .limit(batch_size)
+                ).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+
+                originals = []
+                for row in rows:
+                    stored = adopted.get(row.file_path)
+                    if stored is None:
+                        source = storage.absolute_path(row.file_path)
+                        if not os.path.isfile(source):
+                            report.missing_files += 1
+                            continue
+                        if dry_run:
+                            sha256, size = storage.hash_file(source)
+                            duplicate = sha256 in seen_hashes or storage.get_backend().exists(storage.blob_path(sha256))
+                            seen_hashes.add(sha256)
+                            stored = storage.StoredFile(storage.blob_path(sha256), size, sha256, duplicate)
+                        else:
+                            stored, source = storage.adopt_file(row.file_path)
+                            originals.append((source, stored))
+                        adopted[row.file_path] = stored
+                        report.files_scanned += 1
+                        report.bytes_scanned += stored.size
+                        if stored.deduplicated:
+                            report.duplicate_files += 1
+                            report.bytes_freed += stored.size
+
+                    if not dry_run:
+                        db.execute(
+                            update(model).where(model.id == row.id)
+                            .values(file_path=stored.path, content_hash=stored.sha256, file_size=stored.size)
+                            .execution_options(synchronize_session=False)
+                        )
+                    report.rows_updated += 1
+
+                if dry_run:
+                    continue
+                db.commit()
+                # Originais só saem depois do commit (antes disso, o banco ainda aponta para eles)
+                for source, _ in originals:
+                    try:
+                        os.remove(source)
+                    except FileNotFoundError:
+                        pass
+
+        report.elapsed_seconds = time.perf_counter() - started
+        return report
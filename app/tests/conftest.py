@@ -3,29 +3,101 @@ Configuração Base de Testes (Fixtures).
 Cria o ambiente isolado de banco em memória e fornece 
 clientes da API já autenticados para testes de segurança e ACL.
 """
+import asyncio
+import os
 import pytest
+
+# Bcrypt no custo mínimo: a suíte testa o fluxo, não a força do hash.
+# Precisa vir antes de importar a app (security.py lê no import).
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+# Leitura de PDFs em threads: subir processos 'spawn' a cada teste só deixaria a suíte lenta.
+os.environ.setdefault("PDF_EXTRACTION_EXECUTOR", "thread")
+# GC do storage embutido na API desligado: ele usaria o banco real; a suíte roda o GC pela fixture run_storage_gc.
+os.environ.setdefault("STORAGE_GC_IN_API", "false")
+
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from app.main import app
-from app.core.database import Base, get_db
+from app.core import storage
+from app.core.storage_backends import LocalStorageBackend
+from app.core.database import Base, get_db, get_async_db
+from app.core.auth_cache import principal_cache
+from app.core.job_queue import JobWorker
+from app.repositories import blob_repository
+from app.services import certificate_extraction_service, job_handlers
 from app.core.security import create_access_token, get_password_hash
 from app.models.user_model import User, UserRole
 
 # 1. Configura Banco em Memória (SQLite Memory)
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Cache compartilhado: o engine síncrono e o assíncrono (aiosqlite) enxergam o mesmo banco.
+# Sem read_uncommitted: as rotas async só leem o que o db_session comitou, como em produção.
+SHARED_MEMORY_DB = "file:licitadoc_tests?mode=memory&cache=shared&uri=true"
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{SHARED_MEMORY_DB}"
+ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{SHARED_MEMORY_DB}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
+async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=StaticPool)
+
 
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def dispose_async_engine():
+    """Fecha a conexão do aiosqlite no fim da suíte (senão a thread dele segura o processo)."""
+    yield
+    asyncio.run(async_engine.dispose())
+
+# 2. Fixture do Cache de Autenticação
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    """
+    Zera o cache de Principals entre testes.
+    Tokens gerados no mesmo segundo para o mesmo e-mail são idênticos,
+    e o banco é recriado a cada teste (ids mudam).
+    """
+    principal_cache.clear()
+    principal_cache.reset_stats()
+    yield
+    principal_cache.clear()
+
+# 2.0 Fixture do Storage
+@pytest.fixture(autouse=True)
+def isolated_storage(tmp_path, monkeypatch):
+    """Uploads de qualquer teste vão para a pasta temporária, nunca para storage/ do projeto."""
+    monkeypatch.setattr(storage, "BASE_DIR", str(tmp_path))
+    monkeypatch.setattr(storage, "UPLOAD_DIR", str(tmp_path / "storage" / "uploads"))
+    monkeypatch.setattr(storage, "BLOB_DIR", str(tmp_path / "storage" / "blobs"))
+    monkeypatch.setattr(storage, "_backend", LocalStorageBackend(str(tmp_path)))
+    return tmp_path
+
+# 2.0.1 Fixture da Leitura em Segundo Plano
+@pytest.fixture(autouse=True)
+def background_sessions(monkeypatch):
+    """As tarefas pós-upload abrem a própria sessão: no banco em memória, não no real."""
+    monkeypatch.setattr(certificate_extraction_service, "SessionLocal", TestingSessionLocal)
+
+# 2.0.2 Fixture do GC do Storage
+@pytest.fixture
+def run_storage_gc(monkeypatch):
+    """Sem carência: devolve uma função que roda na hora os jobs 'storage.gc' já agendados."""
+    monkeypatch.setattr(blob_repository, "STORAGE_GC_GRACE_SECONDS", 0)
 
-# 2. Fixture do Banco de Dados
+    def run() -> int:
+        worker = JobWorker(session_factory=TestingSessionLocal, job_types=[job_handlers.STORAGE_GC])
+        return worker.run(stop_when_idle=True)
+    return run
+
+# 2.1 Fixture do Banco de Dados
 @pytest.fixture(scope="function")
 def db_session():
     """
@@ -40,12 +112,34 @@ def db_session():
         db.close()
         Base.metadata.drop_all(bind=engine)
 
+# 2.2 Contador de Queries (Testes de N+1)
+@pytest.fixture(scope="function")
+def query_counter(db_session):
+    """
+    Registra cada SELECT/INSERT/... executado no banco de testes.
+    Uso: zere com `query_counter.clear()` antes da ação e confira `len(query_counter)`.
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    targets = (engine, async_engine.sync_engine)
+    for target in targets:
+        event.listen(target, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        for target in targets:
+            event.remove(target, "before_cursor_execute", before_cursor_execute)
+
 # 3. Fixture do Cliente API (Público/Sem Autenticação)
 @pytest.fixture(scope="function")
 def client(db_session):
     """
     Cliente da API base com a injeção do banco em memória.
     Útil para testar rotas públicas (como Login e Register).
+    Rotas async recebem uma AsyncSession sobre o mesmo banco (só veem dados comitados).
     """
     def override_get_db():
         try:
@@ -53,7 +147,12 @@ def client(db_session):
         finally:
             pass    
 
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as c:
         yield c
 
@@ -4,12 +4,14 @@ Cobre 100% das operações CRUD de empresas e gestão de ficheiros (upload/downl
 com simulação de falhas de sistema para garantir a resiliência.
 """
 from fastapi import status
-from unittest.mock import patch, mock_open, MagicMock
+from unittest.mock import patch, MagicMock
+import hashlib
 import uuid
 
 from app.models.company_model import Company
 from app.models.user_model import User, UserRole
 from app.models.document_model import Document
+from app.repositories.vault_stats_repository import VaultStatsRepository
 from app.core.security import get_password_hash
 
 # ==========================================
@@ -120,29 +122,60 @@ def test_list_company_documents(db_session, admin_client):
     assert response.status_code == status.HTTP_200_OK
     assert len(response.json()) == 1
 
-@patch("app.routers.admin_router.shutil.copyfileobj")
-@patch("builtins.open", new_callable=mock_open)
-@patch("app.routers.admin_router.os.makedirs")
-def test_upload_company_document_success(mock_makedirs, mock_open_file, mock_copy, db_session, admin_client):
+def test_export_company_documents_csv(db_session, admin_client):
+    company = Company(cnpj="66666666000167", razao_social="Export S.A.")
+    db_session.add(company)
+    db_session.commit()
+    for i in range(3):
+        db_session.add(Document(filename=f"exp{i}.pdf", file_path="/fake/path", company_id=company.id))
+    db_session.commit()
+
+    response = admin_client.get(f"/admin/companies/{company.id}/documents?export=csv")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "attachment" in response.headers["content-disposition"]
+    lines = response.text.strip().splitlines()
+    assert lines[0].startswith("id,title,filename")
+    assert len(lines) == 4
+
+def test_upload_company_document_success(db_session, admin_client, isolated_storage):
     company = Company(cnpj="77777777000177", razao_social="Upload S.A.")
     db_session.add(company)
     db_session.commit()
 
-    files = {"file": ("relatorio.pdf", b"%PDF...", "application/pdf")}
+    content = b"%PDF-1.4 relatorio"
+    files = {"file": ("relatorio.pdf", content, "application/pdf")}
     response = admin_client.post(f"/admin/companies/{company.id}/upload", files=files)
 
     assert response.status_code == status.HTTP_201_CREATED
     assert response.json()["filename"] == "relatorio.pdf"
-    mock_copy.assert_called_once() # Garante que simulou a cópia para o disco
+    assert response.json()["status"] == "valid"
+    assert response.json()["file_size"] == len(content)
+    assert response.json()["content_hash"] == hashlib.sha256(content).hexdigest()
+    assert (isolated_storage / response.json()["file_path"]).read_bytes() == content # Gravou de verdade
+
+    stats = VaultStatsRepository.get(db_session, company.id)
+    assert (stats.total, stats.valid) == (1, 1)
+
+def test_upload_company_document_rejects_non_pdf(db_session, admin_client):
+    """Cenário QA [Segurança]: extensão .pdf com conteúdo que não é PDF -> 415 e nada registrado."""
+    company = Company(cnpj="66666666000166", razao_social="Falso S.A.")
+    db_session.add(company)
+    db_session.commit()
+
+    files = {"file": ("relatorio.pdf", b"<html>nada de pdf</html>", "application/pdf")}
+    response = admin_client.post(f"/admin/companies/{company.id}/upload", files=files)
+
+    assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    assert db_session.query(Document).count() == 0
 
-@patch("builtins.open", side_effect=Exception("Disco falhou"))
-@patch("app.routers.admin_router.os.makedirs")
-def test_upload_company_document_disk_error(mock_makedirs, mock_open_file, db_session, admin_client):
+@patch("app.routers.admin_router.ingest_upload", side_effect=IOError("Disco falhou"))
+def test_upload_company_document_disk_error(mock_ingest, db_session, admin_client):
     company = Company(cnpj="88888888000188", razao_social="Erro S.A.")
     db_session.add(company)
     db_session.commit()
 
-    files = {"file": ("relatorio.pdf", b"123", "application/pdf")}
+    files = {"file": ("relatorio.pdf", b"%PDF-1.4", "application/pdf")}
     response = admin_client.post(f"/admin/companies/{company.id}/upload", files=files)
 
     assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -174,8 +207,7 @@ def test_download_company_document_success(db_session, admin_client, tmp_path):
     assert response.status_code == status.HTTP_200_OK
     assert response.content == b"%PDF-1.4 Conteudo super secreto"
 
-@patch("app.routers.admin_router.os.path.exists", return_value=False)
-def test_download_company_document_missing_file(mock_exists, db_session, admin_client):
+def test_download_company_document_missing_file(db_session, admin_client):
     """Cenário QA: O documento existe no Banco de Dados, mas o ficheiro foi apagado do disco!"""
     company = Company(cnpj="00000000000100", razao_social="Missing S.A.")
     db_session.add(company)
@@ -190,18 +222,75 @@ def test_download_company_document_missing_file(mock_exists, db_session, admin_c
     assert response.status_code == status.HTTP_404_NOT_FOUND
     assert "Arquivo físico não encontrado" in response.json()["detail"]
 
-@patch("app.routers.admin_router.os.remove")
-@patch("app.routers.admin_router.os.path.exists", return_value=True)
-def test_delete_company_document_success(mock_exists, mock_remove, db_session, admin_client):
+def test_delete_company_document_success(db_session, admin_client, isolated_storage, run_storage_gc):
     company = Company(cnpj="12121212000112", razao_social="Del Doc S.A.")
     db_session.add(company)
     db_session.commit()
 
-    doc = Document(filename="apagar.pdf", file_path="/mock/apagar.pdf", company_id=company.id)
+    stored = isolated_storage / "storage" / "uploads" / "apagar.pdf"
+    stored.parent.mkdir(parents=True)
+    stored.write_bytes(b"%PDF-1.4 apagar")
+    doc = Document(filename="apagar.pdf", file_path="storage/uploads/apagar.pdf", company_id=company.id)
     db_session.add(doc)
     db_session.commit()
 
     response = admin_client.delete(f"/admin/companies/{company.id}/documents/{doc.id}")
     
     assert response.status_code == status.HTTP_200_OK
-    mock_remove.assert_called_once() # Garante que chamou a função de deletar no disco
\ No newline at end of file
+    assert stored.exists() # Nada sai do disco na requisição: o GC apaga depois da carência
+    assert run_storage_gc() == 1
+    assert not stored.exists()
+
+def test_duplicate_upload_shares_blob_until_last_reference(db_session, admin_client, isolated_storage, run_storage_gc):
+    """
+    Cenário: o mesmo PDF enviado duas vezes vira um único blob com duas referências.
+    Apagar um documento mantém o arquivo; apagar o último remove do disco.
+    """
+    company = Company(cnpj="13131313000113", razao_social="Dedupe S.A.")
+    db_session.add(company)
+    db_session.commit()
+
+    content = b"%PDF-1.4 CND repetida"
+    files = {"file": ("cnd.pdf", content, "application/pdf")}
+    first = admin_client.post(f"/admin/companies/{company.id}/upload", files=files).json()
+    second = admin_client.post(f"/admin/companies/{company.id}/upload", files=files).json()
+
+    assert first["file_path"] == second["file_path"] == f"storage/blobs/{first['content_hash'][:2]}/{first['content_hash'][2:4]}/{first['content_hash']}"
+    blob = isolated_storage / first["file_path"]
+    assert blob.read_bytes() == content
+
+    report = admin_client.get("/admin/storage/report").json()
+    assert (report["blobs"], report["references"], report["bytes_saved"]) == (1, 2, len(content))
+
+    admin_client.delete(f"/admin/companies/{company.id}/documents/{first['id']}")
+    run_storage_gc()
+    assert blob.exists() # Ainda referenciado pelo segundo documento
+    admin_client.delete(f"/admin/companies/{company.id}/documents/{second['id']}")
+    assert blob.exists() # Só o GC apaga
+    run_storage_gc()
+    assert not blob.exists()
+    db_session.expire_all()
+    assert VaultStatsRepository.get(db_session, company.id).total == 0
+
+def test_released_blob_reused_before_gc_is_kept(db_session, admin_client, isolated_storage, run_storage_gc):
+    """
+    Cenário [Concorrência]: o último documento de um blob é apagado e, antes do GC rodar,
+    outro upload do mesmo conteúdo reaproveita o blob (deduplicated).
+    Resultado Esperado: o GC reconta as referências e mantém o arquivo.
+    """
+    company = Company(cnpj="14141414000114", razao_social="Corrida S.A.")
+    db_session.add(company)
+    db_session.commit()
+
+    files = {"file": ("cnd.pdf", b"%PDF-1.4 CND disputada", "application/pdf")}
+    first = admin_client.post(f"/admin/companies/{company.id}/upload", files=files).json()
+    admin_client.delete(f"/admin/companies/{company.id}/documents/{first['id']}")
+    blob = isolated_storage / first["file_path"]
+    assert blob.exists()
+
+    second = admin_client.post(f"/admin/companies/{company.id}/upload", files=files).json()
+    assert second["file_path"] == first["file_path"]
+
+    assert run_storage_gc() == 1
+    assert blob.exists()
+    assert admin_client.get(f"/admin/companies/{company.id}/documents/{second['id']}/download").status_code == status.HTTP_200_OK
\ No newline at end of file
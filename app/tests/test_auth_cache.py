@@ -0,0 +1,167 @@
+"""
+Testes do Cache de Autenticação (Principal Cache).
+Cobre o LRU/TTL isolado e a invalidação automática disparada pelas rotas
+que alteram usuários e vínculos.
+"""
+import time
+from fastapi import status
+
+from app.core.auth_cache import PrincipalCache, Principal, CompanyLinkSnapshot, principal_cache
+from app.core.security import create_access_token, get_password_hash
+from app.models.company_model import Company
+from app.models.user_model import User, UserRole, UserCompanyLink, UserCompanyRole
+
+
+def make_principal(user_id="u1", exp=None):
+    return Principal(
+        id=user_id, email=f"{user_id}@teste.com", role=UserRole.CLIENT.value, is_active=True,
+        company_links=(CompanyLinkSnapshot(company_id="c1", role=UserCompanyRole.MASTER.value),),
+        exp=exp
+    )
+
+# ==========================================
+# 🧠 1. TESTES UNITÁRIOS DO CACHE
+# ==========================================
+
+def test_cache_hit_and_miss_counters():
+    cache = PrincipalCache(ttl_seconds=60, max_entries=10)
+    assert cache.get("a.b.sig1") is None
+    cache.put("a.b.sig1", make_principal())
+
+    assert cache.get("a.b.sig1").id == "u1"
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["size"] == 1
+
+def test_cache_requires_full_token_match():
+    """A assinatura é só o índice: um payload diferente com a mesma assinatura não pode bater."""
+    cache = PrincipalCache(ttl_seconds=60, max_entries=10)
+    cache.put("a.b.sig1", make_principal())
+    assert cache.get("x.y.sig1") is None
+
+def test_cache_ttl_and_token_expiration():
+    cache = PrincipalCache(ttl_seconds=60, max_entries=10)
+    cache.put("a.b.sig1", make_principal(exp=time.time() - 1))  # JWT já vencido
+    assert cache.get("a.b.sig1") is None
+
+    short = PrincipalCache(ttl_seconds=0.01, max_entries=10)
+    short.put("a.b.sig2", make_principal())
+    time.sleep(0.02)
+    assert short.get("a.b.sig2") is None
+
+def test_cache_lru_eviction_and_invalidation():
+    cache = PrincipalCache(ttl_seconds=60, max_entries=2)
+    cache.put("a.b.s1", make_principal("u1"))
+    cache.put("a.b.s2", make_principal("u2"))
+    cache.get("a.b.s1")                       # s1 vira o mais recente
+    cache.put("a.b.s3", make_principal("u3")) # expulsa s2
+
+    assert cache.get("a.b.s2") is None
+    assert cache.stats()["evictions"] == 1
+
+    cache.invalidate_user("u1")
+    assert cache.get("a.b.s1") is None
+    assert cache.get("a.b.s3").id == "u3"
+
+def test_principal_link_index():
+    principal = make_principal()
+    assert principal.has_company("c1")
+    assert principal.get_link("c1").role == UserCompanyRole.MASTER.value
+    assert principal.get_link("outra") is None
+    assert not principal.has_company("outra")
+
+# ==========================================
+# 🔄 2. TESTES DE INTEGRAÇÃO (INVALIDAÇÃO)
+# ==========================================
+
+def create_client_user(db_session, email="cacheado@teste.com"):
+    user = User(email=email, password_hash=get_password_hash("123"), role=UserRole.CLIENT.value, is_active=True)
+    db_session.add(user)
+    db_session.commit()
+    return user, create_access_token(data={"sub": user.email})
+
+def test_repeated_requests_hit_cache(db_session, client):
+    user, token = create_client_user(db_session)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    for _ in range(3):
+        assert client.get("/users/me", headers=headers).status_code == status.HTTP_200_OK
+
+    stats = principal_cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 2
+
+def test_toggle_company_status_invalidates_owner(db_session, client, admin_user_token):
+    owner, token = create_client_user(db_session)
+    company = Company(cnpj="77777777000177", razao_social="Cache S.A.", owner_id=owner.id)
+    db_session.add(company)
+    db_session.commit()
+    db_session.add(UserCompanyLink(user_id=owner.id, company_id=company.id, role=UserCompanyRole.MASTER.value))
+    db_session.commit()
+
+    owner_headers = {"Authorization": f"Bearer {token}"}
+    assert client.get(f"/documents/?company_id={company.id}", headers=owner_headers).status_code == status.HTTP_200_OK
+
+    toggle = client.patch(
+        f"/admin/companies/{company.id}/toggle-status",
+        headers={"Authorization": f"Bearer {admin_user_token}"}
+    )
+    assert toggle.json()["is_active"] is False
+
+    # O Principal antigo (ativo) não pode sobreviver ao bloqueio
+    response = client.get(f"/documents/?company_id={company.id}", headers=owner_headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+def test_add_member_invalidates_invited_user(db_session, client):
+    master, master_token = create_client_user(db_session, email="master_cache@teste.com")
+    guest, guest_token = create_client_user(db_session, email="guest_cache@teste.com")
+    company = Company(cnpj="88888888000188", razao_social="Equipe S.A.")
+    db_session.add(company)
+    db_session.commit()
+    db_session.add(UserCompanyLink(user_id=master.id, company_id=company.id, role=UserCompanyRole.MASTER.value))
+    db_session.commit()
+
+    guest_headers = {"Authorization": f"Bearer {guest_token}"}
+    assert client.get(f"/documents/?company_id={company.id}", headers=guest_headers).status_code == status.HTTP_403_FORBIDDEN
+
+    response = client.post(
+        f"/companies/{company.id}/members",
+        json={"email": guest.email, "role": "VIEWER"},
+        headers={"Authorization": f"Bearer {master_token}"}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    assert client.get(f"/documents/?company_id={company.id}", headers=guest_headers).status_code == status.HTTP_200_OK
+
+def test_update_user_me_invalidates_cache(db_session, client):
+    user, token = create_client_user(db_session)
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/users/me", headers=headers).status_code == status.HTTP_200_OK
+
+    assert client.patch("/users/me", json={"is_active": False}, headers=headers).status_code == status.HTTP_200_OK
+    assert client.get("/documents/", headers=headers).status_code == status.HTTP_400_BAD_REQUEST
+
+def test_deleted_user_token_stops_working(db_session, client):
+    user, token = create_client_user(db_session)
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/users/me", headers=headers).status_code == status.HTTP_200_OK
+
+    db_session.delete(user)
+    db_session.commit()
+
+    assert client.get("/documents/", headers=headers).status_code == status.HTTP_401_UNAUTHORIZED
+
+def test_rollback_keeps_cache(db_session, client):
+    user, token = create_client_user(db_session)
+    client.get("/users/me", headers={"Authorization": f"Bearer {token}"})
+
+    user.celular = "11999999999"
+    db_session.flush()
+    db_session.rollback()
+
+    assert principal_cache.get(token) is not None
+
+def test_admin_metrics_exposes_cache_stats(admin_client):
+    admin_client.get("/admin/metrics")
+    data = admin_client.get("/admin/metrics").json()
+    assert data["auth_cache"]["hits"] >= 1
+    assert "hit_ratio" in data["auth_cache"]
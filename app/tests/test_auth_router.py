@@ -3,9 +3,13 @@ Testes de Integração de Rotas: Autenticação.
 Garante que o login é seguro, e que o registro processa 
 arquivos e dados simultaneamente sem sujar o disco real (Mocking).
 """
+import hashlib
 from fastapi import status
 from unittest.mock import patch
 
+from app.models.document_model import Document
+from app.models.user_model import User
+
 # ==========================================
 # 🔐 1. TESTES DE LOGIN (OAuth2)
 # ==========================================
@@ -48,21 +52,46 @@ def test_login_invalid_password(client):
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
     assert response.json()["detail"] == "Email ou senha incorretos"
 
+def test_login_unknown_user_runs_dummy_verify(client):
+    """
+    Cenário QA [Hardening]: E-mail inexistente.
+    O login precisa gastar o mesmo bcrypt de um usuário real (sem atalho pelo tempo de resposta).
+    """
+    with patch("app.routers.auth_router.password_hasher.dummy_verify") as mock_dummy:
+        response = client.post("/auth/token", data={"username": "fantasma@teste.com", "password": "x"})
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    mock_dummy.assert_awaited_once()
+
+def test_login_rehashes_password_when_cost_changes(db_session, client):
+    """Cenário: Hash gravado com custo antigo é refeito no login, no custo atual da política."""
+    from passlib.context import CryptContext
+    from app.core.security import BCRYPT_ROUNDS, pwd_context
+    from app.models.user_model import User
+
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=BCRYPT_ROUNDS + 1).hash("senha_antiga_123")
+    user = User(email="legado@teste.com", password_hash=old_hash, is_active=True)
+    db_session.add(user)
+    db_session.commit()
+
+    response = client.post("/auth/token", data={"username": "legado@teste.com", "password": "senha_antiga_123"})
+
+    assert response.status_code == status.HTTP_200_OK
+    db_session.refresh(user)
+    assert user.password_hash != old_hash
+    assert not pwd_context.needs_update(user.password_hash)
+    assert pwd_context.verify("senha_antiga_123", user.password_hash)
 
 # ==========================================
 # 🏢 2. TESTES DE REGISTRO COM UPLOAD
 # ==========================================
 
-# Interceptamos a função de salvar o arquivo para ela não escrever no disco real!
-@patch("app.routers.auth_router.save_upload_file")
-def test_register_multipart_success(mock_save_file, client):
+# O conftest (isolated_storage) redireciona os uploads para a pasta temporária do teste
+def test_register_multipart_success(client, db_session, isolated_storage):
     """
     Cenário: Registro completo de nova Empresa (SaaS), enviando arquivos.
     Resultado Esperado: 201 Created, geração de Token e processamento seguro.
     """
-    # 1. Ensinamos a função falsa a retornar a Tupla (caminho, tamanho) que o router espera
-    mock_save_file.return_value = ("storage/mock_path/file.pdf", 1024)
-    
     # 2. Dados de Texto (Form Data)
     payload = {
         "email": "ceo@novasaas.com",
@@ -89,16 +118,58 @@ def test_register_multipart_success(mock_save_file, client):
     assert "access_token" in data
     assert data["user"]["email"] == "ceo@novasaas.com"
     
-    # QA Bônus: Garante que a função de salvar arquivo foi chamada exatamente 1 vez
-    mock_save_file.assert_called_once()
+    # QA Bônus: o arquivo foi gravado e o documento registrado com hash e tamanho
+    doc = db_session.query(Document).one()
+    assert doc.file_size == len(files["social_contract"][1])
+    assert doc.content_hash == hashlib.sha256(files["social_contract"][1]).hexdigest()
+    assert (isolated_storage / doc.file_path).exists()
+
+def test_register_identity_photo_downloads_with_original_name(client, db_session):
+    """
+    Cenário: o documento de identidade do cadastro é uma foto (dispensa a checagem de PDF).
+    Resultado Esperado: o download sai com o nome e o Content-Type da foto, não como '.pdf'.
+    """
+    payload = {
+        "email": "foto@rg.com", "password": "senha_forte_456", "legal_name": "Foto LTDA",
+        "cnpj": "33.444.555/0001-66", "responsible_name": "Ciclano", "cpf": "333.444.555-66"
+    }
+    photo = b"\xff\xd8\xff\xe0 jpeg do documento"
+    files = {"responsible_doc": ("rg_frente.jpg", photo, "image/jpeg")}
+
+    response = client.post("/auth/register", data=payload, files=files)
+    assert response.status_code == status.HTTP_201_CREATED
+
+    doc = db_session.query(Document).one()
+    client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+    download = client.get(f"/documents/{doc.id}/download")
+
+    assert download.status_code == status.HTTP_200_OK
+    assert download.content == photo
+    assert download.headers["content-type"] == "image/jpeg"
+    assert 'filename="rg_frente.jpg"' in download.headers["content-disposition"]
+
+def test_register_rejects_invalid_pdf_without_creating_account(client, db_session, isolated_storage):
+    """
+    Cenário QA [Segurança]: contrato social que não é PDF.
+    Resultado Esperado: 415 antes da transação (nenhum usuário criado, nenhum arquivo no disco).
+    """
+    payload = {
+        "email": "falso@pdf.com", "password": "senha_forte_456", "legal_name": "Falsa LTDA",
+        "cnpj": "22.333.444/0001-55", "responsible_name": "Fulano", "cpf": "222.333.444-55"
+    }
+    files = {"social_contract": ("contrato.pdf", b"MZ executavel", "application/pdf")}
+
+    response = client.post("/auth/register", data=payload, files=files)
+
+    assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    assert db_session.query(User).filter(User.email == "falso@pdf.com").first() is None
+    assert not any(path.is_file() for path in (isolated_storage / "storage").rglob("*"))
 
-@patch("app.routers.auth_router.save_upload_file")
-def test_register_duplicate_email(mock_save_file, client):
+def test_register_duplicate_email(client):
     """
     Cenário: Tentativa de registrar a mesma empresa/email duas vezes.
     Resultado Esperado: 400 Bad Request.
     """
-    mock_save_file.return_value = ("fake/path.pdf", 1024)
     payload = {
         "email": "duplicado@teste.com", "password": "123", "legal_name": "Empresa 1",
         "cnpj": "1111", "responsible_name": "João", "cpf": "111"
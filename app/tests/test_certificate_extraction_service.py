@@ -0,0 +1,122 @@
+"""
+Testes Unitários: Leitura das Certidões em Segundo Plano.
+Valida PROCESSING -> valid/warning/expired/error, o preenchimento das colunas
+(sem sobrescrever o que o admin digitou), o metadata_info e o pool de processos.
+"""
+import io
+from datetime import date
+
+from app.core import storage
+from app.core.pdf_extractor import PdfExtractorPool, extract_pdf
+from app.models.company_model import Company
+from app.models.certificate_model import Certificate, CertificateStatus
+from app.models.document_category_model import DocumentCategory
+from app.models.document_type_model import DocumentType
+from app.services.certificate_extraction_service import CertificateExtractionService
+from app.utils.sample_certidao import build_certidao_pdf, build_pdf
+
+CNPJ = "12345678000199"
+TODAY = date(2026, 3, 1)
+
+
+def _seed(db_session):
+    company = Company(cnpj=CNPJ, razao_social="Leitura SA")
+    category = DocumentCategory(name="Fiscal", slug="fiscal-extracao")
+    db_session.add_all([company, category])
+    db_session.flush()
+    doc_type = DocumentType(name="CND", slug="cnd-extracao", category_id=category.id)
+    db_session.add(doc_type)
+    db_session.commit()
+    return company, doc_type
+
+
+def _pending(db_session, company, doc_type, name: str, content: bytes = None, **columns) -> Certificate:
+    key = f"storage/uploads/{name}"
+    if content is not None:
+        storage.get_backend().put_stream(key, io.BytesIO(content))
+    cert = Certificate(
+        filename=name, file_path=key, company_id=company.id, type_id=doc_type.id,
+        status=CertificateStatus.PROCESSING.value, **columns
+    )
+    db_session.add(cert)
+    db_session.commit()
+    return cert
+
+
+def test_extracts_fields_and_classifies_status(db_session):
+    company, doc_type = _seed(db_session)
+    valid = _pending(db_session, company, doc_type, "cnd.pdf", build_certidao_pdf(CNPJ, date(2026, 1, 5), date(2026, 7, 4), extra_pages=2))
+    expired = _pending(db_session, company, doc_type, "velha.pdf", build_certidao_pdf(CNPJ, date(2025, 1, 5), date(2025, 7, 4)))
+
+    report = CertificateExtractionService.process_pending(db_session, batch_size=1, today=TODAY)
+
+    assert report.as_dict()["processed"] == 2 and report.errors == 0
+    db_session.expire_all()
+    assert valid.status == "valid"
+    assert valid.issue_date == date(2026, 1, 5)
+    assert valid.expiration_date == date(2026, 7, 4)
+    assert valid.authentication_code == "A1B2.C3D4.E5F6.0789"
+    # Tudo na 1ª página: os anexos não são lidos
+    assert valid.metadata_info["extraction"]["pages"] == 1
+    assert valid.metadata_info["extraction"]["total_pages"] == 3
+    assert valid.metadata_info["extraction"]["cnpjs"] == [CNPJ]
+    assert expired.status == "expired"
+
+
+def test_admin_typed_values_win_over_extraction(db_session):
+    company, doc_type = _seed(db_session)
+    cert = _pending(
+        db_session, company, doc_type, "cnd.pdf", build_certidao_pdf(CNPJ, date(2026, 1, 5), date(2026, 7, 4)),
+        expiration_date=date(2026, 3, 10), authentication_code="DIGITADO", metadata_info={"origem": "upload"}
+    )
+
+    CertificateExtractionService.process_ids(db_session, [cert.id], today=TODAY)
+
+    db_session.expire_all()
+    assert cert.expiration_date == date(2026, 3, 10)
+    assert cert.authentication_code == "DIGITADO"
+    assert cert.status == "warning"
+    assert cert.metadata_info["origem"] == "upload"
+    assert cert.metadata_info["extraction"]["expiration_date"] == "2026-07-04"
+
+
+def test_errors_are_recorded_per_certificate(db_session):
+    company, doc_type = _seed(db_session)
+    other_company = _pending(db_session, company, doc_type, "outra.pdf", build_certidao_pdf("99888777000166", date(2026, 1, 5)))
+    scanned = _pending(db_session, company, doc_type, "scan.pdf", build_pdf([[]]))
+    broken = _pending(db_session, company, doc_type, "quebrado.pdf", b"%PDF-1.4 truncado")
+    missing = _pending(db_session, company, doc_type, "sumiu.pdf")
+    ok = _pending(db_session, company, doc_type, "ok.pdf", build_certidao_pdf(CNPJ, date(2026, 1, 5)))
+
+    report = CertificateExtractionService.process_pending(db_session, today=TODAY)
+
+    assert (report.processed, report.extracted, report.errors) == (5, 1, 4)
+    db_session.expire_all()
+    for cert in (other_company, scanned, broken, missing):
+        assert cert.status == CertificateStatus.ERROR.value
+        assert cert.metadata_info["extraction"]["error"]
+    assert "CNPJ" in other_company.metadata_info["extraction"]["error"]
+    assert "sem texto" in scanned.metadata_info["extraction"]["error"]
+    assert ok.status == "valid" and ok.expiration_date == date(2026, 7, 4)
+    # Nada fica para trás em 'processing'
+    assert CertificateExtractionService.process_pending(db_session, today=TODAY).processed == 0
+
+
+def test_process_pool_reads_paths_and_bytes(isolated_storage):
+    """O executor padrão (processos 'spawn'): a função e o resultado atravessam o pickle."""
+    content = build_certidao_pdf(CNPJ, date(2026, 1, 5), extra_pages=1)
+    path = isolated_storage / "cnd.pdf"
+    path.write_bytes(content)
+    pool = PdfExtractorPool(workers=2, executor_kind="process")
+    try:
+        outcomes = pool.run([str(path), content, b"nao e pdf"])
+    finally:
+        pool.shutdown()
+
+    (by_path, _), (by_bytes, _), (failed, error) = outcomes
+    assert by_path["fields"] == by_bytes["fields"] == extract_pdf(content)["fields"]
+    assert by_path["fields"]["expiration_date"] == date(2026, 7, 4)
+    assert failed is None and error
+    stats = pool.stats()
+    assert (stats["completed"], stats["failed"], stats["pages"]) == (2, 1, 2)
+    assert stats["pages_per_second_per_worker"] > 0
@@ -0,0 +1,58 @@
+"""
+Testes Unitários: Leitura dos Campos de uma Certidão.
+Valida as datas (absolutas e 'válida por N dias'), CNPJ com e sem máscara,
+o corte do código de autenticação e o texto sem acentos.
+"""
+from datetime import date
+
+from app.utils.certificate_parser import find_cnpjs, parse_certificate_text
+from app.utils.sample_certidao import certidao_lines
+
+
+def test_parses_receita_layout():
+    text = "\n".join(certidao_lines("12345678000199", date(2026, 1, 5), date(2026, 7, 4), "1A2B.3C4D.5E6F.7A8B"))
+
+    fields = parse_certificate_text(text)
+
+    assert fields["issue_date"] == date(2026, 1, 5)
+    assert fields["expiration_date"] == date(2026, 7, 4)
+    assert fields["cnpj"] == "12345678000199"
+    assert fields["authentication_code"] == "1A2B.3C4D.5E6F.7A8B"
+
+
+def test_validity_in_days_is_added_to_issue_date():
+    text = "\n".join(certidao_lines("12345678000199", date(2026, 1, 5)))
+
+    fields = parse_certificate_text(text)
+
+    assert fields["validity_days"] == 180
+    assert fields["expiration_date"] == date(2026, 7, 4)
+
+
+def test_text_without_accents_and_other_labels():
+    text = (
+        "CERTIDAO DE REGULARIDADE DO FGTS - CRF  Inscricao: 12.345.678/0001-99 "
+        "Data de emissao: 10/02/2026  Validade: 11/03/2026 "
+        "Chave de validacao: 2026021012345678 Obtenha a certidao no site"
+    )
+
+    fields = parse_certificate_text(text)
+
+    assert fields["issue_date"] == date(2026, 2, 10)
+    assert fields["expiration_date"] == date(2026, 3, 11)
+    assert fields["authentication_code"] == "2026021012345678"
+
+
+def test_missing_fields_and_invalid_dates_come_back_empty():
+    fields = parse_certificate_text("Válida até 31/02/2026. Nada mais.")
+
+    assert fields["expiration_date"] is None
+    assert fields["issue_date"] is None
+    assert fields["cnpj"] is None and fields["cnpjs"] == []
+    assert fields["authentication_code"] is None
+
+
+def test_find_cnpjs_keeps_order_without_repetition():
+    text = "Matriz 12.345.678/0001-99, filial 12345678000270, matriz de novo 12.345.678/0001-99; tel 1234567800019912"
+
+    assert find_cnpjs(text) == ["12345678000199", "12345678000270"]
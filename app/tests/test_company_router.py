@@ -81,6 +81,55 @@ def test_get_company_members_success(db_session, client):
     # Ajustado para maiúsculas conforme gerado dinamicamente pela factory
     assert response.json()[0]["email"] == "VIEWER_user@teste.com"
 
+def add_team(db_session, company, count, role=UserCompanyRole.VIEWER.value, is_active=True):
+    """Cria `count` usuários vinculados à empresa."""
+    for i in range(count):
+        member = User(email=f"membro_{role}_{is_active}_{i}@teste.com", password_hash="x", role=UserRole.CLIENT.value)
+        db_session.add(member)
+        db_session.flush()
+        db_session.add(UserCompanyLink(user_id=member.id, company_id=company.id, role=role, is_active=is_active))
+    db_session.commit()
+
+def test_get_company_members_constant_query_count(db_session, client, query_counter):
+    """Cenário [Performance]: A listagem não pode disparar um SELECT por membro (N+1)."""
+    company, user, token = setup_company_and_user(db_session, role=UserCompanyRole.VIEWER.value)
+    headers = {"Authorization": f"Bearer {token}"}
+    url = f"/companies/{company.id}/members"
+    client.get(url, headers=headers) # Aquece o cache do Principal
+
+    query_counter.clear()
+    small = client.get(url, headers=headers)
+    queries_small = len(query_counter)
+
+    add_team(db_session, company, 20)
+    query_counter.clear()
+    large = client.get(url, headers=headers)
+
+    assert len(small.json()) == 1
+    assert len(large.json()) == 21
+    assert len(query_counter) == queries_small == 1
+
+def test_get_company_members_pagination_and_filters(db_session, client):
+    company, user, token = setup_company_and_user(db_session, role=UserCompanyRole.MASTER.value)
+    headers = {"Authorization": f"Bearer {token}"}
+    add_team(db_session, company, 3)
+    add_team(db_session, company, 2, is_active=False)
+
+    url = f"/companies/{company.id}/members"
+    first = client.get(f"{url}?limit=4", headers=headers).json()
+    rest = client.get(f"{url}?skip=4&limit=4", headers=headers).json()
+    assert len(first) == 4 and len(rest) == 2
+    assert {m["user_id"] for m in first}.isdisjoint({m["user_id"] for m in rest})
+
+    viewers = client.get(f"{url}?role=VIEWER&status=true", headers=headers).json()
+    assert len(viewers) == 3
+    assert all(m["role"] == "VIEWER" and m["status"] is True for m in viewers)
+
+    inactive = client.get(f"{url}?status=false", headers=headers).json()
+    assert len(inactive) == 2
+
+    assert client.get(f"{url}?role=DONO", headers=headers).status_code == 422
+
 def test_add_member_new_user_success(db_session, client):
     """Cenário: MASTER convida um e-mail novo (o sistema cria a conta automaticamente)."""
     company, user, token = setup_company_and_user(db_session, role=UserCompanyRole.MASTER.value)
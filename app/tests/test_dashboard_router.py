@@ -117,4 +117,82 @@ def test_client_dashboard_success(db_session, client):
     assert data["total_docs"] == 2    # Corrigido
     assert data["docs_valid"] == 1    # Corrigido
     assert data["docs_expired"] == 1  # Corrigido
-    assert len(data["recent_docs"]) == 2 # Corrigido
\ No newline at end of file
+    assert len(data["recent_docs"]) == 2 # Corrigido
+def _company_with_vault(db_session, user=None):
+    """Empresa com 2 legados e 2 certidões (status variados) e, opcionalmente, um membro."""
+    from datetime import datetime
+    from app.models.certificate_model import Certificate
+    from app.models.document_category_model import DocumentCategory
+    from app.models.document_type_model import DocumentType
+
+    company = Company(cnpj="33333333000133", razao_social="Cofre Misto", is_contract_signed=True)
+    category = DocumentCategory(name="Fiscal", slug="fiscal-dash")
+    db_session.add_all([company, category])
+    db_session.commit()
+    doc_type = DocumentType(name="CND Federal", slug="cnd-dash", category_id=category.id)
+    db_session.add(doc_type)
+    db_session.flush()
+    if user is not None:
+        db_session.add(UserCompanyLink(user_id=user.id, company_id=company.id, role=UserCompanyRole.MASTER.value))
+    db_session.add_all([
+        Document(filename="a.pdf", file_path="/fake", company_id=company.id, status="valid", created_at=datetime(2024, 1, 1)),
+        Document(filename="b.pdf", file_path="/fake", company_id=company.id, status="expired", created_at=datetime(2024, 2, 1)),
+        Certificate(type_id=doc_type.id, filename="c.pdf", file_path="/fake", company_id=company.id, status="valid", created_at=datetime(2024, 3, 1)),
+        Certificate(type_id=doc_type.id, filename="d.pdf", file_path="/fake", company_id=company.id, status="warning", created_at=datetime(2024, 4, 1)),
+    ])
+    db_session.commit()
+    return company
+
+def test_client_dashboard_counts_certificates_in_single_query(db_session, client, query_counter):
+    """
+    Cenário [Performance]: Certidões entram nas contagens e nos recentes,
+    e o painel inteiro sai de UMA query (Principal já em cache).
+    """
+    user = User(email="misto@cliente.com", password_hash="x", role=UserRole.CLIENT.value, is_active=True)
+    db_session.add(user)
+    db_session.commit()
+    _company_with_vault(db_session, user)
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': user.email})}"}
+    client.get("/dashboard/client/stats", headers=headers) # Aquece o cache do Principal
+
+    query_counter.clear()
+    response = client.get("/dashboard/client/stats", headers=headers)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(query_counter) == 1
+    data = response.json()
+    assert (data["total_docs"], data["docs_valid"], data["docs_warning"], data["docs_expired"]) == (4, 2, 1, 1)
+    assert data["is_contract_signed"] is True
+    assert [d["filename"] for d in data["recent_docs"]] == ["d.pdf", "c.pdf", "b.pdf", "a.pdf"]
+    assert data["recent_docs"][0]["is_structured"] is True
+    assert data["recent_docs"][0]["type_name"] == "CND Federal"
+
+def test_client_dashboard_empty_company(db_session, client):
+    """Cenário: Empresa sem nenhum item ainda devolve contadores zerados (LEFT JOIN sem linhas)."""
+    user = User(email="vazio@cliente.com", password_hash="x", role=UserRole.CLIENT.value, is_active=True)
+    company = Company(cnpj="44444444000144", razao_social="Vazia SA")
+    db_session.add_all([user, company])
+    db_session.commit()
+    db_session.add(UserCompanyLink(user_id=user.id, company_id=company.id, role=UserCompanyRole.MASTER.value))
+    db_session.commit()
+
+    response = client.get(
+        "/dashboard/client/stats",
+        headers={"Authorization": f"Bearer {create_access_token(data={'sub': user.email})}"}
+    )
+    data = response.json()
+    assert data["company_name"] == "Vazia SA"
+    assert data["total_docs"] == data["docs_valid"] == data["docs_expired"] == 0
+    assert data["next_expiration"] is None
+    assert data["recent_docs"] == []
+
+def test_admin_dashboard_counts_certificates(db_session, admin_client):
+    _company_with_vault(db_session)
+
+    data = admin_client.get("/dashboard/admin/stats").json()
+
+    assert data["total_companies"] == 1
+    assert data["total_documents"] == 4
+    assert data["total_users"] == 1 # O próprio admin
+    assert len(data["recent_documents"]) == 4
+    assert data["recent_companies"][0]["razao_social"] == "Cofre Misto"
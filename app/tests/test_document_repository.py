@@ -175,6 +175,197 @@ def test_get_file_path(db_session):
         file_path="/tmp/path_cert.pdf", company_id=str(company.id)
     )
 
-    assert DocumentRepository.get_file_path(db_session, str(doc_legado.id)) == "/tmp/path_legado.pdf"
-    assert DocumentRepository.get_file_path(db_session, str(cert.id)) == "/tmp/path_cert.pdf"
-    assert DocumentRepository.get_file_path(db_session, "id_inexistente") is None
\ No newline at end of file
+    legado = DocumentRepository.get_file_path(db_session, str(doc_legado.id))
+    assert (legado.file_path, legado.company_id) == ("/tmp/path_legado.pdf", str(company.id))
+    assert DocumentRepository.get_file_path(db_session, str(cert.id)).file_path == "/tmp/path_cert.pdf"
+    assert DocumentRepository.get_file_path(db_session, "id_inexistente") is None
+
+def test_get_file_path_is_a_single_query(db_session, query_counter):
+    company = Company(cnpj="52525252000152", razao_social="Uma Query SA")
+    db_session.add(company)
+    db_session.commit()
+    cat = DocumentRepository.create_category(db_session, DocumentCategoryCreate(name="Q", slug="q", order=1))
+    doc_type = DocumentRepository.create_type(db_session, DocumentTypeCreate(name="Q", slug="q", category_id=str(cat.id)))
+    cert = DocumentRepository.create_certificate(
+        db=db_session, type_id=str(doc_type.id), filename="cert.pdf",
+        file_path="storage/blobs/aa/bb/aabb", company_id=str(company.id), content_hash="aabb"
+    )
+
+    query_counter.clear()
+    row = DocumentRepository.get_file_path(db_session, str(cert.id)) # Certificado: antes eram 2 idas ao banco
+    assert len(query_counter) == 1
+    assert "UNION ALL" in query_counter[0] and "LIMIT" in query_counter[0]
+    assert (row.file_path, row.company_id, row.content_hash) == ("storage/blobs/aa/bb/aabb", str(company.id), "aabb")
+    assert row.created_at is not None
+
+def test_unified_sorted_by_database_with_same_shape(db_session):
+    """
+    A fusão é feita no banco (UNION ALL): ordem por created_at decrescente
+    e exatamente as mesmas chaves do contrato antigo (dict por item).
+    """
+    from datetime import datetime
+    from app.models.document_model import Document
+    from app.models.certificate_model import Certificate
+
+    company = Company(cnpj="44455566000177", razao_social="Ordem SA")
+    db_session.add(company)
+    db_session.commit()
+
+    cat = DocumentRepository.create_category(db_session, DocumentCategoryCreate(name="Fiscal", slug="fiscal-ord", order=1))
+    doc_type = DocumentRepository.create_type(db_session, DocumentTypeCreate(name="CND", slug="cnd-ord", category_id=str(cat.id)))
+
+    db_session.add_all([
+        Document(title=None, filename="antigo.pdf", file_path="/tmp/a.pdf", company_id=company.id, created_at=datetime(2024, 1, 1)),
+        Certificate(type_id=doc_type.id, filename="meio.pdf", file_path="/tmp/b.pdf", company_id=company.id, created_at=datetime(2024, 6, 1)),
+        Document(title="Recente", filename="recente.pdf", file_path="/tmp/c.pdf", company_id=company.id, created_at=datetime(2025, 1, 1)),
+    ])
+    db_session.commit()
+
+    unified = DocumentRepository.get_unified_by_company(db_session, str(company.id))
+
+    assert [d["filename"] for d in unified] == ["recente.pdf", "meio.pdf", "antigo.pdf"]
+    assert set(unified[0].keys()) == {
+        "id", "title", "filename", "expiration_date", "status", "created_at", "is_structured",
+        "type_id", "category_id", "type_name", "category_name", "authentication_code"
+    }
+    assert unified[2]["title"] == "Documento Legado"
+    assert unified[1]["is_structured"] is True
+    assert unified[1]["type_name"] == "CND"
+    assert unified[1]["category_id"] == str(cat.id)
+
+
+# ==========================================
+# 📑 3. PAGINAÇÃO KEYSET E FILTROS
+# ==========================================
+
+def _setup_vault(db_session):
+    """Empresa com 3 legados e 3 certidões (dois tipos), timestamps controlados."""
+    from datetime import datetime
+    from app.models.document_model import Document
+    from app.models.certificate_model import Certificate
+
+    company = Company(cnpj="10101010000110", razao_social="Paginada SA")
+    db_session.add(company)
+    db_session.commit()
+
+    cat = DocumentRepository.create_category(db_session, DocumentCategoryCreate(name="Fiscal", slug="fiscal-pag", order=1))
+    cnd = DocumentRepository.create_type(db_session, DocumentTypeCreate(name="CND", slug="cnd-pag", category_id=str(cat.id)))
+    fgts = DocumentRepository.create_type(db_session, DocumentTypeCreate(name="FGTS", slug="fgts-pag", category_id=str(cat.id)))
+
+    mesmo_instante = datetime(2024, 3, 1, 12, 0, 0)  # Empate proposital (desempate pelo id)
+    db_session.add_all([
+        Document(filename="l1.pdf", file_path="/tmp/l1", company_id=company.id, created_at=datetime(2024, 1, 1), status="valid"),
+        Document(filename="l2.pdf", file_path="/tmp/l2", company_id=company.id, created_at=mesmo_instante, status="expired",
+                 expiration_date=date(2024, 2, 1)),
+        Document(filename="l3.pdf", file_path="/tmp/l3", company_id=company.id, created_at=mesmo_instante, status="valid"),
+        Certificate(type_id=cnd.id, filename="c1.pdf", file_path="/tmp/c1", company_id=company.id, created_at=mesmo_instante,
+                    status="warning", expiration_date=date(2024, 4, 1)),
+        Certificate(type_id=cnd.id, filename="c2.pdf", file_path="/tmp/c2", company_id=company.id, created_at=datetime(2024, 5, 1),
+                    status="valid", expiration_date=date(2025, 1, 1)),
+        Certificate(type_id=fgts.id, filename="c3.pdf", file_path="/tmp/c3", company_id=company.id, created_at=datetime(2024, 6, 1),
+                    status="valid", expiration_date=date(2024, 7, 1)),
+    ])
+    db_session.commit()
+    return company, cat, cnd, fgts
+
+def test_unified_keyset_pagination_walks_whole_vault(db_session):
+    """Percorre o cofre em páginas de 2: sem repetições, sem buracos, mesma ordem da listagem completa."""
+    company, *_ = _setup_vault(db_session)
+    full = DocumentRepository.get_unified_by_company(db_session, str(company.id))
+
+    seen, cursor = [], None
+    while True:
+        page = DocumentRepository.get_unified_by_company(db_session, str(company.id), limit=2, cursor=cursor)
+        seen.extend(page)
+        if len(page) < 2:
+            break
+        cursor = DocumentRepository.encode_cursor(page[-1])
+
+    assert [d["id"] for d in seen] == [d["id"] for d in full]
+    assert len(seen) == 6
+
+def test_unified_keyset_handles_server_default_timestamps(db_session):
+    """Itens com created_at vindo do banco (CURRENT_TIMESTAMP) também paginam sem duplicar."""
+    company = Company(cnpj="20202020000120", razao_social="Agora SA")
+    db_session.add(company)
+    db_session.commit()
+    for i in range(5):
+        DocumentRepository.create_legacy(db_session, title=f"Doc {i}", filename=f"{i}.pdf", file_path=f"/tmp/{i}", company_id=str(company.id))
+
+    first = DocumentRepository.get_unified_by_company(db_session, str(company.id), limit=3)
+    rest = DocumentRepository.get_unified_by_company(
+        db_session, str(company.id), limit=3, cursor=DocumentRepository.encode_cursor(first[-1])
+    )
+    ids = [d["id"] for d in first + rest]
+    assert len(ids) == 5
+    assert len(set(ids)) == 5
+
+def test_unified_keyset_mixed_spellings_at_exact_second(db_session):
+    """
+    SQLite: o mesmo instante gravado como '...:00' (CURRENT_TIMESTAMP) e '...:00.000000' (ORM).
+    Páginas de 1 item cruzando a fronteira do segundo exato: sem repetir nem pular ninguém.
+    """
+    from datetime import datetime
+    from sqlalchemy import text
+    from app.models.document_model import Document
+
+    company = Company(cnpj="21212121000121", razao_social="Grafias SA")
+    db_session.add(company)
+    db_session.commit()
+    exact = datetime(2024, 3, 1, 12, 0, 0)
+    ids = [f"00000000-0000-0000-0000-00000000000{i}" for i in range(1, 7)]
+    db_session.add_all([
+        Document(id=ids[0], filename="antes.pdf", file_path="/tmp/a", company_id=company.id, created_at=datetime(2024, 3, 1, 11, 59, 59, 999999)),
+        Document(id=ids[1], filename="curto1.pdf", file_path="/tmp/b", company_id=company.id, created_at=exact),
+        Document(id=ids[2], filename="longo1.pdf", file_path="/tmp/c", company_id=company.id, created_at=exact),
+        Document(id=ids[3], filename="curto2.pdf", file_path="/tmp/d", company_id=company.id, created_at=exact),
+        Document(id=ids[4], filename="longo2.pdf", file_path="/tmp/e", company_id=company.id, created_at=exact),
+        Document(id=ids[5], filename="depois.pdf", file_path="/tmp/f", company_id=company.id, created_at=datetime(2024, 3, 1, 12, 0, 0, 1)),
+    ])
+    db_session.commit()
+    # Grafia curta, como o server_default grava
+    db_session.execute(text("UPDATE documents SET created_at = '2024-03-01 12:00:00' WHERE filename LIKE 'curto%'"))
+    db_session.commit()
+
+    seen, cursor = [], None
+    while True:
+        page = DocumentRepository.get_unified_by_company(db_session, str(company.id), limit=1, cursor=cursor)
+        seen.extend(page)
+        if not page:
+            break
+        cursor = DocumentRepository.encode_cursor(page[-1])
+
+    # (created_at, id) decrescente: o segundo exato desempata pelo id, seja qual for a grafia
+    assert [d["id"] for d in seen] == [ids[5], ids[4], ids[3], ids[2], ids[1], ids[0]]
+    full = DocumentRepository.get_unified_by_company(db_session, str(company.id))
+    assert [d["id"] for d in full] == [d["id"] for d in seen]
+
+def test_unified_filters_are_pushed_to_both_tables(db_session):
+    company, cat, cnd, fgts = _setup_vault(db_session)
+    cid = str(company.id)
+
+    # Status derivado do vencimento: as datas de 2024/2025 já passaram, só os sem data seguem 'valid'
+    valid = DocumentRepository.get_unified_by_company(db_session, cid, status="valid")
+    assert {d["filename"] for d in valid} == {"l1.pdf", "l3.pdf"}
+    expired = DocumentRepository.get_unified_by_company(db_session, cid, status="expired")
+    assert {d["filename"] for d in expired} == {"l2.pdf", "c1.pdf", "c2.pdf", "c3.pdf"}
+    assert {d["status"] for d in expired} == {"expired"}
+
+    by_type = DocumentRepository.get_unified_by_company(db_session, cid, type_id=str(cnd.id))
+    assert {d["filename"] for d in by_type} == {"c1.pdf", "c2.pdf"}
+
+    by_category = DocumentRepository.get_unified_by_company(db_session, cid, category_id=str(cat.id))
+    assert len(by_category) == 3
+    assert all(d["is_structured"] for d in by_category)
+
+    legacy_only = DocumentRepository.get_unified_by_company(db_session, cid, is_structured=False)
+    assert {d["filename"] for d in legacy_only} == {"l1.pdf", "l2.pdf", "l3.pdf"}
+
+    expiring = DocumentRepository.get_unified_by_company(db_session, cid, expires_before=date(2024, 8, 1))
+    assert {d["filename"] for d in expiring} == {"l2.pdf", "c1.pdf", "c3.pdf"}
+
+    assert DocumentRepository.get_unified_by_company(db_session, cid, is_structured=False, type_id=str(cnd.id)) == []
+
+def test_decode_cursor_invalid():
+    with pytest.raises(ValueError, match="Cursor de paginação inválido"):
+        DocumentRepository.decode_cursor("isso-nao-e-um-cursor")
@@ -5,11 +5,24 @@ permissões (ACL) e o CRUD completo do Catálogo de Tipos e Categorias.
 """
 from fastapi import status
 from unittest.mock import patch, MagicMock
+from datetime import date, timedelta
+import hashlib
+import json
+import re
 import uuid
 
 from app.models.user_model import User, UserRole, UserCompanyLink, UserCompanyRole
 from app.models.company_model import Company
+from app.models.document_model import Document
+from app.models.certificate_model import Certificate
+from app.models.document_category_model import DocumentCategory
+from app.models.document_type_model import DocumentType
 from app.core.security import get_password_hash, create_access_token
+from app.core.storage import StoredFile
+from app.utils.sample_certidao import build_certidao_pdf
+
+# Resultado do ingest usado quando o disco é simulado
+FAKE_STORED = StoredFile(path="storage/uploads/fake.pdf", size=4, sha256="0" * 64)
 
 # ==========================================
 # 🛠️ HELPER: SETUP DE USUÁRIO E EMPRESA
@@ -39,7 +52,7 @@ def test_list_documents_admin_missing_company(admin_client):
     assert response.status_code == status.HTTP_400_BAD_REQUEST
     assert "Admins devem especificar o company_id" in response.json()["detail"]
 
-@patch("app.routers.document_router.DocumentRepository.get_unified_by_company")
+@patch("app.routers.document_router.AsyncDocumentRepository.get_unified_by_company")
 def test_list_documents_client_success(mock_get_unified, db_session, client):
     """Cenário: Cliente lista documentos da sua própria empresa."""
     company, user, token = setup_client_with_company(db_session)
@@ -58,6 +71,91 @@ def test_list_documents_client_success(mock_get_unified, db_session, client):
     assert response.status_code == status.HTTP_200_OK
     assert len(response.json()) == 1
     
+def test_list_documents_keyset_pagination(db_session, client):
+    """Cenário: Cliente pagina o cofre com limit/cursor (cursor vem no header X-Next-Cursor)."""
+    from app.models.document_model import Document
+    company, user, token = setup_client_with_company(db_session)
+    headers = {"Authorization": f"Bearer {token}"}
+    for i in range(3):
+        db_session.add(Document(filename=f"doc{i}.pdf", file_path="/fake", company_id=company.id))
+    db_session.commit()
+
+    first = client.get(f"/documents/?company_id={company.id}&limit=2", headers=headers)
+    assert first.status_code == status.HTTP_200_OK
+    assert len(first.json()) == 2
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = client.get(f"/documents/?company_id={company.id}&limit=2&cursor={cursor}", headers=headers)
+    assert len(second.json()) == 1
+    assert "X-Next-Cursor" not in second.headers
+    ids = {d["id"] for d in first.json() + second.json()}
+    assert len(ids) == 3
+
+def test_list_documents_invalid_cursor(db_session, client):
+    company, user, token = setup_client_with_company(db_session)
+    response = client.get(
+        f"/documents/?company_id={company.id}&limit=2&cursor=lixo",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+def test_list_documents_export_ndjson(db_session, client):
+    """Cenário: Exportação em streaming devolve um JSON por linha, respeitando os filtros."""
+    import json
+    from app.models.document_model import Document
+    company, user, token = setup_client_with_company(db_session)
+    for i in range(3):
+        db_session.add(Document(filename=f"doc{i}.pdf", file_path="/fake", company_id=company.id,
+                                status="expired" if i == 0 else "valid"))
+    db_session.commit()
+
+    response = client.get(
+        f"/documents/?company_id={company.id}&export=ndjson&status=valid&limit=1",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.strip().splitlines()]
+    assert len(rows) == 2  # 'limit' é ignorado na exportação
+    assert all(r["status"] == "valid" and r["is_structured"] is False for r in rows)
+
+def test_list_documents_status_filter_uses_validity_days(db_session, client):
+    """Cenário: Certidão sem vencimento, só com a validade padrão do Tipo: o filtro bate com a listagem."""
+    company, user, token = setup_client_with_company(db_session)
+    headers = {"Authorization": f"Bearer {token}"}
+    category = DocumentCategory(name="Fiscal", slug="fiscal-validade")
+    db_session.add(category)
+    db_session.flush()
+    doc_type = DocumentType(name="CND", slug="cnd-validade", category_id=category.id, validity_days_default=90)
+    db_session.add(doc_type)
+    db_session.flush()
+    db_session.add_all([
+        # Emitida há 100 dias com validade de 90: vencida, embora gravada como 'valid'
+        Certificate(type_id=doc_type.id, filename="vencida.pdf", file_path="/f", company_id=company.id,
+                    status="valid", issue_date=date.today() - timedelta(days=100)),
+        Certificate(type_id=doc_type.id, filename="alerta.pdf", file_path="/f", company_id=company.id,
+                    status="valid", issue_date=date.today() - timedelta(days=70)),
+        Certificate(type_id=doc_type.id, filename="em_dia.pdf", file_path="/f", company_id=company.id,
+                    status="valid", issue_date=date.today() - timedelta(days=10)),
+    ])
+    db_session.commit()
+
+    listing = client.get(f"/documents/?company_id={company.id}", headers=headers).json()
+    assert {d["filename"]: d["status"] for d in listing} == {
+        "vencida.pdf": "expired", "alerta.pdf": "warning", "em_dia.pdf": "valid"
+    }
+
+    expired = client.get(f"/documents/?company_id={company.id}&status=expired", headers=headers).json()
+    assert [d["filename"] for d in expired] == ["vencida.pdf"]
+    warning = client.get(f"/documents/?company_id={company.id}&status=warning", headers=headers).json()
+    assert [d["filename"] for d in warning] == ["alerta.pdf"]
+    valid = client.get(f"/documents/?company_id={company.id}&status=valid", headers=headers).json()
+    assert [d["filename"] for d in valid] == ["em_dia.pdf"]
+    # expires_before usa o mesmo vencimento efetivo (nenhuma delas tem expiration_date)
+    soon = (date.today() + timedelta(days=30)).isoformat()
+    expiring = client.get(f"/documents/?company_id={company.id}&expires_before={soon}", headers=headers).json()
+    assert sorted(d["filename"] for d in expiring) == ["alerta.pdf", "vencida.pdf"]
+
 def test_list_documents_client_forbidden(db_session, client):
     """Cenário QA [Segurança]: Cliente tenta espiar empresa alheia."""
     company, user, token = setup_client_with_company(db_session)
@@ -89,15 +187,15 @@ def test_upload_missing_company(admin_client):
     assert response.status_code == status.HTTP_400_BAD_REQUEST
     assert "destino é obrigatório" in response.json()["detail"]
 
-@patch("app.routers.document_router.save_file_locally", side_effect=Exception("Disco Cheio"))
+@patch("app.routers.document_router.ingest_upload", side_effect=IOError("Disco Cheio"))
 def test_upload_disk_error(mock_save, admin_client):
     """Cenário QA [Resiliência]: Falha física no disco rígido."""
-    files = {"file": ("doc.pdf", b"123", "application/pdf")}
+    files = {"file": ("doc.pdf", b"%PDF-1.4", "application/pdf")}
     response = admin_client.post("/documents/upload", data={"target_company_id": "123"}, files=files)
     assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
     assert "Falha ao salvar arquivo no disco" in response.json()["detail"]
 
-@patch("app.routers.document_router.save_file_locally", return_value="/tmp/fake.pdf")
+@patch("app.routers.document_router.ingest_upload", return_value=FAKE_STORED)
 @patch("app.routers.document_router.DocumentRepository.create_legacy")
 def test_upload_legacy_success(mock_create_legacy, mock_save, admin_client):
     """Cenário: Upload clássico sem type_id."""
@@ -112,8 +210,10 @@ def test_upload_legacy_success(mock_create_legacy, mock_save, admin_client):
     assert response.status_code == status.HTTP_201_CREATED
     assert response.json()["is_structured"] is False
     mock_create_legacy.assert_called_once()
+    assert mock_create_legacy.call_args.kwargs["content_hash"] == FAKE_STORED.sha256
+    assert mock_create_legacy.call_args.kwargs["file_size"] == FAKE_STORED.size
 
-@patch("app.routers.document_router.save_file_locally", return_value="/tmp/fake.pdf")
+@patch("app.routers.document_router.ingest_upload", return_value=FAKE_STORED)
 @patch("app.routers.document_router.DocumentRepository.create_certificate")
 def test_upload_structured_success(mock_create_cert, mock_save, admin_client):
     """Cenário: Upload estruturado COM type_id (Sprint 17)."""
@@ -130,34 +230,318 @@ def test_upload_structured_success(mock_create_cert, mock_save, admin_client):
     assert response.json()["type_id"] == "tipo-alvara"
     mock_create_cert.assert_called_once()
 
+def test_upload_certificate_is_read_in_background(admin_client, db_session):
+    """Certidão nasce 'processing' e a tarefa pós-resposta preenche validade, código e status."""
+    company = Company(cnpj="12345678000199", razao_social="Leitura S.A.")
+    category = DocumentCategory(name="Fiscal", slug="fiscal-upload")
+    db_session.add_all([company, category])
+    db_session.flush()
+    doc_type = DocumentType(name="CND", slug="cnd-upload", category_id=category.id)
+    db_session.add(doc_type)
+    db_session.commit()
+    issue = date.today()
+
+    response = admin_client.post(
+        "/documents/upload",
+        data={"target_company_id": company.id, "type_id": doc_type.id},
+        files={"file": ("cnd.pdf", build_certidao_pdf(company.cnpj, issue, issue + timedelta(days=90)), "application/pdf")},
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json()["status"] == "processing"
+    db_session.expire_all()
+    cert = db_session.get(Certificate, response.json()["id"])
+    assert cert.status == "valid"
+    assert cert.expiration_date == issue + timedelta(days=90)
+    assert cert.authentication_code == "A1B2.C3D4.E5F6.0789"
+
+@patch("app.routers.document_router.DocumentRepository.create_legacy")
+def test_upload_rejects_fake_pdf_and_oversize(mock_create_legacy, admin_client, isolated_storage):
+    """
+    Cenário QA [Segurança]: '.pdf' que não é PDF (415) e arquivo acima do limite (413).
+    Resultado Esperado: nada registrado no banco e nada no disco.
+    """
+    data = {"target_company_id": "123"}
+    fake = {"file": ("doc.pdf", b"GIF89a imagem renomeada", "application/pdf")}
+    assert admin_client.post("/documents/upload", data=data, files=fake).status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+
+    with patch("app.core.storage.UPLOAD_MAX_BYTES", 16), patch("app.core.storage.UPLOAD_CHUNK_SIZE", 8):
+        big = {"file": ("doc.pdf", b"%PDF-1.4" + b"0" * 64, "application/pdf")}
+        assert admin_client.post("/documents/upload", data=data, files=big).status_code == status.HTTP_413_CONTENT_TOO_LARGE
+
+    mock_create_legacy.assert_not_called()
+    assert not any(path.is_file() for path in (isolated_storage / "storage").rglob("*"))
+
+def _bulk_setup(db_session):
+    company = Company(cnpj="12345678000199", razao_social="Onboarding S.A.")
+    category = DocumentCategory(name="Fiscal", slug="fiscal-lote")
+    db_session.add_all([company, category])
+    db_session.flush()
+    doc_type = DocumentType(name="CND", slug="cnd-lote", category_id=category.id)
+    db_session.add(doc_type)
+    db_session.commit()
+    return company, doc_type
+
+def _bulk_post(admin_client, company_id, files, manifest):
+    return admin_client.post(
+        "/documents/upload/bulk",
+        data={"target_company_id": company_id, "manifest": json.dumps(manifest)},
+        files=[("files", (name, content, "application/pdf")) for name, content in files],
+    )
+
+def test_bulk_upload_single_insert_per_table(admin_client, db_session, query_counter, isolated_storage):
+    """
+    Cenário: onboarding com certidões + um documento legado (e um PDF repetido).
+    Resultado Esperado: um INSERT por tabela, blob repetido gravado uma vez, leitura em segundo plano.
+    """
+    company, doc_type = _bulk_setup(db_session)
+    issue = date.today()
+    pdfs = [build_certidao_pdf(company.cnpj, issue, authentication_code=f"{n:04X}.B2C3.D4E5.F6A7") for n in range(3)]
+    files = [("cnd_0.pdf", pdfs[0]), ("cnd_1.pdf", pdfs[1]), ("cnd_2.pdf", pdfs[2]), ("copia.pdf", pdfs[0]), ("contrato.pdf", b"%PDF-1.4 contrato")]
+    manifest = [{"type_id": doc_type.id} for _ in range(4)] + [{"filename": "contrato.pdf", "title": "Contrato Social"}]
+    query_counter.clear()
+
+    response = _bulk_post(admin_client, company.id, files, manifest)
+
+    assert response.status_code == status.HTTP_201_CREATED
+    body = response.json()
+    assert (body["created"], body["failed"]) == (5, 0)
+    assert [item["status_code"] for item in body["results"]] == [201] * 5
+    assert body["results"][4]["document"]["title"] == "Contrato Social"
+    assert body["results"][0]["document"]["status"] == "processing"
+
+    assert len([sql for sql in query_counter if sql.startswith("INSERT INTO certificates")]) == 1
+    assert len([sql for sql in query_counter if sql.startswith("INSERT INTO documents")]) == 1
+    # Depois do INSERT, o lote volta num SELECT por tabela: nada de recarregar linha a linha
+    after_insert = query_counter[next(i for i, sql in enumerate(query_counter) if sql.startswith("INSERT INTO")):]
+    assert not [sql for sql in after_insert if re.match(r"SELECT .*\sWHERE (documents|certificates)\.id = \?", sql, re.S)]
+    # 'copia.pdf' reaproveita o blob de 'cnd_0.pdf'
+    assert len([path for path in (isolated_storage / "storage" / "blobs").rglob("*") if path.is_file()]) == 4
+
+    # A tarefa pós-resposta leu as certidões do lote
+    db_session.expire_all()
+    certs = db_session.query(Certificate).order_by(Certificate.filename).all()
+    assert [cert.status for cert in certs] == ["valid"] * 4
+    assert certs[1].authentication_code == "0001.B2C3.D4E5.F6A7"
+
+def test_bulk_upload_reports_each_file(admin_client, db_session):
+    """Cenário: arquivos ruins no meio do lote. Resultado Esperado: 207, os bons registrados."""
+    company, doc_type = _bulk_setup(db_session)
+    files = [
+        ("ok.pdf", b"%PDF-1.4 ok"),
+        ("foto.png", b"%PDF-1.4 nome errado"),
+        ("tipo.pdf", b"%PDF-1.4 tipo"),
+        ("falso.pdf", b"GIF89a imagem renomeada"),
+    ]
+    manifest = [{}, {}, {"type_id": "nao-existe"}, {"type_id": doc_type.id}]
+
+    response = _bulk_post(admin_client, company.id, files, manifest)
+
+    assert response.status_code == status.HTTP_207_MULTI_STATUS
+    body = response.json()
+    assert (body["created"], body["failed"]) == (1, 3)
+    assert [item["status_code"] for item in body["results"]] == [201, 400, 400, 415]
+    assert body["results"][2]["detail"] == "Tipo de documento não encontrado."
+    assert db_session.query(Certificate).count() == 0
+
+def test_bulk_upload_rejects_bad_manifest(admin_client, db_session):
+    company, doc_type = _bulk_setup(db_session)
+    files = [("a.pdf", b"%PDF-1.4 a"), ("b.pdf", b"%PDF-1.4 b")]
+
+    not_json = admin_client.post(
+        "/documents/upload/bulk", data={"target_company_id": company.id, "manifest": "{quebrado"},
+        files=[("files", (name, content, "application/pdf")) for name, content in files],
+    )
+    assert not_json.status_code == status.HTTP_400_BAD_REQUEST
+    assert "Manifesto inválido" in not_json.json()["detail"]
+
+    assert _bulk_post(admin_client, company.id, files, [{}]).status_code == status.HTTP_400_BAD_REQUEST
+    wrong_order = _bulk_post(admin_client, company.id, files, [{"filename": "b.pdf"}, {"filename": "a.pdf"}])
+    assert "fora de ordem" in wrong_order.json()["detail"]
+    assert _bulk_post(admin_client, "empresa-inexistente", files, [{}, {}]).status_code == status.HTTP_404_NOT_FOUND
+
+def test_bulk_upload_forbidden_client(db_session, client):
+    company, _, token = setup_client_with_company(db_session)
+    client.headers["Authorization"] = f"Bearer {token}"
+    response = _bulk_post(client, company.id, [("a.pdf", b"%PDF-1.4 a")], [{}])
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+@patch("app.routers.document_router.DocumentRepository.create_bulk", side_effect=ValueError("banco fora"))
+def test_bulk_upload_db_failure_discards_files(mock_create_bulk, admin_client, db_session, isolated_storage, run_storage_gc):
+    """Cenário: o INSERT do lote falha. Resultado Esperado: o GC não deixa blob órfão (nem o repetido)."""
+    company, doc_type = _bulk_setup(db_session)
+    files = [("a.pdf", b"%PDF-1.4 a"), ("b.pdf", b"%PDF-1.4 a"), ("c.pdf", b"%PDF-1.4 c")]
+
+    response = _bulk_post(admin_client, company.id, files, [{}, {}, {}])
+
+    assert response.status_code == status.HTTP_207_MULTI_STATUS
+    assert [item["status_code"] for item in response.json()["results"]] == [500, 500, 500]
+    assert run_storage_gc() == 1
+    assert not any(path.is_file() for path in (isolated_storage / "storage").rglob("*"))
+
 # ==========================================
 # 📥 3. TESTES DE DOWNLOAD
 # ==========================================
 
 @patch("app.routers.document_router.DocumentRepository.get_file_path", return_value=None)
-def test_download_not_found_in_db(mock_get_path, admin_client):
+def test_download_not_found_in_db(mock_get_meta, admin_client):
     response = admin_client.get("/documents/123/download")
     assert response.status_code == status.HTTP_404_NOT_FOUND
     assert "não encontrado" in response.json()["detail"]
 
-@patch("app.routers.document_router.os.path.exists", return_value=False)
-@patch("app.routers.document_router.DocumentRepository.get_file_path", return_value="/mock/sumiu.pdf")
-def test_download_not_found_on_disk(mock_get_path, mock_exists, admin_client):
+@patch("app.routers.document_router.DocumentRepository.get_file_path")
+def test_download_not_found_on_disk(mock_get_meta, admin_client):
+    mock_get_meta.return_value = MagicMock(file_path="/mock/sumiu.pdf", filename="sumiu.pdf", company_id="c1", content_hash=None, created_at=None)
     response = admin_client.get("/documents/123/download")
     assert response.status_code == status.HTTP_404_NOT_FOUND
     assert "físico não encontrado" in response.json()["detail"]
 
 @patch("app.routers.document_router.DocumentRepository.get_file_path")
-def test_download_success(mock_get_path, admin_client, tmp_path):
+def test_download_success(mock_get_meta, admin_client, tmp_path):
     """Cenário: Sucesso usando tmp_path para o FileResponse funcionar perfeitamente!"""
     arquivo_real = tmp_path / "alvara.pdf"
     arquivo_real.write_bytes(b"%PDF-1.4 Fake PDF")
     
-    mock_get_path.return_value = str(arquivo_real)
+    mock_get_meta.return_value = MagicMock(file_path=str(arquivo_real), filename=None, company_id="c1", content_hash=None, created_at=None)
     
     response = admin_client.get("/documents/123/download")
     assert response.status_code == status.HTTP_200_OK
     assert response.content == b"%PDF-1.4 Fake PDF"
+    assert response.headers["content-type"] == "application/pdf"
+    assert 'filename="alvara.pdf"' in response.headers["content-disposition"]
+
+def _uploaded_document(admin_client, db_session, content: bytes) -> str:
+    company = Company(cnpj="45454545000145", razao_social="Cache S.A.")
+    db_session.add(company)
+    db_session.commit()
+    response = admin_client.post(
+        "/documents/upload",
+        data={"target_company_id": company.id, "title": "CND"},
+        files={"file": ("cnd.pdf", content, "application/pdf")},
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    return response.json()["id"]
+
+def test_download_conditional_get_answers_304_without_storage(admin_client, db_session):
+    """ETag = hash do conteúdo; If-None-Match que bate vira 304 sem abrir o arquivo."""
+    content = b"%PDF-1.4 certidao com cache"
+    doc_id = _uploaded_document(admin_client, db_session, content)
+
+    first = admin_client.get(f"/documents/{doc_id}/download")
+    etag = first.headers["etag"]
+    assert first.status_code == status.HTTP_200_OK
+    assert etag.strip('"') == hashlib.sha256(content).hexdigest()
+    assert first.headers["last-modified"]
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    with patch("app.core.storage.get_backend", side_effect=AssertionError("tocou no storage")):
+        cached = admin_client.get(f"/documents/{doc_id}/download", headers={"If-None-Match": etag})
+        by_date = admin_client.get(
+            f"/documents/{doc_id}/download", headers={"If-Modified-Since": first.headers["last-modified"]}
+        )
+    assert cached.status_code == by_date.status_code == status.HTTP_304_NOT_MODIFIED
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    changed = admin_client.get(f"/documents/{doc_id}/download", headers={"If-None-Match": '"outro"'})
+    assert changed.status_code == status.HTTP_200_OK
+
+def test_download_range_returns_partial_content(admin_client, db_session):
+    content = b"%PDF-1.4 " + bytes(range(256)) * 4
+    doc_id = _uploaded_document(admin_client, db_session, content)
+
+    response = admin_client.get(f"/documents/{doc_id}/download", headers={"Range": "bytes=9-24"})
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert response.content == content[9:25]
+    assert response.headers["content-range"] == f"bytes 9-24/{len(content)}"
+
+    etag = response.headers["etag"]
+    stale = admin_client.get(f"/documents/{doc_id}/download", headers={"Range": "bytes=0-9", "If-Range": '"velho"'})
+    assert stale.status_code == status.HTTP_200_OK and stale.content == content
+    fresh = admin_client.get(f"/documents/{doc_id}/download", headers={"Range": "bytes=0-9", "If-Range": etag})
+    assert fresh.status_code == status.HTTP_206_PARTIAL_CONTENT
+
+def test_download_offload_to_proxy(admin_client, db_session, isolated_storage, monkeypatch):
+    """Com DOWNLOAD_OFFLOAD a API só devolve o header; o proxy envia os bytes."""
+    content = b"%PDF-1.4 enviado pelo nginx"
+    doc_id = _uploaded_document(admin_client, db_session, content)
+    blob = f"storage/blobs/{hashlib.sha256(content).hexdigest()[:2]}"
+
+    monkeypatch.setattr("app.core.storage.DOWNLOAD_OFFLOAD", "x-accel-redirect")
+    with patch("app.core.storage.os.path.isfile", side_effect=AssertionError("tocou no disco")):
+        accel = admin_client.get(f"/documents/{doc_id}/download")
+    assert accel.status_code == status.HTTP_200_OK
+    assert accel.content == b""
+    assert accel.headers["x-accel-redirect"].startswith(f"/_protected/{blob}/")
+    assert accel.headers["content-disposition"] == 'attachment; filename="cnd.pdf"'
+    assert accel.headers["etag"]
+
+    monkeypatch.setattr("app.core.storage.DOWNLOAD_OFFLOAD", "x-sendfile")
+    sendfile = admin_client.get(f"/documents/{doc_id}/download")
+    assert sendfile.headers["x-sendfile"].startswith(str(isolated_storage / blob))
+
+@patch("app.routers.document_router.DocumentRepository.get_file_path")
+def test_download_offload_falls_back_for_absolute_paths(mock_get_meta, admin_client, tmp_path, monkeypatch):
+    """Caminho absoluto antigo fica fora da location interna do nginx: a API serve o arquivo."""
+    arquivo = tmp_path / "antigo.pdf"
+    arquivo.write_bytes(b"%PDF-1.4 antigo")
+    mock_get_meta.return_value = MagicMock(file_path=str(arquivo), filename="antigo.pdf", company_id="c1", content_hash=None, created_at=None)
+    monkeypatch.setattr("app.core.storage.DOWNLOAD_OFFLOAD", "x-accel-redirect")
+
+    response = admin_client.get("/documents/123/download")
+    assert "x-accel-redirect" not in response.headers
+    assert response.content == b"%PDF-1.4 antigo"
+
+def test_signed_download_url_skips_db_and_jwt(admin_client, client, db_session, query_counter):
+    content = b"%PDF-1.4 visualizador"
+    doc_id = _uploaded_document(admin_client, db_session, content)
+
+    issued = admin_client.post(f"/documents/{doc_id}/download-url")
+    assert issued.status_code == status.HTTP_200_OK
+    url = issued.json()["url"]
+    assert url.startswith("/documents/signed/")
+
+    client.headers.pop("Authorization", None) # Sem JWT
+    query_counter.clear()
+    response = client.get(url, headers={"Range": "bytes=0-7"})
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert response.content == content[:8]
+    assert response.headers["etag"] == f'"{hashlib.sha256(content).hexdigest()}"'
+    assert query_counter == [] # Nenhuma query
+
+    forged = url[:-3] + ("AAA" if not url.endswith("AAA") else "BBB")
+    assert client.get(forged).status_code == status.HTTP_403_FORBIDDEN
+
+def test_signed_download_url_unknown_item(admin_client):
+    response = admin_client.post("/documents/nao-existe/download-url")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+def test_signed_download_url_refuses_legacy_files(admin_client, db_session):
+    """Arquivo legado (fora do blob store) não tem caminho derivável do hash: sem link assinado."""
+    company = Company(cnpj="46464646000146", razao_social="Legado S.A.")
+    db_session.add(company)
+    db_session.commit()
+    doc = Document(filename="antigo.pdf", file_path="storage/uploads/antigo.pdf", content_hash="ab" * 32, company_id=company.id)
+    db_session.add(doc)
+    db_session.commit()
+
+    response = admin_client.post(f"/documents/{doc.id}/download-url")
+    assert response.status_code == status.HTTP_409_CONFLICT
+
+def test_download_checks_company_ownership(admin_client, client, db_session):
+    """Cliente só baixa (ou gera link) de itens das empresas a que está vinculado."""
+    own_company, _, token = setup_client_with_company(db_session)
+    other_doc = _uploaded_document(admin_client, db_session, b"%PDF-1.4 de outra empresa")
+    own = admin_client.post(
+        "/documents/upload",
+        data={"target_company_id": own_company.id, "title": "Meu"},
+        files={"file": ("meu.pdf", b"%PDF-1.4 meu", "application/pdf")},
+    ).json()["id"]
+
+    client.headers["Authorization"] = f"Bearer {token}" # Mesmo TestClient do admin_client: troca o usuário
+    assert client.get(f"/documents/{own}/download").status_code == status.HTTP_200_OK
+    assert client.get(f"/documents/{other_doc}/download").status_code == status.HTTP_403_FORBIDDEN
+    assert client.post(f"/documents/{other_doc}/download-url").status_code == status.HTTP_403_FORBIDDEN
 
 # ==========================================
 # 🗂️ 4. TESTES DE CATÁLOGO (CATEGORIAS E TIPOS)
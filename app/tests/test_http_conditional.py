@@ -0,0 +1,64 @@
+"""
+Testes Unitários: GET Condicional e Range dos Downloads.
+Cobre a precedência If-None-Match x If-Modified-Since, a comparação fraca
+de ETags e a interpretação dos intervalos 'bytes='.
+"""
+import pytest
+from datetime import datetime, timezone
+
+from app.utils.http_conditional import (
+    RangeNotSatisfiable, is_not_modified, requested_range, validators, http_date,
+)
+
+ETAG = '"abc123"'
+MODIFIED = datetime(2026, 3, 1, 12, 30, 15, 500000)
+
+
+def test_validators_only_emit_known_values():
+    assert validators(None, None) == {}
+    headers = validators("abc123", MODIFIED)
+    assert headers == {"ETag": ETAG, "Last-Modified": "Sun, 01 Mar 2026 12:30:15 GMT"}
+
+
+def test_if_none_match_takes_precedence():
+    assert is_not_modified({"if-none-match": ETAG}, ETAG, MODIFIED)
+    assert is_not_modified({"if-none-match": f'"x", W/{ETAG}'}, ETAG, MODIFIED)
+    assert is_not_modified({"if-none-match": "*"}, ETAG, MODIFIED)
+    # ETag diferente: 200, mesmo com If-Modified-Since no futuro
+    assert not is_not_modified(
+        {"if-none-match": '"x"', "if-modified-since": "Fri, 01 Jan 2100 00:00:00 GMT"}, ETAG, MODIFIED
+    )
+    # Sem ETag conhecido (upload antigo) não dá para confirmar
+    assert not is_not_modified({"if-none-match": ETAG}, None, MODIFIED)
+
+
+def test_if_modified_since_uses_second_resolution():
+    assert is_not_modified({"if-modified-since": http_date(MODIFIED)}, ETAG, MODIFIED)
+    assert not is_not_modified({"if-modified-since": "Sun, 01 Mar 2026 12:30:14 GMT"}, ETAG, MODIFIED)
+    assert not is_not_modified({"if-modified-since": "lixo"}, ETAG, MODIFIED)
+    assert is_not_modified({"if-modified-since": http_date(MODIFIED)}, None, MODIFIED.replace(tzinfo=timezone.utc))
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-9", (0, 9)),
+    ("bytes=90-", (90, 99)),
+    ("bytes=-10", (90, 99)),
+    ("bytes=-500", (0, 99)),
+    ("bytes=95-200", (95, 99)),
+    ("bytes=0-1,5-6", None),   # Múltiplos intervalos: arquivo inteiro
+    ("items=0-9", None),
+    ("bytes=abc", None),
+    ("bytes=9-2", None),
+])
+def test_requested_range(header, expected):
+    assert requested_range({"range": header}, 100, {"ETag": ETAG}) == expected
+
+
+def test_requested_range_unsatisfiable_and_if_range():
+    with pytest.raises(RangeNotSatisfiable):
+        requested_range({"range": "bytes=100-"}, 100, {})
+    with pytest.raises(RangeNotSatisfiable):
+        requested_range({"range": "bytes=-0"}, 100, {})
+
+    assert requested_range({"range": "bytes=0-9", "if-range": ETAG}, 100, {"ETag": ETAG}) == (0, 9)
+    assert requested_range({"range": "bytes=0-9", "if-range": '"velho"'}, 100, {"ETag": ETAG}) is None
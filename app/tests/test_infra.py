@@ -4,11 +4,12 @@ Valida o comportamento do sistema quando o 'mundo real' falha
 (ex: HD cheio, Falta de Variáveis de Ambiente, Queda de API).
 """
 import pytest
-from unittest.mock import patch, mock_open, MagicMock
+from io import BytesIO
+from unittest.mock import patch, MagicMock
 from fastapi import UploadFile
 
 from app.core.ai_client import AIClient
-from app.core.storage import save_file_locally, init_storage
+from app.core.storage import ingest_upload, init_storage, UploadTooLarge, UnsupportedFileType
 
 # ==========================================
 # 🤖 1. TESTES DO AI CLIENT (Google Gemini)
@@ -73,36 +74,322 @@ def test_init_storage(mock_makedirs):
     init_storage()
     mock_makedirs.assert_called_once()
 
-@patch("app.core.storage.shutil.copyfileobj")
-@patch("builtins.open", new_callable=mock_open) # Intercepta a abertura de arquivos!
-@patch("app.core.storage.os.makedirs")
-def test_save_file_locally_success(mock_makedirs, mock_file_open, mock_copy):
-    """Cenário: UploadFile salvo com sucesso simulando gravação no disco."""
-    # 1. Setup de um arquivo falso do FastAPI
-    mock_upload_file = MagicMock(spec=UploadFile)
-    mock_upload_file.filename = "meu_contrato.pdf"
-    mock_upload_file.file = MagicMock()
-    
-    # 2. Ação
-    path = save_file_locally(mock_upload_file)
-    
-    # 3. Validação
-    assert path is not None
-    assert path.endswith(".pdf")
-    mock_file_open.assert_called_once() # Garante que tentou abrir o disco
-    mock_copy.assert_called_once()      # Garante que transferiu os bytes
+def _upload(content: bytes, filename: str = "contrato.pdf", size=None) -> UploadFile:
+    return UploadFile(file=BytesIO(content), filename=filename, size=size)
 
-@patch("builtins.open", side_effect=PermissionError("Acesso Negado"))
-@patch("app.core.storage.os.makedirs")
-def test_save_file_locally_io_error(mock_makedirs, mock_file_open):
+def _stored_files(root):
+    """Todos os arquivos gravados sob storage/ (inclui temporários esquecidos)."""
+    return sorted(str(path.relative_to(root)) for path in (root / "storage").rglob("*") if path.is_file())
+
+def test_ingest_upload_hashes_and_renames(isolated_storage):
+    """Cenário: PDF válido lido em blocos; SHA-256 e tamanho batem e não sobra arquivo temporário."""
+    import asyncio, hashlib
+    content = b"%PDF-1.7\n" + b"x" * 10_000
+    sha256 = hashlib.sha256(content).hexdigest()
+
+    stored = asyncio.run(ingest_upload(_upload(content), chunk_size=1024))
+
+    assert stored.path == f"storage/blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+    assert (stored.size, stored.sha256, stored.deduplicated) == (len(content), sha256, False)
+    assert _stored_files(isolated_storage) == [stored.path]
+    assert (isolated_storage / stored.path).read_bytes() == content
+
+def test_ingest_upload_deduplicates_same_content(isolated_storage):
+    """Cenário: o mesmo conteúdo enviado de novo (outro nome) reaproveita o blob, sem gravar nada."""
+    import asyncio
+    content = b"%PDF-1.4 CND Federal"
+
+    first = asyncio.run(ingest_upload(_upload(content, "cnd.pdf")))
+    again = asyncio.run(ingest_upload(_upload(content, "cnd_copia.pdf")))
+
+    assert again.path == first.path and again.deduplicated
+    assert _stored_files(isolated_storage) == [first.path]
+
+def test_ingest_upload_dedup_refreshes_blob_mtime(isolated_storage):
+    """Cenário: reusar um blob antigo renova o mtime dele (o GC poupa o que foi tocado na carência)."""
+    import asyncio, os, time
+    content = b"%PDF-1.4 CND reaproveitada"
+    first = asyncio.run(ingest_upload(_upload(content)))
+    blob = isolated_storage / first.path
+    old = time.time() - 86_400
+    os.utime(blob, (old, old))
+
+    again = asyncio.run(ingest_upload(_upload(content)))
+
+    assert again.deduplicated
+    assert blob.stat().st_mtime > old + 3600
+
+def test_storage_gc_spares_blob_touched_within_grace(db_session, isolated_storage, monkeypatch):
+    """Cenário: blob sem referência, mas tocado há pouco por uma deduplicação, sobrevive ao GC."""
+    import asyncio, os, time
+    from app.repositories import blob_repository
+    from app.repositories.blob_repository import BlobRepository
+    monkeypatch.setattr(blob_repository, "STORAGE_GC_GRACE_SECONDS", 3600)
+    fresh = asyncio.run(ingest_upload(_upload(b"%PDF-1.4 recem enviado")))
+    stale = asyncio.run(ingest_upload(_upload(b"%PDF-1.4 esquecido")))
+    old = time.time() - 7200
+    os.utime(isolated_storage / stale.path, (old, old))
+
+    assert BlobRepository.collect(db_session, [fresh.path, stale.path]) == 1
+    assert (isolated_storage / fresh.path).exists()
+    assert not (isolated_storage / stale.path).exists()
+
+def test_ingest_upload_aborts_mid_stream_when_too_large(isolated_storage):
     """
-    Cenário QA [Estresse]: O disco rígido negou permissão de escrita ou está cheio.
-    Resultado Esperado: O sistema deve capturar a Exception e lançar um IOError limpo.
+    Cenário QA [Estresse]: o tamanho não vem no multipart e o arquivo passa do limite.
+    Resultado Esperado: UploadTooLarge no meio da leitura e nenhum arquivo (nem o .part) no disco.
     """
-    mock_upload_file = MagicMock(spec=UploadFile)
-    mock_upload_file.filename = "virus.exe"
-    
+    import asyncio
+    upload = _upload(b"%PDF-1.4" + b"0" * 5000)
+    reads = []
+    original_read = upload.read
+
+    async def counting_read(size):
+        reads.append(size)
+        return await original_read(size)
+
+    upload.read = counting_read
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(ingest_upload(upload, max_bytes=2048, chunk_size=1024))
+
+    assert len(reads) == 3 # Parou no bloco que estourou, sem ler o resto
+    assert _stored_files(isolated_storage) == []
+
+def test_ingest_upload_rejects_declared_size_before_reading():
+    import asyncio
+    upload = _upload(b"%PDF-1.4", size=10_000)
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(ingest_upload(upload, max_bytes=1024))
+    assert upload.file.tell() == 0
+
+def test_ingest_upload_sniffs_pdf_magic(isolated_storage):
+    """Extensão .pdf não basta: o conteúdo precisa trazer '%PDF-' no começo."""
+    import asyncio
+    with pytest.raises(UnsupportedFileType):
+        asyncio.run(ingest_upload(_upload(b"MZ\x90\x00 executavel", "virus.pdf")))
+    with pytest.raises(UnsupportedFileType):
+        asyncio.run(ingest_upload(_upload(b"", "vazio.pdf")))
+    assert _stored_files(isolated_storage) == []
+
+    # Sem exigência de PDF (ex: foto do documento de identidade)
+    stored = asyncio.run(ingest_upload(_upload(b"\xff\xd8\xff foto", "rg.jpg"), require_pdf=False))
+    assert _stored_files(isolated_storage) == [stored.path]
+
+def test_ingest_upload_io_error_cleans_up(isolated_storage):
+    """Cenário QA [Estresse]: falha de leitura no meio do stream vira IOError limpo, sem lixo no disco."""
+    import asyncio
+    upload = _upload(b"%PDF-1.4 conteudo")
+    upload.read = MagicMock(side_effect=OSError("Disco Cheio"))
+
     with pytest.raises(IOError) as exc_info:
-        save_file_locally(mock_upload_file)
-        
-    assert "Falha ao gravar arquivo no disco" in str(exc_info.value)
\ No newline at end of file
+        asyncio.run(ingest_upload(upload))
+
+    assert "Falha ao gravar arquivo no disco" in str(exc_info.value)
+    assert _stored_files(isolated_storage) == []
+
+# ==========================================
+# 🗄️ 3. TESTES DO POOL DE CONEXÕES (Banco)
+# ==========================================
+
+def test_sqlite_pragmas_applied_on_connect(tmp_path):
+    """Cada conexão nova do SQLite sai em WAL, synchronous=NORMAL e com busy_timeout."""
+    from sqlalchemy import text
+    from app.core.database import build_engine, SQLITE_BUSY_TIMEOUT_MS
+
+    engine = build_engine(f"sqlite:///{tmp_path / 'pragmas.db'}")
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1 # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == SQLITE_BUSY_TIMEOUT_MS
+    engine.dispose()
+
+def test_pool_metrics_count_checkouts_and_timeouts(tmp_path):
+    """
+    Cenário QA [Saturação]: pool de 1 conexão sem overflow, segunda requisição esgota o timeout.
+    Resultado Esperado: TimeoutError ('QueuePool limit') contabilizado nas métricas.
+    """
+    from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+    from app.core.database import build_engine, get_pool_stats
+
+    engine = build_engine(f"sqlite:///{tmp_path / 'pool.db'}", pool_size=1, max_overflow=0, pool_timeout=0.05)
+    held = engine.connect()
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+
+    stats = get_pool_stats(engine)
+    assert stats["pool_class"] == "InstrumentedQueuePool"
+    assert (stats["size"], stats["checked_out"], stats["overflow"]) == (1, 1, 0)
+    assert stats["checkouts"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["wait_ms"]["max"] >= 50
+
+    held.close()
+    engine.dispose() # Recria o pool mantendo os contadores
+    assert get_pool_stats(engine)["timeouts"] == 1
+
+def test_pool_timeout_returns_503(client):
+    """O esgotamento do pool vira 503 + Retry-After (não um 500 genérico)."""
+    from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+    from app.main import app
+    from app.core.database import get_db
+
+    def exhausted_pool():
+        raise PoolTimeoutError("QueuePool limit of size 1 overflow 0 reached")
+
+    app.dependency_overrides[get_db] = exhausted_pool
+    response = client.get("/documents/types")
+
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+
+def test_admin_metrics_exposes_db_pool(admin_client):
+    data = admin_client.get("/admin/metrics").json()
+    assert "pool_class" in data["db_pool"]
+
+# ==========================================
+# ⚡ 4. TESTES DO ENGINE ASSÍNCRONO
+# ==========================================
+
+def test_to_async_url_maps_drivers():
+    from app.core.database import to_async_url
+
+    assert to_async_url("postgresql://u:p@db/licita") == "postgresql+asyncpg://u:p@db/licita"
+    assert to_async_url("postgresql+psycopg2://u:p@db/licita") == "postgresql+asyncpg://u:p@db/licita"
+    assert to_async_url("sqlite:///./licita_doc.db") == "sqlite+aiosqlite:///./licita_doc.db"
+    assert to_async_url("sqlite+aiosqlite:///./x.db") == "sqlite+aiosqlite:///./x.db"
+
+def test_async_engine_pool_and_pragmas(tmp_path):
+    """O engine async usa o mesmo pool instrumentado e os mesmos PRAGMAs do síncrono."""
+    import asyncio
+    from sqlalchemy import text
+    from app.core.database import build_async_engine, get_pool_stats
+
+    engine = build_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}", pool_size=2, max_overflow=0)
+
+    async def run():
+        async with engine.connect() as conn:
+            journal = (await conn.execute(text("PRAGMA journal_mode"))).scalar()
+        stats = get_pool_stats(engine)
+        await engine.dispose()
+        return journal, stats
+
+    journal, stats = asyncio.run(run())
+    assert journal == "wal"
+    assert stats["pool_class"] == "InstrumentedAsyncQueuePool"
+    assert stats["checkouts"] == 1
+
+# ==========================================
+# 🔀 5. TESTES DAS RÉPLICAS DE LEITURA
+# ==========================================
+
+def _replica_cluster(tmp_path, replicas=2):
+    """Primário + N réplicas em arquivos SQLite distintos, cada um com uma linha identificando o nó."""
+    from sqlalchemy import MetaData, Table, Column, String
+    from app.core.database import build_engine
+
+    node = Table("node", MetaData(), Column("name", String))
+    engines = {}
+    for name in ["primary"] + [f"replica{n}" for n in range(1, replicas + 1)]:
+        engines[name] = build_engine(f"sqlite:///{tmp_path / name}.db")
+        node.metadata.create_all(engines[name])
+        with engines[name].begin() as conn:
+            conn.execute(node.insert().values(name=name))
+    return node, engines
+
+def test_routing_session_round_robin_and_read_your_writes(tmp_path):
+    """
+    Cenário: leituras alternam entre as réplicas (uma por sessão);
+    depois de uma escrita, a sessão lê do primário (vê o que acabou de gravar).
+    """
+    from sqlalchemy import select
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import ReplicaSet, RoutingSession, use_primary, is_routed
+
+    node, engines = _replica_cluster(tmp_path)
+    replicas = ReplicaSet([engines["replica1"], engines["replica2"]], health_interval=3600)
+    Routed = sessionmaker(bind=engines["primary"], class_=RoutingSession, replicas=replicas)
+
+    served = []
+    for _ in range(4):
+        with Routed() as db:
+            served.append(db.execute(select(node.c.name)).scalar())
+            assert db.execute(select(node.c.name)).scalar() == served[-1] # Mesma réplica na sessão toda
+    assert served == ["replica1", "replica2", "replica1", "replica2"]
+
+    with Routed() as db:
+        db.execute(node.insert().values(name="novo"))
+        assert not is_routed(db)
+        assert sorted(db.execute(select(node.c.name)).scalars()) == ["novo", "primary"]
+        db.commit()
+
+    with Routed() as db:
+        use_primary(db)
+        assert "novo" in db.execute(select(node.c.name)).scalars().all()
+
+def test_replica_health_check_and_primary_fallback(tmp_path):
+    """Cenário: réplica inacessível sai da rotação; sem réplica saudável, lê do primário; ao voltar, reentra."""
+    from sqlalchemy import select
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import ReplicaSet, RoutingSession, build_engine
+
+    node, engines = _replica_cluster(tmp_path, replicas=1)
+    broken = build_engine(f"sqlite:///{tmp_path / 'ausente' / 'replica.db'}")  # Diretório ainda não existe
+    replicas = ReplicaSet([broken, engines["replica1"]], health_interval=3600)
+
+    assert replicas.check_health() == [False, True]
+    assert {replicas.pick() for _ in range(4)} == {1}
+
+    replicas.mark(1, healthy=False)
+    Routed = sessionmaker(bind=engines["primary"], class_=RoutingSession, replicas=replicas)
+    with Routed() as db:
+        assert db.execute(select(node.c.name)).scalar() == "primary"
+
+    (tmp_path / "ausente").mkdir()
+    assert replicas.check_health() == [True, True]
+    stats = replicas.stats()
+    assert stats[0]["ejections"] == 1 and stats[1]["healthy"]
+
+def test_get_db_routes_only_read_methods(tmp_path, monkeypatch):
+    """GET/HEAD recebem a sessão roteada; POST/PUT/DELETE ficam no primário."""
+    from types import SimpleNamespace
+    from sqlalchemy.orm import sessionmaker
+    from app.core import database
+    from app.core.database import ReplicaSet, RoutingSession
+
+    _, engines = _replica_cluster(tmp_path, replicas=1)
+    replicas = ReplicaSet([engines["replica1"]], health_interval=3600)
+    monkeypatch.setattr(database, "replica_set", replicas)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=engines["primary"]))
+    monkeypatch.setattr(database, "RoutedSessionLocal", sessionmaker(bind=engines["primary"], class_=RoutingSession, replicas=replicas))
+
+    for method, routed in [("GET", True), ("HEAD", True), ("POST", False), ("DELETE", False)]:
+        session_gen = database.get_db(SimpleNamespace(method=method))
+        db = next(session_gen)
+        assert database.is_routed(db) is routed
+        session_gen.close()
+
+def test_async_routing_session_reads_from_replica(tmp_path):
+    """A AsyncSession usa a mesma RoutingSession (sync_session_class) com os engines async das réplicas."""
+    import asyncio
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from app.core.database import ReplicaSet, RoutingSession, build_async_engine
+
+    node, engines = _replica_cluster(tmp_path, replicas=1)
+    replicas = ReplicaSet([engines["replica1"]], health_interval=3600)
+    primary = build_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'primary'}.db")
+    replica = build_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica1'}.db")
+
+    async def run():
+        factory = async_sessionmaker(primary, sync_session_class=RoutingSession,
+                                     replicas=replicas, replica_binds=[replica.sync_engine])
+        async with factory() as db:
+            read = (await db.execute(select(node.c.name))).scalar()
+            await db.execute(node.insert().values(name="async"))
+            after_write = (await db.execute(select(node.c.name).where(node.c.name == "async"))).scalar()
+            await db.commit()
+        await primary.dispose()
+        await replica.dispose()
+        return read, after_write
+
+    assert asyncio.run(run()) == ("replica1", "async")
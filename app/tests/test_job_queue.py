@@ -0,0 +1,225 @@
+"""
+Testes Unitários: Fila de Jobs no Banco.
+Valida idempotência, prioridade, reserva exclusiva, retry com backoff, lease vencido,
+o ciclo do worker (métricas por tipo) e a leitura de certidões enfileirada pelo upload.
+"""
+import io
+import time
+from datetime import date, timedelta
+
+import pytest
+from fastapi import status
+
+from app.core import job_queue, storage
+from app.core.job_queue import JobWorker
+from app.models.company_model import Company
+from app.models.certificate_model import Certificate, CertificateStatus
+from app.models.document_category_model import DocumentCategory
+from app.models.document_type_model import DocumentType
+from app.models.job_model import Job, JobStatus
+from app.repositories.job_repository import JobRepository, utcnow
+from app.services import job_handlers
+from app.tests.conftest import TestingSessionLocal
+from app.utils.sample_certidao import build_certidao_pdf
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    """Handlers de teste registrados só durante o teste."""
+    calls = []
+
+    def echo(db, payload):
+        calls.append(payload)
+        return {"echo": payload.get("value")}
+
+    def explode(db, payload):
+        raise RuntimeError("falhou")
+
+    monkeypatch.setitem(job_queue._handlers, "test.echo", echo)
+    monkeypatch.setitem(job_queue._handlers, "test.explode", explode)
+    return calls
+
+
+def _worker(**kwargs) -> JobWorker:
+    return JobWorker(session_factory=TestingSessionLocal, worker_id="worker-a", **kwargs)
+
+
+def test_enqueue_is_idempotent_by_key(db_session):
+    first = JobRepository.enqueue(db_session, "test.echo", {"value": 1}, idempotency_key="echo:1")
+    again = JobRepository.enqueue(db_session, "test.echo", {"value": 2}, idempotency_key="echo:1")
+
+    assert again.id == first.id and again.payload == {"value": 1}
+    assert db_session.query(Job).count() == 1
+    with pytest.raises(ValueError):
+        JobRepository.enqueue(db_session, "test.echo", max_attempts=0)
+
+
+def test_claim_follows_priority_and_schedule(db_session):
+    low = JobRepository.enqueue(db_session, "test.echo", priority=0)
+    high = JobRepository.enqueue(db_session, "test.echo", priority=10)
+    JobRepository.enqueue(db_session, "test.echo", priority=99, run_at=utcnow() + timedelta(hours=1))
+    other = JobRepository.enqueue(db_session, "test.other", priority=50)
+
+    claimed = JobRepository.claim(db_session, "worker-a", limit=5, job_types=["test.echo"])
+
+    assert [job.id for job in claimed] == [high.id, low.id]
+    assert all(job.status == "running" and job.attempts == 1 and job.locked_by == "worker-a" for job in claimed)
+    # Reserva exclusiva: o segundo worker só enxerga o que sobrou
+    assert [job.id for job in JobRepository.claim(db_session, "worker-b", limit=5)] == [other.id]
+    assert JobRepository.claim(db_session, "worker-c", limit=5) == []
+
+
+def test_fail_retries_with_backoff_then_gives_up(db_session, monkeypatch):
+    monkeypatch.setattr("app.repositories.job_repository.JOB_RETRY_BASE_SECONDS", 10)
+    job = JobRepository.enqueue(db_session, "test.echo", max_attempts=2)
+    now = utcnow()
+
+    (claimed,) = JobRepository.claim(db_session, "worker-a", now=now)
+    assert JobRepository.fail(db_session, claimed, "worker-a", "erro 1", now=now)
+    db_session.refresh(job)
+    assert job.status == "queued" and job.last_error == "erro 1"
+    assert JobRepository.claim(db_session, "worker-a", now=now + timedelta(seconds=9)) == []
+
+    (claimed,) = JobRepository.claim(db_session, "worker-a", now=now + timedelta(seconds=10))
+    assert JobRepository.fail(db_session, claimed, "worker-a", "erro 2", now=now + timedelta(seconds=10))
+    db_session.refresh(job)
+    assert (job.status, job.attempts, job.last_error) == ("failed", 2, "erro 2")
+    assert job.finished_at is not None
+
+
+def test_expired_lease_returns_to_queue_and_old_owner_loses_it(db_session):
+    job = JobRepository.enqueue(db_session, "test.echo", max_attempts=2)
+    exhausted = JobRepository.enqueue(db_session, "test.echo", max_attempts=1)
+    now = utcnow()
+    stale = JobRepository.claim(db_session, "worker-a", limit=2, lease_seconds=30, now=now)
+    assert len(stale) == 2
+
+    assert JobRepository.release_expired(db_session, now=now + timedelta(seconds=31)) == {"requeued": 1, "failed": 1}
+
+    (retaken,) = JobRepository.claim(db_session, "worker-b", now=now + timedelta(seconds=31))
+    assert retaken.id == job.id and retaken.attempts == 2
+    # O worker antigo volta depois do lease: a conclusão dele não vale mais
+    assert JobRepository.complete(db_session, stale[0], "worker-a") is False
+    assert JobRepository.complete(db_session, retaken, "worker-b") is True
+    db_session.refresh(exhausted)
+    assert exhausted.status == "failed" and "Reserva expirou" in exhausted.last_error
+
+
+def test_worker_runs_handlers_and_records_metrics(db_session, handlers):
+    done = JobRepository.enqueue(db_session, "test.echo", {"value": 42})
+    broken = JobRepository.enqueue(db_session, "test.explode", max_attempts=3)
+    unknown = JobRepository.enqueue(db_session, "test.unknown")
+    worker = _worker(batch_size=2)
+
+    # Retry agendado para o futuro: a fila fica "vazia" e o worker sai
+    assert worker.run(stop_when_idle=True) == 3
+
+    db_session.expire_all()
+    assert handlers == [{"value": 42}]
+    assert (done.status, done.result) == ("done", {"echo": 42})
+    assert (broken.status, broken.attempts) == ("queued", 1)
+    assert broken.last_error == "RuntimeError: falhou"
+    assert unknown.status == "failed" and "Nenhum handler" in unknown.last_error
+
+    stats = worker.stats()["job_types"]
+    assert stats["test.echo"]["completed"] == 1 and stats["test.explode"]["failed"] == 1
+
+    metrics = JobRepository.metrics(db_session)["job_types"]
+    assert metrics["test.echo"]["completed"] == 1
+    assert metrics["test.echo"]["run_ms"]["max"] >= 0
+    assert metrics["test.explode"]["counts"]["queued"] == 1
+    assert metrics["test.unknown"]["failed"] == 1
+
+
+def test_long_job_keeps_its_lease(db_session, monkeypatch):
+    """Handler que passa do lease: o heartbeat renova a reserva e nenhum outro worker o toma."""
+    seen = []
+
+    def slow(db, payload):
+        time.sleep(1.5)
+        other = TestingSessionLocal()
+        try:
+            seen.append(JobRepository.release_expired(other))
+            seen.append(JobRepository.claim(other, "worker-b"))
+        finally:
+            other.close()
+        return {"ok": True}
+
+    monkeypatch.setitem(job_queue._handlers, "test.slow", slow)
+    job = JobRepository.enqueue(db_session, "test.slow")
+
+    assert _worker(lease_seconds=1, heartbeat_interval=0.2).run(stop_when_idle=True) == 1
+
+    assert seen == [{"requeued": 0, "failed": 0}, []]
+    db_session.expire_all()
+    assert (job.status, job.attempts, job.locked_by) == ("done", 1, "worker-a")
+
+
+def test_embedded_worker_runs_only_its_types(db_session, handlers):
+    """Worker embutido (GC do storage na API): roda numa thread, só os tipos pedidos, até stop()."""
+    echo = JobRepository.enqueue(db_session, "test.echo", {"value": 7})
+    other = JobRepository.enqueue(db_session, "test.explode")
+
+    worker = job_queue.start_embedded_worker(["test.echo"], poll_interval=0.05, session_factory=TestingSessionLocal)
+    try:
+        deadline = time.monotonic() + 5
+        while echo.status != "done" and time.monotonic() < deadline:
+            time.sleep(0.05)
+            db_session.expire_all()
+    finally:
+        worker.stop()
+
+    assert handlers == [{"value": 7}]
+    assert (echo.status, other.status) == ("done", "queued")
+
+
+def _seed_catalog(db_session):
+    company = Company(cnpj="12345678000199", razao_social="Fila SA")
+    category = DocumentCategory(name="Fiscal", slug="fiscal-fila")
+    db_session.add_all([company, category])
+    db_session.flush()
+    doc_type = DocumentType(name="CND", slug="cnd-fila", category_id=category.id)
+    db_session.add(doc_type)
+    db_session.commit()
+    return company, doc_type
+
+
+def test_certificate_extract_job(db_session):
+    company, doc_type = _seed_catalog(db_session)
+    storage.get_backend().put_stream("storage/uploads/cnd.pdf", io.BytesIO(build_certidao_pdf(company.cnpj, date.today())))
+    cert = Certificate(
+        filename="cnd.pdf", file_path="storage/uploads/cnd.pdf", company_id=company.id,
+        type_id=doc_type.id, status=CertificateStatus.PROCESSING.value,
+    )
+    db_session.add(cert)
+    db_session.commit()
+    job = JobRepository.enqueue(db_session, job_handlers.CERTIFICATE_EXTRACT, {"certificate_ids": [cert.id]})
+
+    assert _worker().run(stop_when_idle=True) == 1
+
+    db_session.expire_all()
+    assert job.status == "done" and job.result["extracted"] == 1
+    assert cert.status == "valid" and cert.expiration_date == date.today() + timedelta(days=180)
+
+
+def test_upload_enqueues_extraction_when_queue_enabled(admin_client, db_session, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_QUEUE_ENABLED", True)
+    company, doc_type = _seed_catalog(db_session)
+
+    response = admin_client.post(
+        "/documents/upload",
+        data={"target_company_id": company.id, "type_id": doc_type.id},
+        files={"file": ("cnd.pdf", build_certidao_pdf(company.cnpj, date.today()), "application/pdf")},
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    cert_id = response.json()["id"]
+    db_session.expire_all()
+    # Nada rodou na API: a certidão espera o worker
+    assert db_session.get(Certificate, cert_id).status == "processing"
+    job = JobRepository.get_by_key(db_session, f"certificate.extract:{cert_id}")
+    assert job.payload == {"certificate_ids": [cert_id]}
+    assert job.priority == job_handlers.PRIORITY_UPLOAD and job.status == JobStatus.QUEUED.value
+
+    metrics = admin_client.get("/admin/jobs/metrics?window_minutes=5").json()
+    assert metrics["job_types"]["certificate.extract"]["counts"]["queued"] == 1
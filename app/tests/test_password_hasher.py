@@ -0,0 +1,61 @@
+"""
+Testes do Pool de Hashing de Senhas.
+Valida a API assíncrona, o controle de admissão (503) e as métricas expostas.
+"""
+import asyncio
+import pytest
+from fastapi import status
+
+from app.core.password_hasher import PasswordHasherPool, PasswordHasherSaturated, password_hasher
+from app.core.security import verify_password
+
+
+@pytest.fixture
+def thread_pool():
+    pool = PasswordHasherPool(workers=2, max_pending=4, executor_kind="thread")
+    yield pool
+    pool.shutdown()
+
+def test_hash_and_verify_roundtrip(thread_pool):
+    hashed = asyncio.run(thread_pool.hash("senha_do_pool"))
+
+    assert verify_password("senha_do_pool", hashed)
+    assert asyncio.run(thread_pool.verify("senha_do_pool", hashed)) is True
+    assert thread_pool.verify_blocking("errada", hashed) is False
+
+    stats = thread_pool.stats()
+    assert stats["completed"] == 3
+    assert stats["in_flight"] == 0
+    assert stats["latency_ms"]["max"] > 0
+
+def test_process_pool_hashes_in_worker():
+    """O executor padrão (processos 'spawn') precisa conseguir serializar os jobs."""
+    pool = PasswordHasherPool(workers=1, max_pending=2, executor_kind="process")
+    try:
+        hashed = asyncio.run(pool.hash("senha_em_outro_processo"))
+        assert verify_password("senha_em_outro_processo", hashed)
+    finally:
+        pool.shutdown()
+
+def test_admission_control_rejects_when_saturated(thread_pool):
+    thread_pool.max_pending = 0
+
+    with pytest.raises(PasswordHasherSaturated):
+        asyncio.run(thread_pool.hash("qualquer"))
+    assert thread_pool.stats()["rejected"] == 1
+    assert thread_pool.stats()["in_flight"] == 0
+
+def test_login_returns_503_when_pool_saturated(client, normal_user_token, monkeypatch):
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+
+    response = client.post(
+        "/auth/token",
+        data={"username": "cliente_qa@teste.com", "password": "senha_segura_123"}
+    )
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"] == "1"
+
+def test_admin_metrics_exposes_password_pool(admin_client):
+    data = admin_client.get("/admin/metrics").json()
+    assert {"in_flight", "max_pending", "rejected", "latency_ms"} <= set(data["password_hasher"])
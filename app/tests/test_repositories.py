@@ -3,10 +3,16 @@ Testes de Integração: Repositórios.
 Valida se as operações CRUD (Create, Read, Update, Delete) 
 estão efetivamente gravando e lendo no Banco de Dados em Memória.
 """
+import asyncio
 import pytest
+from datetime import date
 
-from app.repositories.user_repository import UserRepository
-from app.repositories.company_repository import CompanyRepository
+from app.repositories.user_repository import UserRepository, AsyncUserRepository
+from app.repositories.company_repository import CompanyRepository, AsyncCompanyRepository
+from app.repositories.document_repository import DocumentRepository, AsyncDocumentRepository
+from app.repositories.dashboard_repository import DashboardRepository, AsyncDashboardRepository
+from app.models.user_model import UserCompanyLink
+from app.tests.conftest import TestingAsyncSessionLocal
 from app.schemas.user_schemas import UserCreate
 from app.schemas.company_schemas import CompanyCreate, CompanyUpdate
 
@@ -104,4 +110,65 @@ def test_delete_company(db_session):
     assert result is True
     
     # 3. Validação final
-    assert CompanyRepository.get_by_id(db_session, company.id) is None
\ No newline at end of file
+    assert CompanyRepository.get_by_id(db_session, company.id) is None
+
+
+# ==========================================
+# ⚡ 3. REPOSITÓRIOS ASSÍNCRONOS (AsyncSession)
+# ==========================================
+
+def run_async(action):
+    """Executa 'action(db)' numa AsyncSession sobre o mesmo banco em memória do db_session."""
+    async def runner():
+        async with TestingAsyncSessionLocal() as db:
+            return await action(db)
+    return asyncio.run(runner())
+
+def test_async_repositories_match_sync(db_session):
+    """Cenário: as versões async devolvem exatamente o mesmo que as síncronas."""
+    user = UserRepository.create_user(db_session, UserCreate(email="async@teste.com", password="senha_forte_123"))
+    company = CompanyRepository.create(db_session, CompanyCreate.model_validate({"cnpj": "22233344000155", "razao_social": "Async SA"}))
+    db_session.add(UserCompanyLink(user_id=user.id, company_id=company.id, role="admin"))
+    for n in range(3):
+        DocumentRepository.create_legacy(db_session, f"Doc {n}", f"d{n}.pdf", f"/tmp/d{n}.pdf", company.id,
+                                         expiration_date=date(2020, 1, n + 1))
+    db_session.commit()
+
+    found = run_async(lambda db: AsyncUserRepository.get_by_email(db, "async@teste.com"))
+    assert found.id == user.id
+    linked = run_async(lambda db: AsyncUserRepository.get_by_id_with_links(db, user.id))
+    assert [link.company_id for link in linked.company_links] == [company.id]
+
+    assert run_async(lambda db: AsyncCompanyRepository.get_by_id(db, company.id)).razao_social == "Async SA"
+    assert run_async(lambda db: AsyncCompanyRepository.list_members(db, company.id)) == \
+        CompanyRepository.list_members(db_session, company.id)
+
+    assert run_async(lambda db: AsyncDocumentRepository.get_unified_by_company(db, company.id)) == \
+        DocumentRepository.get_unified_by_company(db_session, company.id)
+    assert run_async(lambda db: AsyncDashboardRepository.get_client_stats(db, company.id)) == \
+        DashboardRepository.get_client_stats(db_session, company.id)
+
+def test_async_stream_unified_in_chunks(db_session):
+    """Cenário: o streaming async entrega lotes de até chunk_size, sem perder nem repetir itens."""
+    company = CompanyRepository.create(db_session, CompanyCreate.model_validate({"cnpj": "33344455000166", "razao_social": "Stream SA"}))
+    for n in range(5):
+        DocumentRepository.create_legacy(db_session, None, f"s{n}.pdf", f"/tmp/s{n}.pdf", company.id)
+
+    async def collect(db):
+        return [batch async for batch in AsyncDocumentRepository.stream_unified_by_company(db, company.id, chunk_size=2)]
+
+    batches = run_async(collect)
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert sorted(row["filename"] for batch in batches for row in batch) == [f"s{n}.pdf" for n in range(5)]
+
+def test_async_update_password_hash(db_session):
+    """Cenário: a troca de hash (rehash no login) é gravada pela sessão async."""
+    UserRepository.create_user(db_session, UserCreate(email="rehash@teste.com", password="senha_forte_123"))
+
+    async def rehash(db):
+        user = await AsyncUserRepository.get_by_email(db, "rehash@teste.com")
+        return await AsyncUserRepository.update_password_hash(db, user, "novo-hash")
+
+    assert run_async(rehash).password_hash == "novo-hash"
+    db_session.expire_all()
+    assert UserRepository.get_by_email(db_session, "rehash@teste.com").password_hash == "novo-hash"
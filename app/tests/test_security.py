@@ -8,8 +8,12 @@ from jose import jwt, JWTError
 
 from app.core.security import (
     verify_password,
+    verify_and_update_password,
+    dummy_verify_password,
     get_password_hash,
     create_access_token,
+    create_download_token,
+    verify_download_token,
     SECRET_KEY,
     ALGORITHM,
     ACCESS_TOKEN_EXPIRE_MINUTES
@@ -47,6 +51,16 @@ def test_verify_password_wrong():
     
     assert verify_password(wrong_password, hashed_password) is False
 
+def test_verify_and_update_keeps_current_hash():
+    """Cenário: Hash já no custo da política não precisa ser refeito."""
+    hashed_password = get_password_hash("senha_atual")
+    assert verify_and_update_password("senha_atual", hashed_password) == (True, None)
+
+def test_verify_and_update_rejects_malformed_hash():
+    """Cenário: Hash corrompido no banco vira senha inválida, não erro 500."""
+    assert verify_and_update_password("qualquer", "123") == (False, None)
+    assert dummy_verify_password() is False
+
 
 # --- 2. TESTES DE TOKENIZAÇÃO (JWT) ---
 
@@ -87,4 +101,27 @@ def test_invalid_token_decoding():
     
     # O Pytest captura a exceção para garantir que o erro esperado aconteceu
     with pytest.raises(JWTError):
-        jwt.decode(token_falso, SECRET_KEY, algorithms=[ALGORITHM])
\ No newline at end of file
+        jwt.decode(token_falso, SECRET_KEY, algorithms=[ALGORITHM])
+
+def test_download_token_roundtrip_and_tampering():
+    """
+    Cenário: Link de download assinado.
+    Critério: O payload volta intacto; qualquer byte trocado invalida o HMAC.
+    """
+    token, expires_at = create_download_token("doc-1", "abcd", "doc-1.pdf", ttl_seconds=60)
+    grant = verify_download_token(token)
+    assert grant["i"] == "doc-1" and grant["h"] == "abcd" and grant["n"] == "doc-1.pdf"
+    assert set(grant) == {"i", "h", "n", "e"} # Nada do layout do storage no link (o payload é legível)
+    assert int(expires_at.timestamp()) == grant["e"]
+
+    payload, signature = token.split(".")
+    other, _ = create_download_token("doc-2", "efgh", "doc-2.pdf")
+    for forged in (f"{other.split('.')[0]}.{signature}", f"{payload}.{signature[:-2]}AA", "lixo", "a.b.c"):
+        with pytest.raises(ValueError, match="inválido"):
+            verify_download_token(forged)
+
+def test_download_token_expires(monkeypatch):
+    token, _ = create_download_token("doc-1", "abcd", "doc-1.pdf", ttl_seconds=30)
+    monkeypatch.setattr("app.core.security.time.time", lambda: 10**11)
+    with pytest.raises(ValueError, match="expirado"):
+        verify_download_token(token)
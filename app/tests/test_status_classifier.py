@@ -0,0 +1,56 @@
+"""
+Testes Unitários: Classificador de Status por Vencimento (leitura).
+Garante a regra das faixas e o vencimento pela validade padrão do Tipo.
+"""
+from datetime import date, datetime, timedelta
+
+from app.utils.status_classifier import classify_rows, ISSUE_DATE_KEY, VALIDITY_DAYS_KEY
+
+TODAY = date(2026, 1, 10)
+
+
+def _rows():
+    return [
+        {"id": "1", "status": "valid", "expiration_date": date(2026, 1, 9)},
+        {"id": "2", "status": "valid", "expiration_date": date(2026, 1, 20)},
+        {"id": "3", "status": "expired", "expiration_date": date(2027, 1, 1)},
+        {"id": "4", "status": "processing", "expiration_date": date(2020, 1, 1)},
+        {"id": "5", "status": "expired", "expiration_date": None},
+        # Certidão sem vencimento: emissão + validade padrão do Tipo
+        {"id": "6", "status": "valid", "expiration_date": None, ISSUE_DATE_KEY: date(2025, 10, 1), VALIDITY_DAYS_KEY: 90},
+        {"id": "7", "status": "valid", "expiration_date": None, ISSUE_DATE_KEY: None, VALIDITY_DAYS_KEY: 30,
+         "created_at": datetime(2026, 1, 1, 8, 30)},
+        {"id": "8", "status": "warning", "expiration_date": None, ISSUE_DATE_KEY: None, VALIDITY_DAYS_KEY: 0},
+    ]
+
+
+EXPECTED = ["expired", "warning", "valid", "processing", "expired", "expired", "warning", "warning"]
+
+
+def test_classify_rows():
+    rows = classify_rows(_rows(), today=TODAY, warning_days=30)
+    assert [r["status"] for r in rows] == EXPECTED
+    assert all(ISSUE_DATE_KEY not in r and VALIDITY_DAYS_KEY not in r for r in rows)
+    assert rows[5]["expiration_date"] is None # Só o status é derivado
+
+
+def test_classify_rows_empty():
+    assert classify_rows([], today=TODAY) == []
+
+
+def test_listing_derives_status_on_read(db_session):
+    """Linha persistida como 'valid' com vencimento passado aparece 'expired' na listagem."""
+    from app.models.company_model import Company
+    from app.models.document_model import Document
+    from app.repositories.document_repository import DocumentRepository
+
+    company = Company(cnpj="20202020000120", razao_social="Atrasada SA")
+    db_session.add(company)
+    db_session.commit()
+    db_session.add(Document(filename="velho.pdf", file_path="/f", company_id=company.id, status="valid",
+                            expiration_date=date.today() - timedelta(days=1)))
+    db_session.commit()
+
+    items = DocumentRepository.get_unified_by_company(db_session, company.id)
+    assert items[0]["status"] == "expired"
+    assert ISSUE_DATE_KEY not in items[0]
@@ -0,0 +1,133 @@
+"""
+Testes Unitários: Job de Recalculo de Status por Vencimento.
+Valida as faixas (valid/warning/expired), o processamento em lotes,
+a preservação de itens em leitura e a atualização da company_vault_stats.
+"""
+import pytest
+from datetime import date, datetime
+
+from app.models.company_model import Company
+from app.models.document_model import Document
+from app.models.certificate_model import Certificate
+from app.models.document_category_model import DocumentCategory
+from app.models.document_type_model import DocumentType
+from app.repositories.vault_stats_repository import VaultStatsRepository
+from app.services.status_refresh_service import StatusRefreshService
+from app.utils.status_classifier import classify_status
+
+TODAY = date(2026, 1, 10)
+
+
+def test_classify_status_boundaries():
+    assert classify_status(None, TODAY) == "valid"
+    assert classify_status(date(2026, 1, 9), TODAY) == "expired"
+    assert classify_status(TODAY, TODAY) == "warning"
+    assert classify_status(date(2026, 2, 9), TODAY, warning_days=30) == "warning"
+    assert classify_status(date(2026, 2, 10), TODAY, warning_days=30) == "valid"
+
+
+def test_refresh_all_updates_in_chunks(db_session):
+    company = Company(cnpj="66666666000166", razao_social="Vencimentos SA")
+    category = DocumentCategory(name="Fiscal", slug="fiscal-refresh")
+    db_session.add_all([company, category])
+    db_session.flush()
+    doc_type = DocumentType(name="CND", slug="cnd-refresh", category_id=category.id)
+    db_session.add(doc_type)
+    db_session.flush()
+    db_session.add_all([
+        Document(filename=f"venc{i}.pdf", file_path="/f", company_id=company.id, status="valid", expiration_date=date(2025, 12, i + 1))
+        for i in range(5)
+    ] + [
+        Document(filename="alerta.pdf", file_path="/f", company_id=company.id, status="valid", expiration_date=date(2026, 1, 20)),
+        Document(filename="renovado.pdf", file_path="/f", company_id=company.id, status="expired", expiration_date=date(2027, 1, 1)),
+        Document(filename="sem_data.pdf", file_path="/f", company_id=company.id, status="valid"),
+        Certificate(type_id=doc_type.id, filename="lendo.pdf", file_path="/f", company_id=company.id, status="processing", expiration_date=date(2020, 1, 1)),
+        Certificate(type_id=doc_type.id, filename="cnd.pdf", file_path="/f", company_id=company.id, status="valid", expiration_date=date(2026, 1, 1)),
+    ])
+    db_session.commit()
+
+    report = StatusRefreshService.refresh_all(db_session, today=TODAY, warning_days=30, chunk_size=2)
+
+    assert report.changed["documents"] == {"expired": 5, "warning": 1, "valid": 1}
+    assert report.changed["certificates"] == {"expired": 1, "warning": 0, "valid": 0}
+    assert report.rows_changed == 8
+    assert report.chunks == 6 # 3 lotes de 'expired' + 1 'warning' + 1 'valid' + 1 certidão
+    assert report.as_dict()["elapsed_seconds"] >= 0
+
+    db_session.expire_all()
+    statuses = {d.filename: d.status for d in db_session.query(Document).all()}
+    statuses.update({c.filename: c.status for c in db_session.query(Certificate).all()})
+    assert statuses["alerta.pdf"] == "warning"
+    assert statuses["renovado.pdf"] == "valid"
+    assert statuses["sem_data.pdf"] == "valid"
+    assert statuses["lendo.pdf"] == "processing" # Pipeline de leitura não é atropelado
+    assert statuses["cnd.pdf"] == "expired"
+
+    stats = VaultStatsRepository.get(db_session, company.id)
+    assert (stats.total, stats.valid, stats.warning, stats.expired, stats.processing) == (10, 2, 1, 6, 1)
+    assert stats.next_expiration == date(2026, 1, 20)
+
+    # Idempotente: a segunda execução não encontra nada fora de faixa
+    assert StatusRefreshService.refresh_all(db_session, today=TODAY, warning_days=30).rows_changed == 0
+
+
+def test_refresh_all_uses_type_validity_days(db_session):
+    """Certidão sem vencimento: emissão + validade padrão do Tipo, a mesma regra da listagem."""
+    company = Company(cnpj="67676767000167", razao_social="Validade SA")
+    category = DocumentCategory(name="Fiscal", slug="fiscal-validade-refresh")
+    db_session.add_all([company, category])
+    db_session.flush()
+    doc_type = DocumentType(name="CND", slug="cnd-validade-refresh", category_id=category.id, validity_days_default=90)
+    db_session.add(doc_type)
+    db_session.flush()
+    db_session.add_all([
+        Certificate(type_id=doc_type.id, filename="vencida.pdf", file_path="/f", company_id=company.id,
+                    status="valid", issue_date=date(2025, 10, 1)),
+        Certificate(type_id=doc_type.id, filename="alerta.pdf", file_path="/f", company_id=company.id,
+                    status="valid", issue_date=date(2025, 11, 1)),
+        # Sem emissão: upload à meia-noite de 12/10 + 90 dias = 10/01 (hoje), ainda em alerta
+        Certificate(type_id=doc_type.id, filename="upload.pdf", file_path="/f", company_id=company.id,
+                    status="valid", created_at=datetime(2025, 10, 12, 0, 0)),
+        Certificate(type_id=doc_type.id, filename="upload_velho.pdf", file_path="/f", company_id=company.id,
+                    status="valid", created_at=datetime(2025, 10, 11, 23, 59, 59)),
+    ])
+    db_session.commit()
+
+    report = StatusRefreshService.refresh_all(db_session, today=TODAY, warning_days=30)
+
+    assert report.changed["certificates"] == {"expired": 2, "warning": 2, "valid": 0}
+    db_session.expire_all()
+    statuses = {c.filename: c.status for c in db_session.query(Certificate).all()}
+    assert statuses == {
+        "vencida.pdf": "expired", "alerta.pdf": "warning", "upload.pdf": "warning", "upload_velho.pdf": "expired",
+    }
+    stats = VaultStatsRepository.get(db_session, company.id)
+    assert (stats.valid, stats.warning, stats.expired) == (0, 2, 2)
+
+
+def test_refresh_all_applies_deltas_and_pages_by_id(db_session, query_counter):
+    """Cada lote segue o último id (keyset) e a company_vault_stats recebe deltas, sem reagregar o cofre."""
+    company = Company(cnpj="68686868000168", razao_social="Deltas SA")
+    db_session.add(company)
+    db_session.commit()
+    db_session.add_all([
+        Document(filename=f"venc{i}.pdf", file_path="/f", company_id=company.id, status="valid", expiration_date=date(2025, 12, 1))
+        for i in range(5)
+    ])
+    db_session.commit()
+    query_counter.clear()
+
+    report = StatusRefreshService.refresh_all(db_session, today=TODAY, warning_days=30, chunk_size=2)
+
+    assert report.changed["documents"]["expired"] == 5 and report.chunks == 3
+    selects = [q for q in query_counter if q.lstrip().upper().startswith("SELECT") and "FROM documents" in q]
+    assert sum("documents.id >" in q for q in selects) == 2 # 2º e 3º lotes continuam do último id
+    assert not any("GROUP BY" in q for q in query_counter) # Nenhuma reagregação do cofre
+    db_session.expire_all()
+    stats = VaultStatsRepository.get(db_session, company.id)
+    assert (stats.total, stats.valid, stats.expired) == (5, 0, 5)
+
+
+def test_refresh_all_rejects_invalid_chunk(db_session):
+    with pytest.raises(ValueError, match="chunk_size"):
+        StatusRefreshService.refresh_all(db_session, chunk_size=0)
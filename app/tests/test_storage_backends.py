@@ -0,0 +1,159 @@
+"""
+Testes Unitários: Backends de Armazenamento (Disco Local e S3).
+O mesmo contrato roda nos dois backends; o S3 usa o moto (bucket em memória),
+então nenhum teste sai para a rede.
+"""
+import io
+from urllib.parse import parse_qs, urlparse
+
+import boto3
+import pytest
+from fastapi import status
+from moto import mock_aws
+
+from app.core import storage
+from app.core.storage_backends import LocalStorageBackend, S3StorageBackend, content_disposition, create_backend
+from app.models.company_model import Company
+
+BUCKET = "licitadoc-tests"
+MIN_PART = 5 * 1024 * 1024 # Menor parte aceita pelo S3 num multipart
+
+
+@pytest.fixture
+def s3_backend(monkeypatch):
+    for name, value in {
+        "AWS_ACCESS_KEY_ID": "testing", "AWS_SECRET_ACCESS_KEY": "testing", "AWS_DEFAULT_REGION": "us-east-1",
+    }.items():
+        monkeypatch.setenv(name, value)
+    with mock_aws():
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket=BUCKET)
+        yield S3StorageBackend(bucket=BUCKET, multipart_threshold=MIN_PART, multipart_chunksize=MIN_PART)
+
+
+@pytest.fixture(params=["local", "s3"])
+def backend(request, isolated_storage):
+    if request.param == "local":
+        return LocalStorageBackend(str(isolated_storage))
+    return request.getfixturevalue("s3_backend")
+
+
+def test_backend_contract(backend):
+    key = "storage/blobs/ab/cd/abcd"
+    assert backend.stat(key) is None
+    assert backend.delete(key) is False
+
+    backend.put_stream(key, io.BytesIO(b"%PDF-1.4 0123456789"))
+
+    info = backend.stat(key)
+    assert info.size == 19 and info.last_modified.tzinfo is not None
+    assert backend.exists(key)
+    assert b"".join(backend.get_stream(key, chunk_size=4)) == b"%PDF-1.4 0123456789"
+    assert b"".join(backend.read_range(key, 9, 12, chunk_size=2)) == b"0123"
+
+    assert backend.delete(key) is True
+    assert not backend.exists(key)
+    with pytest.raises(FileNotFoundError):
+        b"".join(backend.get_stream(key))
+
+
+def test_touch_refreshes_last_modified(backend):
+    key = "storage/blobs/ef/01/ef01"
+    assert backend.touch(key) is False
+
+    backend.put_stream(key, io.BytesIO(b"%PDF-1.4"))
+    before = backend.stat(key).last_modified
+
+    assert backend.touch(key) is True
+    info = backend.stat(key)
+    assert info.last_modified >= before and info.size == 8
+    assert b"".join(backend.get_stream(key)) == b"%PDF-1.4"
+
+
+def test_put_file_moves_local_file(backend, tmp_path):
+    source = tmp_path / "upload.part"
+    source.write_bytes(b"conteudo")
+
+    backend.put_file("storage/blobs/00/11/0011", str(source))
+
+    assert not source.exists()
+    assert b"".join(backend.get_stream("storage/blobs/00/11/0011")) == b"conteudo"
+
+
+def test_s3_large_upload_uses_multipart(s3_backend):
+    payload = b"x" * (MIN_PART + 1024)
+    s3_backend.put_stream("grande", io.BytesIO(payload))
+
+    info = s3_backend.stat("grande")
+    assert info.size == len(payload)
+    assert info.etag.strip('"').endswith("-2") # ETag de multipart: '<md5>-<n partes>'
+
+
+def test_presign_only_on_s3(s3_backend, isolated_storage):
+    s3_backend.put_stream("doc", io.BytesIO(b"%PDF-1.4"))
+    url = s3_backend.presign("doc", expires_in=60, filename="cnd.pdf")
+    assert BUCKET in url and "Signature" in url and "response-content-disposition" in url
+
+    local = LocalStorageBackend(str(isolated_storage))
+    assert local.presign("doc") is None
+    assert s3_backend.local_path("doc") is None
+
+
+def test_presign_escapes_filename(s3_backend):
+    """Aspas, ';' e acentos no nome não quebram (nem injetam) o header devolvido pelo S3."""
+    s3_backend.put_stream("doc", io.BytesIO(b"%PDF-1.4"))
+    filename = 'cnd "federal"; inline; certidão.pdf'
+    url = s3_backend.presign("doc", expires_in=60, filename=filename)
+
+    header = parse_qs(urlparse(url).query)["response-content-disposition"][0]
+    assert header == content_disposition(filename)
+    assert header == "attachment; filename*=utf-8''cnd%20%22federal%22%3B%20inline%3B%20certid%C3%A3o.pdf"
+
+
+def test_create_backend_rejects_unknown(monkeypatch):
+    monkeypatch.setattr("app.core.storage_backends.STORAGE_BACKEND", "ftp")
+    with pytest.raises(ValueError):
+        create_backend("/tmp")
+
+
+def test_upload_and_download_through_s3(s3_backend, monkeypatch, db_session, admin_client, isolated_storage):
+    """Fluxo completo pelas rotas com o S3: nada fica no disco do nó da API."""
+    monkeypatch.setattr(storage, "_backend", s3_backend)
+    company = Company(cnpj="31313131000131", razao_social="Nuvem SA")
+    db_session.add(company)
+    db_session.commit()
+    content = b"%PDF-1.4 certidao na nuvem"
+
+    uploaded = admin_client.post(
+        f"/admin/companies/{company.id}/upload",
+        files={"file": ("cnd.pdf", content, "application/pdf")},
+    )
+    assert uploaded.status_code == status.HTTP_201_CREATED
+    body = uploaded.json()
+    assert s3_backend.stat(body["file_path"]).size == len(content)
+    assert not any(path.is_file() for path in (isolated_storage / "storage").rglob("*"))
+
+    response = admin_client.get(f"/admin/companies/{company.id}/documents/{body['id']}/download")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == content
+    assert response.headers["content-length"] == str(len(content))
+    assert response.headers["etag"] == f'"{body["content_hash"]}"'
+
+    partial = admin_client.get(
+        f"/admin/companies/{company.id}/documents/{body['id']}/download", headers={"Range": "bytes=-5"},
+    )
+    assert partial.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert partial.content == content[-5:]
+    assert partial.headers["content-range"] == f"bytes {len(content) - 5}-{len(content) - 1}/{len(content)}"
+
+    outside = admin_client.get(
+        f"/admin/companies/{company.id}/documents/{body['id']}/download", headers={"Range": "bytes=999-"},
+    )
+    assert outside.status_code == status.HTTP_416_RANGE_NOT_SATISFIABLE
+    assert outside.headers["content-range"] == f"bytes */{len(content)}"
+
+    monkeypatch.setattr(storage, "STORAGE_PRESIGN_DOWNLOADS", True)
+    redirect = admin_client.get(
+        f"/admin/companies/{company.id}/documents/{body['id']}/download", follow_redirects=False,
+    )
+    assert redirect.status_code == status.HTTP_307_TEMPORARY_REDIRECT
+    assert BUCKET in redirect.headers["location"]
@@ -0,0 +1,84 @@
+"""
+Testes Unitários: Migração do Storage Legado para o Blob Store.
+Valida o dry-run (nada muda), a troca de file_path para o blob, a remoção
+das cópias duplicadas e arquivos ausentes no disco.
+"""
+import os
+
+from app.core import storage
+from app.models.company_model import Company
+from app.models.document_model import Document
+from app.models.certificate_model import Certificate
+from app.models.document_category_model import DocumentCategory
+from app.models.document_type_model import DocumentType
+from app.repositories.blob_repository import BlobRepository
+from app.services.storage_dedupe_service import StorageDedupeService
+
+PDF = b"%PDF-1.4 certidao negativa"
+
+
+def _legacy_file(root, name: str, content: bytes) -> str:
+    os.makedirs(os.path.join(root, "storage", "uploads"), exist_ok=True)
+    with open(os.path.join(root, "storage", "uploads", name), "wb") as handle:
+        handle.write(content)
+    return f"storage/uploads/{name}"
+
+
+def _seed(db_session, root):
+    company = Company(cnpj="77777777000177", razao_social="Legado SA")
+    category = DocumentCategory(name="Fiscal", slug="fiscal-dedupe")
+    db_session.add_all([company, category])
+    db_session.flush()
+    doc_type = DocumentType(name="CND", slug="cnd-dedupe", category_id=category.id)
+    db_session.add(doc_type)
+    db_session.flush()
+    db_session.add_all([
+        Document(filename="a.pdf", file_path=_legacy_file(root, "a.pdf", PDF), company_id=company.id, status="valid"),
+        Document(filename="b.pdf", file_path=_legacy_file(root, "b.pdf", PDF), company_id=company.id, status="valid"),
+        Document(filename="c.pdf", file_path=_legacy_file(root, "c.pdf", b"%PDF-1.4 outro"), company_id=company.id, status="valid"),
+        Document(filename="sumiu.pdf", file_path="storage/uploads/sumiu.pdf", company_id=company.id, status="valid"),
+        Certificate(filename="cnd.pdf", file_path="storage/uploads/a.pdf", company_id=company.id, type_id=doc_type.id),
+    ])
+    db_session.commit()
+    return company
+
+
+def test_dry_run_reports_without_changes(db_session, isolated_storage):
+    _seed(db_session, isolated_storage)
+
+    report = StorageDedupeService.dedupe_existing(db_session, dry_run=True)
+
+    assert report.files_scanned == 3
+    assert report.duplicate_files == 1
+    assert report.missing_files == 1
+    assert report.bytes_freed == len(PDF)
+    assert db_session.query(Document).filter(Document.file_path.like(f"{storage.BLOB_PREFIX}%")).count() == 0
+    assert os.path.exists(os.path.join(isolated_storage, "storage", "uploads", "b.pdf"))
+    assert not os.path.exists(os.path.join(isolated_storage, "storage", "blobs"))
+
+
+def test_dedupe_moves_rows_to_blobs_and_removes_duplicates(db_session, isolated_storage):
+    _seed(db_session, isolated_storage)
+
+    report = StorageDedupeService.dedupe_existing(db_session, batch_size=2)
+
+    assert report.rows_updated == 4 # a, b, c e a certidão que divide o arquivo de 'a'
+    assert report.duplicate_files == 1
+    assert report.missing_files == 1
+
+    db_session.expire_all()
+    doc_a = db_session.query(Document).filter_by(filename="a.pdf").one()
+    blob = storage.blob_path(doc_a.content_hash)
+    assert doc_a.file_path == blob and doc_a.file_size == len(PDF)
+    assert db_session.query(Document).filter_by(filename="b.pdf").one().file_path == blob
+    assert db_session.query(Certificate).one().file_path == blob
+    assert db_session.query(Document).filter_by(filename="sumiu.pdf").one().file_path == "storage/uploads/sumiu.pdf"
+
+    # Originais apagados, um blob por conteúdo
+    assert os.listdir(os.path.join(isolated_storage, "storage", "uploads")) == []
+    assert BlobRepository.storage_report(db_session)["blobs"] == 2
+
+    # Rodar de novo não encontra nada novo
+    again = StorageDedupeService.dedupe_existing(db_session)
+    assert again.rows_updated == 0
+    assert again.missing_files == 1
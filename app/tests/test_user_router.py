@@ -86,4 +86,29 @@ def test_get_my_companies_success(db_session, client):
     assert isinstance(data, list)
     assert len(data) == 1
     assert data[0]["razao_social"] == "Firma LTDA"
-    assert data[0]["role"] == "VIEWER"  # O dado injetado pelo router tem que estar presente!
\ No newline at end of file
+    assert data[0]["role"] == "VIEWER"  # O dado injetado pelo router tem que estar presente!
+
+def test_get_my_companies_loads_links_in_single_query(db_session, client, query_counter):
+    """
+    Cenário [Performance]: Consultor vinculado a várias empresas.
+    Resultado Esperado: Quantidade de queries constante (sem um SELECT por vínculo/empresa).
+    """
+    user = User(email="consultor@teste.com", password_hash=get_password_hash("123"), role=UserRole.CLIENT.value, is_active=True)
+    db_session.add(user)
+    db_session.commit()
+    for i in range(5):
+        company = Company(cnpj=f"1122233300{i:04d}", razao_social=f"Cliente {i} LTDA")
+        db_session.add(company)
+        db_session.flush()
+        db_session.add(UserCompanyLink(user_id=user.id, company_id=company.id, role=UserCompanyRole.VIEWER.value))
+    db_session.commit()
+    token = create_access_token(data={"sub": user.email})
+
+    query_counter.clear()
+    response = client.get("/users/me/companies", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 5
+    # 1 query para o Principal (usuário + vínculos) + 1 para o perfil ORM com as empresas
+    assert len(query_counter) == 2
+
@@ -0,0 +1,144 @@
+"""
+Testes Unitários: Estatísticas Materializadas do Cofre (company_vault_stats).
+Garante que os deltas aplicados a cada flush batem com a agregação real
+de 'documents' + 'certificates', e que o rebuild reconcilia divergências.
+"""
+from datetime import date
+from sqlalchemy import text
+
+from app.models.company_model import Company
+from app.models.document_model import Document
+from app.models.certificate_model import Certificate
+from app.models.document_category_model import DocumentCategory
+from app.models.document_type_model import DocumentType
+from app.repositories.vault_stats_repository import VaultStatsRepository
+
+
+def _snapshot(db_session, company_id):
+    db_session.expire_all()
+    stats = VaultStatsRepository.get(db_session, company_id)
+    if stats is None:
+        return None
+    return (stats.total, stats.valid, stats.warning, stats.expired, stats.processing, stats.error, stats.next_expiration)
+
+
+def _setup(db_session):
+    company = Company(cnpj="55555555000155", razao_social="Stats SA")
+    category = DocumentCategory(name="Fiscal", slug="fiscal-stats")
+    db_session.add_all([company, category])
+    db_session.flush()
+    doc_type = DocumentType(name="CND", slug="cnd-stats", category_id=category.id)
+    db_session.add(doc_type)
+    db_session.commit()
+    return company, doc_type
+
+
+def test_new_company_starts_with_zeroed_row(db_session):
+    company, _ = _setup(db_session)
+    assert _snapshot(db_session, company.id) == (0, 0, 0, 0, 0, 0, None)
+
+
+def test_inserts_apply_deltas_and_next_expiration(db_session):
+    company, doc_type = _setup(db_session)
+    db_session.add_all([
+        Document(filename="a.pdf", file_path="/f", company_id=company.id, status="valid", expiration_date=date(2031, 1, 1)),
+        Document(filename="b.pdf", file_path="/f", company_id=company.id, status="expired", expiration_date=date(2020, 1, 1)),
+        Certificate(type_id=doc_type.id, filename="c.pdf", file_path="/f", company_id=company.id, status="warning", expiration_date=date(2030, 6, 1)),
+    ])
+    db_session.commit()
+    assert _snapshot(db_session, company.id) == (3, 1, 1, 1, 0, 0, date(2030, 6, 1))
+
+    db_session.add(Certificate(type_id=doc_type.id, filename="d.pdf", file_path="/f", company_id=company.id, status="processing"))
+    db_session.commit()
+    assert _snapshot(db_session, company.id) == (4, 1, 1, 1, 1, 0, date(2030, 6, 1))
+
+
+def test_status_change_and_delete(db_session):
+    company, doc_type = _setup(db_session)
+    cert = Certificate(type_id=doc_type.id, filename="c.pdf", file_path="/f", company_id=company.id, status="valid", expiration_date=date(2030, 1, 1))
+    doc = Document(filename="a.pdf", file_path="/f", company_id=company.id, status="valid", expiration_date=date(2032, 1, 1))
+    db_session.add_all([cert, doc])
+    db_session.commit()
+
+    # Atributo expirado pelo commit (valor antigo desconhecido) -> recálculo da empresa
+    cert.status = "expired"
+    db_session.commit()
+    assert _snapshot(db_session, company.id) == (2, 1, 0, 1, 0, 0, date(2032, 1, 1))
+
+    # Valor antigo carregado -> delta puro
+    assert doc.status == "valid"
+    doc.status = "warning"
+    db_session.commit()
+    assert _snapshot(db_session, company.id) == (2, 0, 1, 1, 0, 0, date(2032, 1, 1))
+
+    db_session.delete(doc)
+    db_session.commit()
+    assert _snapshot(db_session, company.id) == (1, 0, 0, 1, 0, 0, None)
+
+
+def test_rollback_discards_deltas(db_session):
+    company, _ = _setup(db_session)
+    db_session.add(Document(filename="a.pdf", file_path="/f", company_id=company.id, status="valid"))
+    db_session.flush()
+    db_session.rollback()
+    assert _snapshot(db_session, company.id) == (0, 0, 0, 0, 0, 0, None)
+
+
+def test_company_delete_drops_row(db_session):
+    company, _ = _setup(db_session)
+    db_session.add(Document(filename="a.pdf", file_path="/f", company_id=company.id, status="valid"))
+    db_session.commit()
+    company_id = company.id
+
+    db_session.delete(company)
+    db_session.commit()
+    assert _snapshot(db_session, company_id) is None
+
+
+def test_rebuild_reconciles_bulk_changes(db_session):
+    company, doc_type = _setup(db_session)
+    db_session.add_all([
+        Document(filename="a.pdf", file_path="/f", company_id=company.id, status="valid", expiration_date=date(2030, 1, 1)),
+        Certificate(type_id=doc_type.id, filename="c.pdf", file_path="/f", company_id=company.id, status="valid"),
+    ])
+    db_session.commit()
+
+    # UPDATE em massa fora do ORM: a tabela fica defasada até a reconciliação
+    db_session.execute(text("UPDATE documents SET status = 'expired'"))
+    db_session.commit()
+    assert _snapshot(db_session, company.id)[1] == 2
+
+    VaultStatsRepository.recompute(db_session, [company.id])
+    db_session.commit()
+    assert _snapshot(db_session, company.id) == (2, 1, 0, 1, 0, 0, None)
+
+    db_session.execute(text("DELETE FROM company_vault_stats"))
+    assert VaultStatsRepository.rebuild(db_session) == 1
+    db_session.commit()
+    assert _snapshot(db_session, company.id) == (2, 1, 0, 1, 0, 0, None)
+
+
+def test_recompute_upserts_without_deleting_rows(db_session, query_counter):
+    """
+    O recálculo nunca apaga a linha: um delta concorrente sempre a encontra.
+    Empresa que ficou sem itens volta a zero (e não some).
+    """
+    company, _ = _setup(db_session)
+    doc = Document(filename="a.pdf", file_path="/f", company_id=company.id, status="valid", expiration_date=date(2030, 1, 1))
+    db_session.add(doc)
+    db_session.commit()
+    db_session.execute(text("DELETE FROM documents"))
+    db_session.commit()
+    query_counter.clear()
+
+    VaultStatsRepository.recompute(db_session, [company.id])
+    db_session.commit()
+
+    assert not [sql for sql in query_counter if sql.startswith("DELETE")]
+    assert any("ON CONFLICT" in sql for sql in query_counter)
+    assert _snapshot(db_session, company.id) == (0, 0, 0, 0, 0, 0, None)
+
+    # O delta seguinte soma sobre a linha recalculada
+    db_session.add(Document(filename="b.pdf", file_path="/g", company_id=company.id, status="warning"))
+    db_session.commit()
+    assert _snapshot(db_session, company.id) == (1, 0, 1, 0, 0, 0, None)
@@ -0,0 +1,109 @@
+"""
+Leitura dos Campos de uma Certidão (Texto -> Dados).
+Recebe o texto já extraído do PDF e localiza emissão, validade, CNPJ e código
+de autenticação com expressões regulares compiladas uma única vez (no import),
+já que o mesmo parser roda para cada página de cada certidão no pool de extração.
+
+O texto é normalizado antes (acentos removidos, espaços colapsados), então os
+padrões são ASCII: 'Válida até' e 'Valida ate' casam igual, mesmo quando a fonte
+do PDF não preserva a acentuação.
+"""
+import re
+import unicodedata
+from datetime import date, timedelta
+from typing import List, Optional
+
+_DATE = r"(\d{1,2})\s*[/.-]\s*(\d{1,2})\s*[/.-]\s*(\d{4})"
+
+CNPJ_RE = re.compile(r"(?<!\d)(\d{2})\.?(\d{3})\.?(\d{3})\s*/?\s*(\d{4})\s*-?\s*(\d{2})(?!\d)")
+
+# Emissão: "Emitida às 10:21:33 do dia 05/01/2026", "Data de emissão: 05/01/2026", "emitida em 05/01/2026"
+ISSUE_DATE_RE = re.compile(
+    r"(?:data\s+(?:de|da)\s+emissao|emitida(?:\s+as\s+[\d:h]+)?(?:\s+do\s+dia|\s+em)?|emissao)\s*[:\-]?\s*" + _DATE,
+    re.IGNORECASE,
+)
+
+# Validade: "Válida até 04/07/2026", "Data de validade: 04/07/2026", "Validade: 04/07/2026"
+EXPIRATION_DATE_RE = re.compile(
+    r"(?:valida\s+ate|data\s+de\s+validade|validade(?:\s+ate)?|vencimento|vence\s+em)\s*(?:o\s+dia\s*)?[:\-]?\s*" + _DATE,
+    re.IGNORECASE,
+)
+
+# Validade relativa: "válida por 180 (cento e oitenta) dias"
+VALIDITY_DAYS_RE = re.compile(r"valid[ao]\s+por\s+(\d{1,4})\s*(?:\([^)]*\)\s*)?dias", re.IGNORECASE)
+
+# Código: "Código de controle da certidão: 1A2B.3C4D.5E6F.7A8B", "Código de autenticação: ...", "Chave de validação ..."
+AUTH_CODE_RE = re.compile(
+    r"(?:codigo\s+de\s+(?:controle|autenticacao|verificacao|validacao)(?:\s+da\s+certidao)?"
+    r"|chave\s+de\s+(?:validacao|autenticacao|acesso))"
+    r"\s*(?:n[o.]?\s*)?[:\-]?\s*([A-Z0-9](?:[A-Z0-9.\-/ ]{4,60}[A-Z0-9])?)",
+    re.IGNORECASE,
+)
+# O código termina onde começa a próxima palavra (com minúscula, ou 5+ letras seguidas)
+_AUTH_CODE_STOP_RE = re.compile(r"\s(?=[A-Za-z]*[a-z]|[A-Z]{5,})")
+
+_SPACES_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Sem acentos e com espaços colapsados (as quebras de linha do PDF são irregulares)."""
+    folded = unicodedata.normalize("NFKD", text)
+    folded = "".join(char for char in folded if not unicodedata.combining(char))
+    return _SPACES_RE.sub(" ", folded).strip()
+
+
+def _to_date(match: Optional[re.Match]) -> Optional[date]:
+    if match is None:
+        return None
+    day, month, year = (int(group) for group in match.groups()[-3:])
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def find_cnpjs(text: str) -> List[str]:
+    """Todos os CNPJs do texto, só dígitos, na ordem em que aparecem (sem repetição)."""
+    seen = []
+    for match in CNPJ_RE.finditer(text):
+        digits = "".join(match.groups())
+        if digits not in seen:
+            seen.append(digits)
+    return seen
+
+
+def find_authentication_code(text: str) -> Optional[str]:
+    match = AUTH_CODE_RE.search(text)
+    if match is None:
+        return None
+    code = _AUTH_CODE_STOP_RE.split(match.group(1), maxsplit=1)[0]
+    return code.strip(" .-/").upper() or None
+
+
+def parse_certificate_text(text: str) -> dict:
+    """
+    Campos de uma certidão a partir do texto extraído.
+    Retorna {'issue_date', 'expiration_date', 'cnpj', 'cnpjs', 'authentication_code', 'validity_days'};
+    o que não for encontrado vem como None (ou lista vazia).
+    """
+    normalized = normalize_text(text)
+
+    issue_date = _to_date(ISSUE_DATE_RE.search(normalized))
+    expiration_date = _to_date(EXPIRATION_DATE_RE.search(normalized))
+
+    validity_days = None
+    days_match = VALIDITY_DAYS_RE.search(normalized)
+    if days_match:
+        validity_days = int(days_match.group(1))
+        if expiration_date is None and issue_date is not None:
+            expiration_date = issue_date + timedelta(days=validity_days)
+
+    cnpjs = find_cnpjs(normalized)
+    return {
+        "issue_date": issue_date,
+        "expiration_date": expiration_date,
+        "cnpj": cnpjs[0] if cnpjs else None,
+        "cnpjs": cnpjs,
+        "authentication_code": find_authentication_code(normalized),
+        "validity_days": validity_days,
+    }
@@ -0,0 +1,100 @@
+"""
+Exportação em Streaming do Cofre (NDJSON / CSV).
+Serializa a listagem unificada linha a linha, sem montar a lista inteira em memória.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import AsyncIterator, Iterable, Iterator, List
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.repositories.document_repository import DocumentRepository, AsyncDocumentRepository
+from app.schemas.document_schemas import DocumentResponse, ExportFormatEnum
+
+# Colunas exportadas = contrato do DocumentResponse (mesma ordem)
+EXPORT_FIELDS = list(DocumentResponse.model_fields.keys())
+
+# Quantas linhas agrupar por pedaço enviado na rede (evita um write por linha)
+FLUSH_EVERY = 500
+
+MEDIA_TYPES = {
+    ExportFormatEnum.NDJSON: "application/x-ndjson",
+    ExportFormatEnum.CSV: "text/csv; charset=utf-8",
+}
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+def iter_ndjson(rows: Iterable[dict]) -> Iterator[bytes]:
+    """Um objeto JSON por linha, enviado em blocos de FLUSH_EVERY linhas."""
+    buffer = []
+    for row in rows:
+        buffer.append(json.dumps({k: row.get(k) for k in EXPORT_FIELDS}, default=_json_default, ensure_ascii=False))
+        if len(buffer) >= FLUSH_EVERY:
+            yield ("\n".join(buffer) + "\n").encode("utf-8")
+            buffer.clear()
+    if buffer:
+        yield ("\n".join(buffer) + "\n").encode("utf-8")
+
+def iter_csv(rows: Iterable[dict], header: bool = True) -> Iterator[bytes]:
+    """CSV com cabeçalho, enviado em blocos de FLUSH_EVERY linhas."""
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+    if header:
+        writer.writeheader()
+    pending = 0
+    for row in rows:
+        writer.writerow({
+            k: (v.isoformat() if isinstance(v, (date, datetime)) else v)
+            for k, v in row.items()
+        })
+        pending += 1
+        if pending >= FLUSH_EVERY:
+            yield out.getvalue().encode("utf-8")
+            out.seek(0)
+            out.truncate(0)
+            pending = 0
+    yield out.getvalue().encode("utf-8")
+
+def stream_vault_export(db: Session, company_id: str, export_format: ExportFormatEnum, **filters) -> StreamingResponse:
+    """
+    Monta o StreamingResponse da exportação do cofre de uma empresa.
+    As linhas vêm do banco via yield_per, então o pico de memória é constante.
+    """
+    rows = DocumentRepository.iter_unified_by_company(db, company_id, **filters)
+    body = iter_ndjson(rows) if export_format == ExportFormatEnum.NDJSON else iter_csv(rows)
+    filename = f"cofre_{company_id}.{export_format.value}"
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+async def aiter_export(batches: AsyncIterator[List[dict]], export_format: ExportFormatEnum) -> AsyncIterator[bytes]:
+    """Versão assíncrona: serializa cada lote vindo do banco com os mesmos iter_ndjson/iter_csv."""
+    first = True
+    async for batch in batches:
+        body = iter_ndjson(batch) if export_format == ExportFormatEnum.NDJSON else iter_csv(batch, header=first)
+        for chunk in body:
+            if chunk:
+                yield chunk
+        first = False
+    if first and export_format == ExportFormatEnum.CSV:
+        # Cofre vazio: ainda devolve o cabeçalho
+        yield next(iter_csv([]))
+
+def stream_vault_export_async(db: AsyncSession, company_id: str, export_format: ExportFormatEnum, **filters) -> StreamingResponse:
+    """stream_vault_export para rotas 'async def' (cursor no servidor via AsyncSession.stream)."""
+    batches = AsyncDocumentRepository.stream_unified_by_company(db, company_id, **filters)
+    filename = f"cofre_{company_id}.{export_format.value}"
+    return StreamingResponse(
+        aiter_export(batches, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
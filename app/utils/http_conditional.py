@@ -0,0 +1,112 @@
+"""
+GET Condicional e Range (RFC 9110) para os Downloads.
+Funções puras sobre os headers da requisição, usadas por storage.download_response():
+
+- validators(): ETag forte (o SHA-256 do conteúdo, que nunca muda para o mesmo blob)
+  e Last-Modified, ambos vindos do banco;
+- is_not_modified(): decide o 304 só com esses metadados, sem tocar no storage;
+- requested_range(): um único intervalo 'bytes=' (o que os visualizadores de PDF pedem).
+  Múltiplos intervalos ou sintaxe inválida caem no 200 completo, como a RFC permite.
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Mapping, Optional, Tuple
+
+
+class RangeNotSatisfiable(Exception):
+    """Intervalo fora do arquivo (vira 416 com 'Content-Range: bytes */<tamanho>')."""
+
+
+def make_etag(content_hash: Optional[str]) -> Optional[str]:
+    return f'"{content_hash}"' if content_hash else None
+
+
+def http_date(moment: datetime) -> str:
+    # Datas sem fuso vindas do SQLite são UTC (server_default=now())
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return format_datetime(moment.astimezone(timezone.utc), usegmt=True)
+
+
+def validators(content_hash: Optional[str], last_modified: Optional[datetime]) -> dict:
+    """Headers ETag/Last-Modified de um arquivo (só os que existirem)."""
+    headers = {}
+    etag = make_etag(content_hash)
+    if etag:
+        headers["ETag"] = etag
+    if last_modified:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def _etag_matches(header_value: str, etag: str) -> bool:
+    # If-None-Match usa comparação fraca: 'W/"x"' casa com '"x"'
+    if header_value.strip() == "*":
+        return True
+    candidates = (item.strip() for item in header_value.split(","))
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def _parse_http_date(value: str) -> Optional[datetime]:
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def is_not_modified(headers: Mapping[str, str], etag: Optional[str], last_modified: Optional[datetime]) -> bool:
+    """True = responder 304. If-None-Match, quando presente, manda sozinho (If-Modified-Since é ignorado)."""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag is not None and _etag_matches(if_none_match, etag)
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        since = _parse_http_date(if_modified_since)
+        if since is None:
+            return False
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        # O header tem resolução de segundos
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def requested_range(headers: Mapping[str, str], size: int, current_validators: Mapping[str, str]) -> Optional[Tuple[int, int]]:
+    """
+    (início, fim) inclusivos do Range pedido, ou None para enviar o arquivo inteiro.
+    If-Range diferente do ETag/Last-Modified atual também dá None (o arquivo mudou).
+    Levanta RangeNotSatisfiable se o intervalo começa depois do fim do arquivo.
+    """
+    header = headers.get("range")
+    if not header:
+        return None
+    if_range = headers.get("if-range")
+    if if_range is not None and if_range.strip() not in (current_validators.get("ETag"), current_validators.get("Last-Modified")):
+        return None
+
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash:
+        return None
+    if size == 0:
+        raise RangeNotSatisfiable()
+    try:
+        if first == "":
+            # Sufixo: os últimos N bytes
+            length = int(last)
+            if length <= 0:
+                raise RangeNotSatisfiable()
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start > end and last:
+        return None # 'bytes=9-2' é inválido: ignora o Range
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
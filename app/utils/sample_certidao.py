@@ -0,0 +1,114 @@
+"""
+Gerador de Certidões de Exemplo (PDF sintético).
+Monta PDFs de texto com o layout das certidões negativas mais comuns (Receita/PGFN,
+FGTS, Trabalhista), sem depender de biblioteca de escrita de PDF.
+Usado pelos testes do pipeline de extração e pelo benchmark
+(app/scripts/benchmark_pdf_extraction.py) para gerar um corpus reproduzível.
+"""
+from datetime import date, timedelta
+from typing import List, Optional
+
+_FILLER = (
+    "Esta certidao refere-se exclusivamente a situacao do sujeito passivo no ambito da "
+    "Secretaria da Receita Federal do Brasil e da Procuradoria-Geral da Fazenda Nacional."
+)
+
+
+def format_cnpj(cnpj: str) -> str:
+    return f"{cnpj[:2]}.{cnpj[2:5]}.{cnpj[5:8]}/{cnpj[8:12]}-{cnpj[12:]}"
+
+
+def certidao_lines(
+    cnpj: str,
+    issue_date: date,
+    expiration_date: Optional[date] = None,
+    authentication_code: str = "A1B2.C3D4.E5F6.0789",
+    razao_social: str = "EMPRESA DE EXEMPLO LTDA",
+) -> List[str]:
+    """Texto de uma certidão (uma linha por item da lista)."""
+    lines = [
+        "MINISTÉRIO DA FAZENDA",
+        "CERTIDÃO NEGATIVA DE DÉBITOS RELATIVOS AOS TRIBUTOS FEDERAIS E À DÍVIDA ATIVA DA UNIÃO",
+        f"Nome: {razao_social}",
+        f"CNPJ: {format_cnpj(cnpj)}",
+        "Ressalvado o direito de a Fazenda Nacional cobrar e inscrever quaisquer dívidas,",
+        "constata-se que não constam pendências em seu nome.",
+        f"Emitida às 10:21:33 do dia {issue_date:%d/%m/%Y} <hora e data de Brasília>.",
+    ]
+    if expiration_date is not None:
+        lines.append(f"Válida até {expiration_date:%d/%m/%Y}.")
+    else:
+        lines.append("Certidão válida por 180 (cento e oitenta) dias.")
+    lines.append(f"Código de controle da certidão: {authentication_code}")
+    lines.append("Qualquer rasura ou emenda invalidará este documento.")
+    return lines
+
+
+def build_pdf(pages: List[List[str]]) -> bytes:
+    """PDF mínimo e válido: uma página A4 por lista de linhas, fonte Helvetica (WinAnsi)."""
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog_id = add(b"")  # Preenchidos depois que os ids das páginas existirem
+    pages_id = add(b"")
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    page_ids = []
+    for lines in pages:
+        commands = ["BT", "/F1 10 Tf", "14 TL", "50 800 Td"]
+        for line in lines:
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            commands.append(f"({escaped}) Tj T*")
+        commands.append("ET")
+        stream = "\n".join(commands).encode("cp1252", errors="replace")
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_id, font_id, content_id)
+        ))
+
+    objects[catalog_id - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_at = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog_id, xref_at)
+    return bytes(output)
+
+
+def build_certidao_pdf(
+    cnpj: str,
+    issue_date: date,
+    expiration_date: Optional[date] = None,
+    authentication_code: str = "A1B2.C3D4.E5F6.0789",
+    extra_pages: int = 0,
+) -> bytes:
+    """Certidão completa na 1ª página + 'extra_pages' de texto corrido (anexos/observações)."""
+    first = certidao_lines(cnpj, issue_date, expiration_date, authentication_code)
+    filler = [_FILLER[i:i + 95] for i in range(0, len(_FILLER), 95)] * 20
+    return build_pdf([first] + [filler] * extra_pages)
+
+
+def sample_corpus(count: int, extra_pages: int = 1, start: date = date(2026, 1, 5)) -> List[bytes]:
+    """'count' certidões variadas (CNPJ, datas e código diferentes) para benchmark."""
+    corpus = []
+    for index in range(count):
+        issue = start + timedelta(days=index % 90)
+        corpus.append(build_certidao_pdf(
+            cnpj=f"{10_000_000 + index:08d}0001{index % 100:02d}",
+            issue_date=issue,
+            expiration_date=issue + timedelta(days=180) if index % 2 == 0 else None,
+            authentication_code=f"{index:04X}.B2C3.D4E5.F6A7",
+            extra_pages=extra_pages,
+        ))
+    return corpus
@@ -0,0 +1,194 @@
+"""
+Classificação de Status por Vencimento (valid / warning / expired).
+Regra única usada em três lugares:
+- no job em lote (app/services/status_refresh_service.py), que persiste a coluna 'status';
+- na leitura (listagem, exportação, painel), que deriva o status na hora a partir
+  do vencimento, então a resposta fica certa mesmo se o job estiver atrasado;
+- nos filtros SQL por status, para que o filtro bata com o que é exibido.
+
+Vencimento efetivo: expiration_date; sem ele, para certidões cujo Tipo tem
+validity_days_default > 0, emissão (ou upload) + validade padrão.
+
+Custo na leitura (app/scripts/benchmark_status_classifier.py): ~40-45 ms extras por
+100 mil linhas no laço em Python puro.
+"""
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_, case, cast, func, literal, Date, String
+
+from app.models.certificate_model import Certificate
+from app.models.document_model import DocumentStatus
+from app.models.document_type_model import DocumentType
+
+# Dias antes do vencimento em que o item passa a 'warning' (sobrescrevível via .env)
+EXPIRATION_WARNING_DAYS = int(os.getenv("EXPIRATION_WARNING_DAYS", "30"))
+# Deriva o status na leitura (False = confia só na coluna persistida)
+STATUS_ON_READ = os.getenv("STATUS_ON_READ", "true").lower() in ("1", "true", "yes")
+
+# Status controlados pelo vencimento (os demais pertencem ao pipeline de leitura)
+MANAGED_STATUSES = (DocumentStatus.VALID.value, DocumentStatus.WARNING.value, DocumentStatus.EXPIRED.value)
+
+_MANAGED_SET = frozenset(MANAGED_STATUSES)
+_VALID, _WARNING, _EXPIRED = MANAGED_STATUSES
+
+# Colunas auxiliares projetadas pela listagem unificada (removidas após a classificação)
+ISSUE_DATE_KEY = "_issue_date"
+VALIDITY_DAYS_KEY = "_validity_days"
+
+
+def classify_status(expiration_date: Optional[date], today: Optional[date] = None,
+                    warning_days: int = EXPIRATION_WARNING_DAYS) -> str:
+    """Status de um vencimento. Sem data, o item é considerado em dia."""
+    if expiration_date is None:
+        return DocumentStatus.VALID.value
+    today = today or date.today()
+    if expiration_date < today:
+        return DocumentStatus.EXPIRED.value
+    if expiration_date <= today + timedelta(days=warning_days):
+        return DocumentStatus.WARNING.value
+    return DocumentStatus.VALID.value
+
+
+def expiration_range(column, target: str, today: date, warning_days: int = EXPIRATION_WARNING_DAYS):
+    """Condição SQL sobre a coluna de vencimento que corresponde ao status alvo."""
+    warning_until = today + timedelta(days=warning_days)
+    if target == DocumentStatus.EXPIRED.value:
+        return column < today
+    if target == DocumentStatus.WARNING.value:
+        return column.between(today, warning_until)
+    if target == DocumentStatus.VALID.value:
+        return column > warning_until
+    raise ValueError(f"Status não controlado por vencimento: {target}")
+
+
+def _status_bounds(target: str, today: date, warning_days: int) -> Tuple[Optional[date], Optional[date]]:
+    """Faixa [início, fim) de vencimentos do status alvo (None = sem limite)."""
+    after_warning = today + timedelta(days=warning_days + 1)
+    if target == DocumentStatus.EXPIRED.value:
+        return None, today
+    if target == DocumentStatus.WARNING.value:
+        return today, after_warning
+    if target == DocumentStatus.VALID.value:
+        return after_warning, None
+    raise ValueError(f"Status não controlado por vencimento: {target}")
+
+
+def _in_bounds(column, lower, upper):
+    conditions = []
+    if lower is not None:
+        conditions.append(column >= lower)
+    if upper is not None:
+        conditions.append(column < upper)
+    return and_(*conditions)
+
+
+def indexed_expiration_range(model, target: str, today: date, warning_days: int,
+                             validity_by_type: Dict[str, int]):
+    """
+    Mesma condição de expiration_range(effective_expiration_sql(model)), escrita só com faixas
+    sobre colunas (sem coalesce nem soma de datas), para o banco usar os índices de
+    expiration_date e (type_id, issue_date) no job em lote. A validade padrão vira um
+    deslocamento da faixa por Tipo: emissão + N dias em [a, b)  <=>  emissão em [a - N, b - N).
+    validity_by_type: {type_id: validity_days_default} dos Tipos com validade padrão > 0.
+    """
+    lower, upper = _status_bounds(target, today, warning_days)
+    by_date = _in_bounds(model.expiration_date, lower, upper)
+    if model is not Certificate or not validity_by_type:
+        return by_date
+
+    by_validity = []
+    for type_id, days in sorted(validity_by_type.items()):
+        start = lower - timedelta(days=days) if lower else None
+        end = upper - timedelta(days=days) if upper else None
+        # Sem emissão vale a data do upload: faixa sobre created_at (datas comparadas à meia-noite)
+        uploaded = _in_bounds(
+            Certificate.created_at,
+            literal(start, Date) if start else None,
+            literal(end, Date) if end else None,
+        )
+        by_validity.append(and_(
+            Certificate.type_id == type_id,
+            or_(_in_bounds(Certificate.issue_date, start, end), and_(Certificate.issue_date.is_(None), uploaded)),
+        ))
+    return or_(by_date, and_(Certificate.expiration_date.is_(None), or_(*by_validity)))
+
+
+def _add_days(base, days, dialect_name: str):
+    """base + N dias em SQL (o SQLite não soma inteiro em data: usa date(base, '+N days'))."""
+    if dialect_name == "sqlite":
+        modifier = literal("+", String).concat(cast(days, String)).concat(" days")
+        return func.date(base, modifier, type_=Date)
+    return base + days
+
+
+def effective_expiration_sql(model, dialect_name: str):
+    """
+    Vencimento efetivo em SQL, a mesma regra de _effective_expiration.
+    Para certidões usa DocumentType.validity_days_default: o SELECT precisa do JOIN com o Tipo.
+    """
+    if model is not Certificate:
+        return model.expiration_date
+    if dialect_name == "sqlite":
+        upload_date = func.date(Certificate.created_at, type_=Date)
+    else:
+        upload_date = cast(Certificate.created_at, Date)
+    by_validity = _add_days(
+        func.coalesce(Certificate.issue_date, upload_date), DocumentType.validity_days_default, dialect_name
+    )
+    return func.coalesce(
+        Certificate.expiration_date,
+        case((DocumentType.validity_days_default > 0, by_validity), else_=None),
+        type_=Date,
+    )
+
+
+def status_filter(model, status: str, dialect_name: str, today: Optional[date] = None,
+                  warning_days: int = EXPIRATION_WARNING_DAYS):
+    """
+    Filtro SQL por status coerente com o status derivado na leitura:
+    itens com vencimento efetivo caem pela faixa; sem ele, vale a coluna persistida.
+    """
+    if not STATUS_ON_READ or status not in MANAGED_STATUSES:
+        return model.status == status
+    today = today or date.today()
+    expiration = effective_expiration_sql(model, dialect_name)
+    return or_(
+        and_(model.status.in_(MANAGED_STATUSES), expiration_range(expiration, status, today, warning_days)),
+        and_(model.status == status, expiration.is_(None)),
+    )
+
+
+def _effective_expiration(row: dict) -> Optional[date]:
+    issue_date = row.pop(ISSUE_DATE_KEY, None)
+    validity_days = row.pop(VALIDITY_DAYS_KEY, None)
+    if row.get("expiration_date") is not None:
+        return row["expiration_date"]
+    if not validity_days:
+        return None
+    base = issue_date
+    if base is None and isinstance(row.get("created_at"), datetime):
+        base = row["created_at"].date()
+    return base + timedelta(days=validity_days) if base else None
+
+
+def classify_rows(rows: List[dict], today: Optional[date] = None,
+                  warning_days: int = EXPIRATION_WARNING_DAYS) -> List[dict]:
+    """
+    Reescreve 'status' das linhas da listagem unificada (in-place) e remove as colunas auxiliares.
+    Só mexe em itens com vencimento conhecido e status controlado (valid/warning/expired).
+    """
+    if not rows:
+        return rows
+    today = today or date.today()
+    effective = [_effective_expiration(row) for row in rows]
+    if not STATUS_ON_READ:
+        return rows
+
+    warning_until = today + timedelta(days=warning_days)
+    for row, expiration in zip(rows, effective):
+        if expiration is not None and row.get("status") in _MANAGED_SET:
+            row["status"] = _EXPIRED if expiration < today else _WARNING if expiration <= warning_until else _VALID
+    return rows
+